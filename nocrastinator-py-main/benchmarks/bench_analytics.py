@@ -0,0 +1,155 @@
+"""
+Benchmark of weekly analytics: the original per-day CSV scans, a single
+loop over storage rows, and NumPy group-bys over column arrays (CSV and
+memory-mapped binary log).
+
+Run from the nocrastinator-py-main directory:
+    python benchmarks/bench_analytics.py --days 90 --rows-per-day 2000
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from analytics import load_frame
+from binary_log import BinaryStorage, convert_csv_log
+from daily_aggregates import empty_totals, add_to_totals
+from storage import CsvStorage
+
+APPS = [
+    ("code.exe", True), ("chrome.exe", True), ("chrome.exe", False), ("discord.exe", False),
+    ("slack.exe", None), ("explorer.exe", None), ("vlc.exe", False), ("python.exe", None),
+]
+
+def write_log(path, days, rows_per_day):
+    """Write a random activity log covering the last days days"""
+    today = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['timestamp', 'app_name', 'window_title', 'duration_seconds', 'is_productive'])
+        for day in range(days - 1, -1, -1):
+            moment = today - timedelta(days=day)
+            for _ in range(rows_per_day):
+                app, productive = random.choice(APPS)
+                duration = round(random.uniform(1, 30), 2)
+                moment += timedelta(seconds=int(duration) + 1)
+                writer.writerow([moment.strftime('%Y-%m-%d %H:%M:%S'), app, f"{app} window", duration, str(productive)])
+
+def week_dates():
+    """The seven dates shown by the Analysis tab"""
+    today = datetime.now().date()
+    return [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(6, -1, -1)]
+
+def legacy_week(log_file):
+    """The original access pattern: one full CSV scan per day for totals and again for suggestions"""
+    daily = {}
+    unproductive_apps = {}
+    for date in week_dates():
+        totals = empty_totals()
+        with open(log_file, 'r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader)
+            for row in reader:
+                if row[0].startswith(date):
+                    add_to_totals(totals, row[1], float(row[3]), {'True': True, 'False': False}.get(row[4]))
+        daily[date] = totals
+    for date in week_dates():
+        with open(log_file, 'r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader)
+            for row in reader:
+                if row[0].startswith(date) and row[4] == 'False':
+                    unproductive_apps[row[1]] = unproductive_apps.get(row[1], 0) + float(row[3])
+    return daily
+
+def loop_week(storage):
+    """One pass over storage rows accumulating per-day totals in Python"""
+    dates = week_dates()
+    daily = {date: empty_totals() for date in dates}
+    for record in storage.iter_range(dates[0], dates[-1]):
+        add_to_totals(daily[record.timestamp[:10]], record.app_name, record.duration, record.is_productive)
+    return daily
+
+def numpy_week(storage):
+    """Load the week into column arrays and group by day and app"""
+    dates = week_dates()
+    return load_frame(storage, dates[0], dates[-1]).daily_totals()
+
+def same_totals(expected, actual):
+    """Compare daily totals allowing for float summation order"""
+    if expected.keys() != actual.keys():
+        return False
+    for date in expected:
+        a, b = expected[date], actual[date]
+        for key in ('total_time', 'productive_time', 'unproductive_time', 'neutral_time'):
+            if not math.isclose(a[key], b[key], abs_tol=1e-6):
+                return False
+        for key in ('apps', 'unproductive_apps'):
+            if a[key].keys() != b[key].keys():
+                return False
+            if not all(math.isclose(a[key][app], b[key][app], abs_tol=1e-6) for app in a[key]):
+                return False
+    return True
+
+def time_call(function, repeat):
+    """Best wall time of repeat calls, plus the last result"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=90, help="days of history to generate")
+    parser.add_argument("--rows-per-day", type=int, default=2000, help="activity rows per day")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per variant (best is reported)")
+    args = parser.parse_args()
+    random.seed(0)
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        log_file = os.path.join(data_dir, "activity_log.csv")
+        binary_file = os.path.join(data_dir, "activity_log.bin")
+        strings_file = os.path.join(data_dir, "activity_strings.bin")
+        scores_file = os.path.join(data_dir, "focus_scores.json")
+        write_log(log_file, args.days, args.rows_per_day)
+        convert_csv_log(log_file, binary_file, strings_file)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            csv_storage = CsvStorage(log_file, scores_file)
+            binary_storage = BinaryStorage(binary_file, strings_file, scores_file)
+        
+        variants = [
+            ("legacy per-day CSV scans", lambda: legacy_week(log_file)),
+            ("python loop (csv)", lambda: loop_week(csv_storage)),
+            ("python loop (binary)", lambda: loop_week(binary_storage)),
+            ("numpy (csv)", lambda: numpy_week(csv_storage)),
+            ("numpy (binary mmap)", lambda: numpy_week(binary_storage)),
+        ]
+        
+        print(f"{args.days} days x {args.rows_per_day} rows, weekly totals")
+        baseline = None
+        expected = None
+        for name, function in variants:
+            elapsed, result = time_call(function, args.repeat)
+            if expected is None:
+                baseline, expected = elapsed, result
+            match = "ok" if same_totals(expected, result) else "MISMATCH"
+            print(f"  {name:<26} {elapsed * 1000:9.1f} ms  {baseline / elapsed:6.1f}x  {match}")
+        
+        csv_storage.close()
+        binary_storage.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Microbenchmark comparing the per-call cost of the legacy is_productive
+implementation against the precompiled ActivityClassifier.
+
+Run from the nocrastinator-py-main directory:
+    python benchmarks/bench_classifier.py
+"""
+
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import config
+from classifier import ActivityClassifier
+from website_extractor import WebsiteExtractor
+
+SAMPLE_WINDOWS = [
+    ("code.exe", "app.py - nocrastinator-py-main - Visual Studio Code"),
+    ("chrome.exe", "Pull requests - github.com - Google Chrome"),
+    ("chrome.exe", "python - How to sort a dict - Stack Overflow - Google Chrome"),
+    ("chrome.exe", "Home / X - Google Chrome"),
+    ("firefox.exe", "(3) YouTube - Mozilla Firefox"),
+    ("msedge.exe", "New tab - Microsoft Edge"),
+    ("discord.exe", "#general - Discord"),
+    ("explorer.exe", "Desktop - File Explorer"),
+    ("python.exe", "Productivity Tracker"),
+    ("slack.exe", "Slack | standup | Team"),
+    ("notepad.exe", "notes.txt - Notepad"),
+    ("vlc.exe", "movie.mkv - VLC media player"),
+]
+
+def legacy_extract_website(app_name, window_title):
+    """Copy of the original ActivityTracker.extract_website_from_title"""
+    if not window_title or app_name not in config.BROWSERS:
+        return None
+    patterns = [
+        r'(?:https?://)?(?:www\.)?([a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)',
+        r'(?:.*?)(?:[-|]\s*)((?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)(?:\s*[-|])',
+        r'(?:.*?)(?:[-|]\s*)((?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)(?:\s*)$',
+    ]
+    window_title_lower = window_title.lower()
+    known_sites = {
+        'facebook': 'facebook.com', 'twitter': 'twitter.com', 'x.com': 'twitter.com',
+        'instagram': 'instagram.com', 'reddit': 'reddit.com', 'youtube': 'youtube.com',
+        'netflix': 'netflix.com', 'tiktok': 'tiktok.com', 'twitch': 'twitch.tv',
+        'github': 'github.com', 'stackoverflow': 'stackoverflow.com',
+        'stack overflow': 'stackoverflow.com', 'linkedin': 'linkedin.com',
+        'udemy': 'udemy.com', 'coursera': 'coursera.org', 'edx': 'edx.org',
+        'kaggle': 'kaggle.com'
+    }
+    for site, domain in known_sites.items():
+        if site in window_title_lower:
+            print(f"Website detected: {domain} (from title: {window_title})")
+            return domain
+    for pattern in patterns:
+        match = re.search(pattern, window_title)
+        if match:
+            domain = match.group(1)
+            print(f"Website detected: {domain} (from title: {window_title})")
+            return domain
+    return None
+
+def legacy_is_productive(app_name, window_title):
+    """Copy of the original ActivityTracker.is_productive"""
+    app_name = app_name.lower()
+    if app_name in config.BROWSERS:
+        website = legacy_extract_website(app_name, window_title)
+        if website:
+            for prod_site in config.PRODUCTIVE_WEBSITES:
+                if prod_site in website:
+                    print(f"Productive website detected: {website}")
+                    return True
+            for unprod_site in config.UNPRODUCTIVE_WEBSITES:
+                if unprod_site in website:
+                    print(f"Unproductive website detected: {website}")
+                    return False
+            print(f"Uncategorized website detected: {website}")
+    if app_name in (app.lower() for app in config.PRODUCTIVE_APPS):
+        return True
+    elif app_name in (app.lower() for app in config.UNPRODUCTIVE_APPS):
+        return False
+    window_title = window_title.lower()
+    for website in config.PRODUCTIVE_WEBSITES:
+        if website in window_title:
+            return True
+    for website in config.UNPRODUCTIVE_WEBSITES:
+        if website in window_title:
+            return False
+    return None
+
+def run(func, workload, number):
+    """Return the mean cost per call in microseconds"""
+    def body():
+        for app_name, window_title in workload:
+            func(app_name, window_title)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = min(timeit.repeat(body, number=number, repeat=5))
+    return seconds / (number * len(workload)) * 1e6
+
+def main():
+    random.seed(42)
+    workload = [random.choice(SAMPLE_WINDOWS) for _ in range(1000)]
+    
+    cached = ActivityClassifier(config.BROWSERS, legacy_extract_website)
+    uncached = ActivityClassifier(config.BROWSERS, legacy_extract_website, cache_size=0)
+    extractor = ActivityClassifier(config.BROWSERS, WebsiteExtractor(config.BROWSERS).extract, cache_size=0)
+    
+    # Both implementations must agree before their timings mean anything
+    with contextlib.redirect_stdout(io.StringIO()):
+        for app_name, window_title in SAMPLE_WINDOWS:
+            expected = legacy_is_productive(app_name, window_title)
+            assert cached.is_productive(app_name, window_title) == expected, (app_name, window_title)
+            assert uncached.is_productive(app_name, window_title) == expected, (app_name, window_title)
+            assert extractor.is_productive(app_name, window_title) == expected, (app_name, window_title)
+    
+    legacy = run(legacy_is_productive, workload, 20)
+    cold = run(uncached.is_productive, workload, 20)
+    titles = run(extractor.is_productive, workload, 20)
+    warm = run(cached.is_productive, workload, 20)
+    
+    print(f"{'implementation':<28} {'us/call':>10} {'speedup':>10}")
+    print(f"{'legacy is_productive':<28} {legacy:>10.3f} {1:>9.1f}x")
+    print(f"{'classifier (no memo)':<28} {cold:>10.3f} {legacy / cold:>9.1f}x")
+    print(f"{'classifier + title cache':<28} {titles:>10.3f} {legacy / titles:>9.1f}x")
+    print(f"{'classifier (LRU memo)':<28} {warm:>10.3f} {legacy / warm:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
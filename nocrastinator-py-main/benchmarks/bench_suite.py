@@ -0,0 +1,254 @@
+"""
+Benchmark runner for the tracker's hot paths over a synthetic history.
+
+Times get_daily_summary, calculate_daily_score, get_weekly_analysis,
+get_streak, is_productive and extract_website_from_title against a log
+made by generate_log.py, and reports median/p95 latency and peak memory.
+Operations that memoize are timed twice: warm, as the app calls them, and
+as "(cold)" with their caches cleared before every call. Results can be
+written as JSON and compared with an earlier run.
+
+Run from the nocrastinator-py-main directory:
+    python benchmarks/bench_suite.py --days 730 --rows-per-day 2000 --json results.json
+    python benchmarks/bench_suite.py --days 730 --rows-per-day 2000 --compare results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Not available on Windows
+
+import config
+from generate_log import generate_log, build_windows
+
+def use_data_directory(data_dir, backend):
+    """Point every data file in config at data_dir"""
+    config.DATA_DIRECTORY = data_dir
+    config.ACTIVITY_LOG_FILE = os.path.join(data_dir, "activity_log.csv")
+    config.ACTIVITY_INDEX_FILE = f"{config.ACTIVITY_LOG_FILE}.idx"
+    config.FOCUS_SCORE_FILE = os.path.join(data_dir, "focus_scores.json")
+    config.FOCUS_SCORE_JOURNAL_FILE = f"{config.FOCUS_SCORE_FILE}.journal"
+    config.TIME_BUCKET_FILE = os.path.join(data_dir, "time_buckets.json")
+    config.TIME_BUCKET_JOURNAL_FILE = f"{config.TIME_BUCKET_FILE}.journal"
+    config.BACKFILL_CHECKPOINT_FILE = os.path.join(data_dir, "backfill_checkpoint.json")
+    config.SQLITE_DATABASE_FILE = os.path.join(data_dir, "nocrastinator.db")
+    config.BINARY_LOG_FILE = os.path.join(data_dir, "activity_log.bin")
+    config.BINARY_STRINGS_FILE = os.path.join(data_dir, "activity_strings.bin")
+    config.UNPRODUCTIVE_TIME_THRESHOLD = float("inf")
+    config.STORAGE_BACKEND = backend
+
+def prepare_storage(backend):
+    """Convert the generated CSV log for the sqlite and binary backends"""
+    if backend == "sqlite":
+        from sqlite_storage import import_legacy_data
+        import_legacy_data()
+    elif backend == "binary":
+        from binary_log import convert_csv_log
+        convert_csv_log()
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def measure(function, make_args, calls, clear=None):
+    """
+    Time calls calls of function(*make_args()), then one more call under
+    tracemalloc for its peak allocation. The first call is reported on its
+    own since it pays for cold caches. With clear, clear(*args) runs
+    untimed before every call so each one misses the caches.
+    """
+    samples = []
+    for _ in range(calls):
+        args = make_args()
+        if clear:
+            clear(*args)
+        started = time.perf_counter()
+        function(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    
+    args = make_args()
+    if clear:
+        clear(*args)
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    ordered = sorted(samples)
+    return {
+        'calls': calls,
+        'first_ms': samples[0],
+        'median_ms': percentile(ordered, 50),
+        'p95_ms': percentile(ordered, 95),
+        'mean_ms': sum(samples) / len(samples),
+        'max_ms': ordered[-1],
+        'peak_kb': peak / 1024
+    }
+
+def peak_rss_kb():
+    """Peak resident set size of this process, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == "darwin" else peak  # Bytes on macOS, KB elsewhere
+
+def run_suite(args, data_dir):
+    """Generate the history, build the tracker objects and time every operation"""
+    use_data_directory(data_dir, args.storage)
+    started = time.perf_counter()
+    rows, windows = generate_log(config.ACTIVITY_LOG_FILE, args.days, args.rows_per_day, args.seed)
+    prepare_storage(args.storage)
+    generated = time.perf_counter() - started
+    
+    from activity_tracker import ActivityTracker
+    from focus_score import FocusScore
+    from window_probe import ScriptedWindowProbe
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        tracker = ActivityTracker(probe=ScriptedWindowProbe([]), poll_interval=0)
+        focus_score = FocusScore()
+        startup = (time.perf_counter() - started) * 1000
+    
+    rng = random.Random(args.seed)
+    today = datetime.now().date()
+    dates = [(today - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(args.days)]
+    pairs, cumulative = build_windows(40, 1.1, random.Random(args.seed))
+    
+    def random_date():
+        return (rng.choice(dates),)
+    
+    def random_window():
+        return rng.choices(pairs, cum_weights=cumulative)[0]
+    
+    def no_args():
+        return ()
+    
+    def forget_totals(date):
+        tracker.aggregates.invalidate(date)
+    
+    def forget_score(date):
+        focus_score.aggregates.invalidate(date)
+        with focus_score._lock:
+            focus_score.scores.pop(date, None)
+    
+    def forget_classifications(app_name, window_title):
+        tracker.classifier.clear_cache()
+        tracker.website_extractor.clear_cache()
+    
+    def forget_websites(app_name, window_title):
+        tracker.website_extractor.clear_cache()
+    
+    # (name, function, argument maker, calls, cache clearer for a cold run)
+    operations = [
+        ("get_daily_summary", tracker.get_daily_summary, random_date, args.calls, forget_totals),
+        ("calculate_daily_score", focus_score.calculate_daily_score, random_date, args.calls, forget_score),
+        ("get_weekly_analysis", focus_score.get_weekly_analysis, no_args, args.calls, None),
+        ("get_streak", focus_score.get_streak, no_args, args.micro_calls, None),
+        ("is_productive", tracker.is_productive, random_window, args.micro_calls, forget_classifications),
+        ("extract_website_from_title", tracker.extract_website_from_title, random_window, args.micro_calls, forget_websites),
+    ]
+    
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, function, make_args, calls, clear in operations:
+            if args.only and name not in args.only:
+                continue
+            if clear:
+                results[f"{name} (cold)"] = measure(function, make_args, calls, clear)
+            results[name] = measure(function, make_args, calls)
+        tracker.storage.close()
+    
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'storage': args.storage,
+            'days': args.days,
+            'rows_per_day': args.rows_per_day,
+            'rows': rows,
+            'windows': windows,
+            'seed': args.seed,
+            'generate_seconds': generated,
+            'startup_ms': startup,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': numpy_version
+        },
+        'results': results,
+        'peak_rss_kb': peak_rss_kb()
+    }
+
+def print_report(report, baseline=None):
+    """Print the results as a table, with the change from a baseline run if given"""
+    meta = report['meta']
+    print(f"{meta['rows']} rows over {meta['days']} days ({meta['storage']} storage), "
+          f"startup {meta['startup_ms']:.0f} ms")
+    header = f"{'operation':<34} {'calls':>6} {'first ms':>9} {'median ms':>10} {'p95 ms':>9} {'peak KB':>9}"
+    if baseline:
+        header += f" {'median vs base':>15}"
+    print(header)
+    for name, result in report['results'].items():
+        line = (f"{name:<34} {result['calls']:>6} {result['first_ms']:>9.3f} {result['median_ms']:>10.4f} "
+                f"{result['p95_ms']:>9.4f} {result['peak_kb']:>9.1f}")
+        base = baseline['results'].get(name) if baseline else None
+        if base and base['median_ms'] > 0:
+            line += f" {result['median_ms'] / base['median_ms']:>14.2f}x"
+        print(line)
+    if report['peak_rss_kb'] is not None:
+        print(f"Peak RSS: {report['peak_rss_kb'] / 1024:.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=365, help="days of history to generate (default: 365)")
+    parser.add_argument("--rows-per-day", type=int, default=2000, help="average rows on a weekday (default: 2000)")
+    parser.add_argument("--storage", default="csv", choices=["csv", "sqlite", "binary"], help="storage backend (default: csv)")
+    parser.add_argument("--calls", type=int, default=50, help="calls per storage-backed operation (default: 50)")
+    parser.add_argument("--micro-calls", type=int, default=5000, help="calls per in-memory operation (default: 5000)")
+    parser.add_argument("--only", nargs="+", help="operations to run (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the history and inputs (default: 0)")
+    parser.add_argument("--data-dir", help="keep the generated data here instead of a temporary directory")
+    parser.add_argument("--json", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare medians with")
+    args = parser.parse_args()
+    
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        report = run_suite(args, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as data_dir:
+            report = run_suite(args, data_dir)
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+    
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Load test for ActivityTracker._track_activity_loop driven by a scripted
+window probe, so it runs without a desktop session.
+
+Run from the nocrastinator-py-main directory:
+    python benchmarks/bench_tracker_loop.py --seconds 5 --rate 5000 [--push]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import config
+from activity_tracker import ActivityTracker
+from window_probe import ScriptedWindowProbe
+
+WINDOWS = [
+    ("code.exe", "app.py - nocrastinator-py-main - Visual Studio Code"),
+    ("chrome.exe", "Pull requests - github.com - Google Chrome"),
+    ("discord.exe", "#general - Discord"),
+    ("explorer.exe", "Desktop - File Explorer"),
+    ("chrome.exe", "python - Stack Overflow - Google Chrome"),
+    ("slack.exe", "Slack | standup | Team"),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="how long to run the loop")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="window transitions per second (default: one per poll)")
+    parser.add_argument("--push", action="store_true",
+                        help="deliver windows as focus events instead of polling")
+    parser.add_argument("--storage", default="csv", help="storage backend to log to")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        config.DATA_DIRECTORY = data_dir
+        config.ACTIVITY_LOG_FILE = os.path.join(data_dir, "activity_log.csv")
+        config.ACTIVITY_INDEX_FILE = f"{config.ACTIVITY_LOG_FILE}.idx"
+        config.FOCUS_SCORE_FILE = os.path.join(data_dir, "focus_scores.json")
+        config.FOCUS_SCORE_JOURNAL_FILE = f"{config.FOCUS_SCORE_FILE}.journal"
+        config.TIME_BUCKET_FILE = os.path.join(data_dir, "time_buckets.json")
+        config.TIME_BUCKET_JOURNAL_FILE = f"{config.TIME_BUCKET_FILE}.journal"
+        config.SQLITE_DATABASE_FILE = os.path.join(data_dir, "nocrastinator.db")
+        config.BINARY_LOG_FILE = os.path.join(data_dir, "activity_log.bin")
+        config.BINARY_STRINGS_FILE = os.path.join(data_dir, "activity_strings.bin")
+        config.UNPRODUCTIVE_TIME_THRESHOLD = float("inf")
+        config.STORAGE_BACKEND = args.storage
+        
+        probe = ScriptedWindowProbe(WINDOWS, rate=args.rate, loop=True, push=args.push)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracker = ActivityTracker(probe=probe, poll_interval=0)
+            started = time.perf_counter()
+            tracker.start_tracking()
+            time.sleep(args.seconds)
+            tracker.stop_tracking()
+            elapsed = time.perf_counter() - started
+        
+        rows = sum(1 for _ in tracker.storage.iter_range("1970-01-01", "9999-12-31"))
+    
+    print(f"Logged {rows} transitions in {elapsed:.2f}s ({rows / elapsed:.0f} transitions/s)")
+
+if __name__ == "__main__":
+    main()
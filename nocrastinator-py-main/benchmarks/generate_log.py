@@ -0,0 +1,150 @@
+"""
+Synthetic activity_log.csv generator for benchmarks.
+
+Histories follow a working week: busy weekdays between morning and
+evening, lighter weekends, log-normal session lengths, and Zipf-skewed
+app and window title popularity, so a few windows account for most rows
+like in a real log. Rows are classified with the current config and
+streamed to disk, so years of history and millions of rows fit in
+constant memory.
+
+Run from the nocrastinator-py-main directory:
+    python benchmarks/generate_log.py --days 730 --rows-per-day 3000 --output data/activity_log.csv
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from classifier import create_classifier
+
+# App name, title templates and relative popularity before skewing
+APP_TITLES = [
+    ("code.exe", ["{file}.py - {project} - Visual Studio Code", "{file}.md - {project} - Visual Studio Code"]),
+    ("chrome.exe", ["{topic} - github.com - Google Chrome", "{topic} - Stack Overflow - Google Chrome",
+                    "(3) YouTube - {topic} - Google Chrome", "reddit.com: {topic} - Google Chrome",
+                    "{topic} - docs.python.org - Google Chrome", "New Tab - Google Chrome"]),
+    ("msedge.exe", ["{topic} - Outlook - Microsoft Edge", "{topic} - linkedin.com - Microsoft Edge"]),
+    ("firefox.exe", ["{topic} - Twitch - Mozilla Firefox", "{topic} - kaggle.com - Mozilla Firefox"]),
+    ("discord.exe", ["#{topic} - Discord"]),
+    ("slack.exe", ["Slack | {topic} | Team"]),
+    ("WindowsTerminal.exe", ["{project} - pytest", "{project} - git"]),
+    ("explorer.exe", ["{project} - File Explorer"]),
+    ("spotify.exe", ["{topic} - Spotify"]),
+    ("pycharm64.exe", ["{project} - {file}.py"]),
+    ("excel.exe", ["{topic}.xlsx - Excel"]),
+    ("outlook.exe", ["Inbox - {topic} - Outlook"]),
+    ("steam.exe", ["Steam"]),
+    ("vlc.exe", ["{topic}.mkv - VLC media player"]),
+    ("python.exe", ["Productivity Tracker"]),
+]
+PROJECTS = ["nocrastinator", "backend", "website", "scripts", "thesis", "infra"]
+FILES = ["app", "main", "config", "storage", "models", "views", "tests", "utils", "README", "notes"]
+TOPICS = ["standup", "python", "release", "general", "music", "budget", "review", "design", "news", "random"]
+
+def zipf_weights(count, skew):
+    """Weights proportional to 1 / rank**skew"""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+def build_windows(titles_per_app, skew, rng):
+    """
+    Expand the templates into (app, title) pairs and return them with
+    cumulative Zipf weights. Apps are skewed by list position; each app's
+    titles are skewed again within the app.
+    """
+    windows = []
+    weights = []
+    for app_weight, (app_name, templates) in zip(zipf_weights(len(APP_TITLES), skew), APP_TITLES):
+        titles = []
+        for i in range(titles_per_app):
+            template = templates[i % len(templates)]
+            title = template.format(project=rng.choice(PROJECTS), file=rng.choice(FILES), topic=rng.choice(TOPICS))
+            if title not in titles:
+                titles.append(title)
+        for title_weight, title in zip(zipf_weights(len(titles), skew), titles):
+            windows.append((app_name, title))
+            weights.append(app_weight * title_weight)
+    
+    cumulative = []
+    total = 0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return windows, cumulative
+
+def day_rows(day, rows_per_day, rng):
+    """Rows to generate on a day: full load on weekdays, a third at weekends, with noise"""
+    load = 1.0 if day.weekday() < 5 else 0.35
+    return max(0, int(rng.gauss(rows_per_day * load, rows_per_day * load * 0.15)))
+
+def generate_log(path, days, rows_per_day, seed=0, titles_per_app=40, skew=1.1, end_date=None, batch_size=5000):
+    """
+    Write a synthetic activity log covering days days up to end_date
+    (default: today). Returns (rows written, distinct windows).
+    """
+    rng = random.Random(seed)
+    windows, cumulative = build_windows(titles_per_app, skew, rng)
+    classifier = create_classifier(verbose=False)
+    classifications = [classifier.is_productive(app_name, title) for app_name, title in windows]
+    
+    last_day = end_date or datetime.now().date()
+    rows = 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['timestamp', 'app_name', 'window_title', 'duration_seconds', 'is_productive'])
+        batch = []
+        for offset in range(days - 1, -1, -1):
+            day = last_day - timedelta(days=offset)
+            count = day_rows(day, rows_per_day, rng)
+            if not count:
+                continue
+            
+            # Spread the sessions over a ~10 hour working day starting around 8:00
+            start = datetime(day.year, day.month, day.day, 8) + timedelta(minutes=rng.gauss(0, 45))
+            end_of_day = datetime(day.year, day.month, day.day, 23, 59, 59)
+            mean_duration = 10 * 3600 / count
+            mu = math.log(mean_duration) - 0.5  # Log-normal with sigma 1 and this mean
+            
+            moment = start
+            picks = rng.choices(range(len(windows)), cum_weights=cumulative, k=count)
+            for index in picks:
+                duration = round(min(rng.lognormvariate(mu, 1.0), 4 * 3600), 2)
+                moment += timedelta(seconds=duration + rng.random() * 2)
+                if moment > end_of_day:
+                    break
+                app_name, title = windows[index]
+                batch.append([moment.strftime('%Y-%m-%d %H:%M:%S'), app_name, title, duration, str(classifications[index])])
+                rows += 1
+            
+            if len(batch) >= batch_size:
+                writer.writerows(batch)
+                batch = []
+        writer.writerows(batch)
+    return rows, len(windows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", required=True, help="activity log to write (overwritten)")
+    parser.add_argument("--days", type=int, default=365, help="days of history ending today (default: 365)")
+    parser.add_argument("--rows-per-day", type=int, default=2000, help="average rows on a weekday (default: 2000)")
+    parser.add_argument("--titles-per-app", type=int, default=40, help="distinct window titles per app (default: 40)")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for app and title popularity (default: 1.1)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    rows, windows = generate_log(args.output, args.days, args.rows_per_day, args.seed, args.titles_per_app, args.skew)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(args.output)
+    print(f"Wrote {rows} rows over {args.days} days ({windows} distinct windows, {size / 1e6:.1f} MB) in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
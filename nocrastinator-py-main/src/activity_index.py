@@ -0,0 +1,234 @@
+"""
+Per-date byte offset index for the activity log.
+"""
+
+import csv
+import json
+import locale
+import os
+import re
+import threading
+import config
+
+DATE_PREFIX = re.compile(rb'\d{4}-\d{2}-\d{2}')
+
+class ActivityLogIndex:
+    """
+    Maps each date in activity_log.csv to the byte ranges holding its rows.
+    The index is kept in a sidecar file and extended by scanning only the
+    bytes appended since the last refresh, so a single-day query reads only
+    that day's rows instead of the whole history.
+    With persist=False the sidecar is read but never written, for readers
+    in other processes that must not race the owner's saves.
+    """
+    
+    INDEX_VERSION = 1
+    
+    def __init__(self, log_file=None, index_file=None, persist=True):
+        self.log_file = log_file or config.ACTIVITY_LOG_FILE
+        self.index_file = index_file or f"{self.log_file}.idx"
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._reset()
+        self._load()
+    
+    def _reset(self):
+        """Forget everything indexed so far"""
+        self.indexed_size = 0
+        self.inode = None
+        self.dates = {}
+        self.dirty = True
+    
+    def _load(self):
+        """Load the sidecar index if it exists and is readable"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r') as file:
+                data = json.load(file)
+            if data.get('version') != self.INDEX_VERSION:
+                return
+            self.indexed_size = data['size']
+            self.inode = data['inode']
+            self.dates = {date: [list(r) for r in ranges] for date, ranges in data['dates'].items()}
+            self.dirty = False
+        except Exception as e:
+            print(f"Error loading activity index: {e}")
+            self._reset()
+    
+    def save(self):
+        """Write the index to its sidecar file"""
+        if not self.persist:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty:
+                    return
+                data = json.dumps({
+                    'version': self.INDEX_VERSION,
+                    'size': self.indexed_size,
+                    'inode': self.inode,
+                    'dates': self.dates
+                }, separators=(',', ':'))
+                self.dirty = False
+            try:
+                temp_file = f"{self.index_file}.tmp"
+                with open(temp_file, 'w') as file:
+                    file.write(data)
+                os.replace(temp_file, self.index_file)
+            except Exception as e:
+                print(f"Error saving activity index: {e}")
+    
+    def rebuild(self):
+        """Discard the index and rebuild it from the whole log"""
+        with self._lock:
+            self._reset()
+        self.refresh()
+    
+    def refresh(self):
+        """Index any rows appended since the last refresh"""
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            with self._lock:
+                if self.indexed_size:
+                    self._reset()
+            return
+        
+        with self._lock:
+            if not self._still_valid(stat):
+                self._reset()
+            if stat.st_size == self.indexed_size:
+                changed = self.dirty
+            else:
+                self.inode = stat.st_ino
+                self._scan_tail(stat.st_size)
+                changed = True
+        if changed:
+            self.save()
+    
+    def _still_valid(self, stat):
+        """Check the indexed prefix still belongs to the file on disk"""
+        if self.inode is None:
+            return self.indexed_size == 0
+        if stat.st_ino != self.inode or stat.st_size < self.indexed_size:
+            return False
+        if self.indexed_size == 0:
+            return True
+        
+        # The last indexed byte must still end a row
+        with open(self.log_file, 'rb') as file:
+            file.seek(self.indexed_size - 1)
+            return file.read(1) == b'\n'
+    
+    def _scan_tail(self, size):
+        """Record the byte range of every complete row after indexed_size"""
+        with open(self.log_file, 'rb') as file:
+            file.seek(self.indexed_size)
+            data = file.read(size - self.indexed_size)
+        
+        offset = self.indexed_size
+        row_start = offset
+        in_quotes = False
+        position = 0
+        
+        while True:
+            newline = data.find(b'\n', position)
+            if newline < 0:
+                break  # Partial row still being written
+            line = data[position:newline + 1]
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            position = newline + 1
+            
+            if not in_quotes:
+                row_end = offset + position
+                row = data[row_start - offset:position]
+                if DATE_PREFIX.match(row):
+                    self._add_range(row[:10].decode('ascii'), row_start, row_end)
+                row_start = row_end
+        
+        self.indexed_size = row_start
+        self.dirty = True
+    
+    def _add_range(self, date, start, end):
+        """Add a byte range for date, merging with the previous one if adjacent"""
+        ranges = self.dates.setdefault(date, [])
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    
+    def get_ranges(self, date):
+        """Return the [start, end) byte ranges holding rows for date"""
+        self.refresh()
+        with self._lock:
+            return [tuple(r) for r in self.dates.get(date, [])]
+    
+    def get_ranges_between(self, start_date, end_date):
+        """Return merged byte ranges holding rows from start_date to end_date inclusive"""
+        self.refresh()
+        with self._lock:
+            ranges = sorted(
+                tuple(r) for date, date_ranges in self.dates.items()
+                if start_date <= date <= end_date
+                for r in date_ranges
+            )
+        
+        merged = []
+        for start, end in ranges:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+    
+    def date_span(self):
+        """Return (first date, last date) in the log, or None if it has no rows"""
+        self.refresh()
+        with self._lock:
+            if not self.dates:
+                return None
+            return min(self.dates), max(self.dates)
+    
+    def iter_rows(self, date):
+        """Yield the parsed CSV rows logged on date"""
+        for start, end in self.get_ranges(date):
+            yield from self._read_range(start, end)
+    
+    def iter_rows_between(self, start_date, end_date):
+        """Yield the parsed CSV rows logged from start_date to end_date inclusive"""
+        for start, end in self.get_ranges_between(start_date, end_date):
+            yield from self._read_range(start, end)
+    
+    def _read_range(self, start, end):
+        """Stream the CSV rows stored in one byte range"""
+        # Decode the same way open() does when the rest of the app reads the log
+        encoding = locale.getpreferredencoding(False)
+        with open(self.log_file, 'rb') as file:
+            file.seek(start)
+            yield from csv.reader(line.decode(encoding) for line in self._lines_until(file, end - start))
+    
+    @staticmethod
+    def _lines_until(file, length):
+        """Yield raw lines until length bytes have been read"""
+        for line in file:
+            if length <= 0:
+                break
+            length -= len(line)
+            yield line
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_activity_index(log_file=None):
+    """Return the shared index for an activity log file"""
+    log_file = log_file or config.ACTIVITY_LOG_FILE
+    with _indexes_lock:
+        index = _indexes.get(log_file)
+        if index is None:
+            index_file = config.ACTIVITY_INDEX_FILE if log_file == config.ACTIVITY_LOG_FILE else None
+            index = ActivityLogIndex(log_file, index_file)
+            _indexes[log_file] = index
+        return index
@@ -2,17 +2,26 @@
 Activity tracker module for monitoring application and website usage.
 """
 
-import csv
 import os
+import queue
 import time
-import psutil
-import win32gui
-import win32process
+from collections import namedtuple
 from datetime import datetime
 from plyer import notification
 import threading
 import config
-import re
+from classifier import ActivityClassifier
+from website_extractor import WebsiteExtractor
+from window_probe import create_probe
+from storage import get_storage
+from daily_aggregates import get_daily_aggregates
+from time_buckets import get_time_buckets
+
+# What the tracker currently sees; replaced as a whole, never modified
+TrackerState = namedtuple(
+    'TrackerState',
+    ['app_name', 'window_title', 'is_productive', 'session_start', 'unproductive_since']
+)
 
 class ActivityTracker:
     """
@@ -20,7 +29,15 @@ class ActivityTracker:
     Records usage time and categorizes activities as productive or unproductive.
     """
     
-    def __init__(self):
+    _STOP = object()  # Queued by stop_tracking to wake the loop
+    
+    def __init__(self, probe=None, poll_interval=None, max_poll_interval=None):
+        # Source of foreground window information
+        self.probe = probe if probe is not None else create_probe()
+        self.poll_interval = config.ACTIVITY_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.max_poll_interval = config.ACTIVITY_POLL_MAX_INTERVAL if max_poll_interval is None else max_poll_interval
+        self.focus_events = queue.Queue()
+        
         self.current_app = None
         self.current_window_title = None
         self.app_start_time = None
@@ -32,107 +49,65 @@ class ActivityTracker:
         self.alert_triggered = False
         self.last_productive_timestamp = time.time()
         
+        # Published state read by the UI and alerts instead of probing the window again
+        self.state = TrackerState(None, None, None, None, None)
+        
         self.on_unproductive_alert = None  # Callback for UI updates
         
         # Create data directory if it doesn't exist
         os.makedirs(config.DATA_DIRECTORY, exist_ok=True)
         
-        # Create or load activity log file
-        self.init_activity_log()
+        # Activity is queued to the storage backend, which writes in the background
+        self.storage = get_storage()
+        
+        # Per-day totals, seeded from disk for today and updated at log time
+        self.aggregates = get_daily_aggregates(self.storage)
+        self.aggregates.seed()
+        
+        # Time-of-day buckets for the heatmap, filled as sessions are logged
+        self.time_buckets = get_time_buckets(self.storage)
         
         # Thread for tracking activities
         self.tracking_thread = None
         self.is_tracking = False
         
         # Browser process names
-        self.browsers = ["chrome.exe", "msedge.exe", "firefox.exe", "opera.exe", "brave.exe", "safari.exe"]
+        self.browsers = list(config.BROWSERS)
+        
+        # Classification tables are built once and results are memoized
+        self.website_extractor = WebsiteExtractor(self.browsers)
+        self.classifier = ActivityClassifier(self.browsers, self.extract_website_from_title)
         
         print("Activity tracker initialized")
     
-    def init_activity_log(self):
-        """Initialize activity log file with headers if it doesn't exist"""
-        if not os.path.exists(config.ACTIVITY_LOG_FILE):
-            with open(config.ACTIVITY_LOG_FILE, 'w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow([
-                    'timestamp', 
-                    'app_name', 
-                    'window_title', 
-                    'duration_seconds', 
-                    'is_productive'
-                ])
-    
     def get_active_window_info(self):
         """Get information about the currently active window"""
         try:
-            hwnd = win32gui.GetForegroundWindow()
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
-            app_name = process.name().lower()
-            window_title = win32gui.GetWindowText(hwnd)
-            return app_name, window_title
+            return self.probe.get_active_window()
         except Exception as e:
             print(f"Error getting active window: {e}")
             return None, None
     
+    def get_state(self):
+        """Return the latest published TrackerState; safe from any thread"""
+        return self.state
+    
+    def _publish_state(self, is_productive):
+        """Swap in a new state snapshot for the current session"""
+        self.state = TrackerState(
+            app_name=self.current_app,
+            window_title=self.current_window_title,
+            is_productive=is_productive,
+            session_start=self.app_start_time,
+            unproductive_since=self.unproductive_start_time if self.is_currently_unproductive else None
+        )
+    
     def extract_website_from_title(self, app_name, window_title):
         """
         Extract website information from browser window titles
         Returns the extracted website domain or None if not found
         """
-        if not window_title or app_name not in self.browsers:
-            return None
-            
-        # Common title patterns in browsers:
-        # 1. "Page Title - Website - Browser"
-        # 2. "Website - Page Title"
-        # 3. "Page Title | Website"
-        # 4. "Page Title - Website"
-        
-        # Try to extract using common patterns
-        patterns = [
-            r'(?:https?://)?(?:www\.)?([a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)',  # Extract domain from URL
-            r'(?:.*?)(?:[-|]\s*)((?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)(?:\s*[-|])',  # Middle of the title
-            r'(?:.*?)(?:[-|]\s*)((?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)(?:\s*)$',  # End of the title
-        ]
-        
-        window_title_lower = window_title.lower()
-        
-        # Check for specific website names (more reliable than regex for some sites)
-        known_sites = {
-            'facebook': 'facebook.com',
-            'twitter': 'twitter.com',
-            'x.com': 'twitter.com',
-            'instagram': 'instagram.com',
-            'reddit': 'reddit.com',
-            'youtube': 'youtube.com',
-            'netflix': 'netflix.com',
-            'tiktok': 'tiktok.com',
-            'twitch': 'twitch.tv',
-            'github': 'github.com',
-            'stackoverflow': 'stackoverflow.com',
-            'stack overflow': 'stackoverflow.com',
-            'linkedin': 'linkedin.com',
-            'udemy': 'udemy.com',
-            'coursera': 'coursera.org',
-            'edx': 'edx.org',
-            'kaggle': 'kaggle.com'
-        }
-        
-        for site, domain in known_sites.items():
-            if site in window_title_lower:
-                print(f"Website detected: {domain} (from title: {window_title})")
-                return domain
-                
-        # Try regex patterns if no known site found
-        for pattern in patterns:
-            match = re.search(pattern, window_title)
-            if match:
-                domain = match.group(1)
-                print(f"Website detected: {domain} (from title: {window_title})")
-                return domain
-                
-        return None
+        return self.website_extractor.extract(app_name, window_title)
     
     def is_productive(self, app_name, window_title):
         """
@@ -143,46 +118,7 @@ class ActivityTracker:
         - False: Unproductive
         - None: Neutral
         """
-        app_name = app_name.lower()
-        
-        # First check if app is a browser
-        if app_name in self.browsers:
-            # Extract website from browser window title
-            website = self.extract_website_from_title(app_name, window_title)
-            
-            if website:
-                # Check if website is in productive or unproductive lists
-                for prod_site in config.PRODUCTIVE_WEBSITES:
-                    if prod_site in website:
-                        print(f"Productive website detected: {website}")
-                        return True
-                
-                for unprod_site in config.UNPRODUCTIVE_WEBSITES:
-                    if unprod_site in website:
-                        print(f"Unproductive website detected: {website}")
-                        return False
-                        
-                # If website is found but not categorized, log it for future categorization
-                print(f"Uncategorized website detected: {website}")
-        
-        # Check if app is in productive or unproductive lists
-        if app_name in (app.lower() for app in config.PRODUCTIVE_APPS):
-            return True
-        elif app_name in (app.lower() for app in config.UNPRODUCTIVE_APPS):
-            return False
-        
-        # If not determined yet, check window title for website names
-        window_title = window_title.lower()
-        for website in config.PRODUCTIVE_WEBSITES:
-            if website in window_title:
-                return True
-        
-        for website in config.UNPRODUCTIVE_WEBSITES:
-            if website in window_title:
-                return False
-        
-        # Default to neutral
-        return None
+        return self.classifier.is_productive(app_name, window_title)
     
     def start_tracking(self):
         """Start tracking user activity in a separate thread"""
@@ -190,6 +126,14 @@ class ActivityTracker:
             print("Tracking already active")
             return
         
+        # Drop events and stop requests left over from a previous run
+        while True:
+            try:
+                self.focus_events.get_nowait()
+            except queue.Empty:
+                break
+        
+        self.storage.open()
         self.is_tracking = True
         self.tracking_thread = threading.Thread(target=self._track_activity_loop)
         self.tracking_thread.daemon = True
@@ -200,83 +144,140 @@ class ActivityTracker:
         """Stop tracking user activity"""
         self.is_tracking = False
         if self.tracking_thread:
-            self.tracking_thread.join(timeout=1)
+            # Wake the loop from its wait and let it finish logging
+            self.focus_events.put(self._STOP)
+            self.tracking_thread.join()
+            self.tracking_thread = None
+        
+        # Commit any buffered rows once nothing can log any more
+        self.storage.close()
+        self.time_buckets.save()
         print("Activity tracking stopped")
     
     def _track_activity_loop(self):
-        """Main loop for tracking activity"""
-        while self.is_tracking:
-            app_name, window_title = self.get_active_window_info()
-            
-            if app_name:
-                current_time = time.time()
-                
-                # If app has changed
-                if app_name != self.current_app or window_title != self.current_window_title:
-                    # Log previous app session if it exists
-                    if self.current_app and self.app_start_time:
-                        duration = current_time - self.app_start_time
-                        is_productive = self.is_productive(self.current_app, self.current_window_title)
-                        self.log_activity(self.current_app, self.current_window_title, duration, is_productive)
-                    
-                    # Start tracking new app
-                    self.current_app = app_name
-                    self.current_window_title = window_title
-                    self.app_start_time = current_time
-                    
-                    # Check if the new app is productive/unproductive/neutral
-                    is_productive = self.is_productive(app_name, window_title)
-                    
-                    # Track unproductive time across multiple apps
-                    if is_productive is False:  # Explicitly unproductive
-                        print(f"Using unproductive app: {app_name}")
-                        
-                        # If this is the first unproductive app in this session
-                        if not self.is_currently_unproductive:
-                            self.unproductive_start_time = current_time
-                            self.is_currently_unproductive = True
-                            self.alert_triggered = False
-                            print(f"Started tracking unproductive time at {datetime.fromtimestamp(self.unproductive_start_time).strftime('%H:%M:%S')}")
-                    
-                    elif is_productive is True:  # Explicitly productive
-                        # Reset unproductive tracking when switching to a productive app
-                        if self.is_currently_unproductive:
-                            print(f"Switching to productive app: {app_name}. Unproductive session ended.")
-                            elapsed_unproductive = current_time - self.unproductive_start_time
-                            print(f"Unproductive time: {elapsed_unproductive:.1f} seconds")
-                            
-                            self.is_currently_unproductive = False
-                            self.unproductive_start_time = None
-                            self.total_unproductive_time = 0
-                            self.alert_triggered = False
-                            self.last_productive_timestamp = current_time
+        """
+        Main loop for tracking activity.
+        Focus changes pushed by the probe are handled as they arrive; polling
+        only fills the gaps, backing off while the foreground window is stable
+        and tightening again right after a change.
+        """
+        event_driven = config.ACTIVITY_EVENT_DRIVEN and self.probe.supports_events
+        if event_driven:
+            self.probe.watch(self._on_focus_event)
+        
+        interval = self.poll_interval
+        try:
+            while self.is_tracking:
+                try:
+                    event = self.focus_events.get(timeout=self._next_wait(interval))
+                    if event is self._STOP:
+                        break
+                    app_name, window_title, timestamp = event
+                except queue.Empty:
+                    app_name, window_title = self.get_active_window_info()
+                    timestamp = time.time()
                 
-                # Check for unproductive time threshold
-                if (self.is_currently_unproductive and 
-                    self.unproductive_start_time and 
-                    current_time - self.unproductive_start_time >= config.UNPRODUCTIVE_TIME_THRESHOLD and 
-                    not self.alert_triggered):
-                    self._trigger_unproductive_alert()
-                    self.alert_triggered = True
+                changed = self._handle_window_sample(app_name, window_title, timestamp)
+                self._check_unproductive_time(time.time())
                 
-            time.sleep(1)  # Check every second
+                if event_driven:
+                    # Events carry the changes; polling is only a safety net
+                    interval = self.max_poll_interval
+                elif changed:
+                    interval = self.poll_interval
+                else:
+                    interval = min(self.max_poll_interval, interval * config.ACTIVITY_POLL_BACKOFF)
+        finally:
+            if event_driven:
+                self.probe.unwatch()
     
-    def log_activity(self, app_name, window_title, duration, is_productive):
-        """Log app activity to CSV file"""
-        try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    def _on_focus_event(self, app_name, window_title, timestamp):
+        """Receive a focus change pushed by the probe backend"""
+        self.focus_events.put((app_name, window_title, timestamp))
+    
+    def _next_wait(self, interval):
+        """Seconds to wait for the next event, woken early for a pending alert"""
+        if self.is_currently_unproductive and not self.alert_triggered and self.unproductive_start_time:
+            due = self.unproductive_start_time + config.UNPRODUCTIVE_TIME_THRESHOLD - time.time()
+            return max(0, min(interval, due))
+        return interval
+    
+    def _handle_window_sample(self, app_name, window_title, timestamp):
+        """
+        Process one observation of the foreground window taken at timestamp.
+        Returns True if the window changed.
+        """
+        if not app_name:
+            return False
+        if app_name == self.current_app and window_title == self.current_window_title:
+            return False
+        
+        # Events may arrive slightly out of order with the safety-net polls
+        if self.app_start_time:
+            timestamp = max(timestamp, self.app_start_time)
+        
+        # Log previous app session if it exists
+        if self.current_app and self.app_start_time:
+            duration = timestamp - self.app_start_time
+            is_productive = self.is_productive(self.current_app, self.current_window_title)
+            self.log_activity(self.current_app, self.current_window_title, duration, is_productive, timestamp)
+        
+        # Start tracking new app
+        self.current_app = app_name
+        self.current_window_title = window_title
+        self.app_start_time = timestamp
+        
+        # Check if the new app is productive/unproductive/neutral
+        is_productive = self.is_productive(app_name, window_title)
+        
+        # Track unproductive time across multiple apps
+        if is_productive is False:  # Explicitly unproductive
+            print(f"Using unproductive app: {app_name}")
             
-            with open(config.ACTIVITY_LOG_FILE, 'a', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow([
-                    timestamp,
-                    app_name,
-                    window_title,
-                    round(duration, 2),
-                    str(is_productive)
-                ])
-        except Exception as e:
-            print(f"Error logging activity: {e}")
+            # If this is the first unproductive app in this session
+            if not self.is_currently_unproductive:
+                self.unproductive_start_time = timestamp
+                self.is_currently_unproductive = True
+                self.alert_triggered = False
+                print(f"Started tracking unproductive time at {datetime.fromtimestamp(self.unproductive_start_time).strftime('%H:%M:%S')}")
+        
+        elif is_productive is True:  # Explicitly productive
+            # Reset unproductive tracking when switching to a productive app
+            if self.is_currently_unproductive:
+                print(f"Switching to productive app: {app_name}. Unproductive session ended.")
+                elapsed_unproductive = timestamp - self.unproductive_start_time
+                print(f"Unproductive time: {elapsed_unproductive:.1f} seconds")
+                
+                self.is_currently_unproductive = False
+                self.unproductive_start_time = None
+                self.total_unproductive_time = 0
+                self.alert_triggered = False
+                self.last_productive_timestamp = timestamp
+        
+        self._publish_state(is_productive)
+        return True
+    
+    def _check_unproductive_time(self, current_time):
+        """Trigger the alert once the unproductive threshold is crossed"""
+        if (self.is_currently_unproductive and 
+            self.unproductive_start_time and 
+            current_time - self.unproductive_start_time >= config.UNPRODUCTIVE_TIME_THRESHOLD and 
+            not self.alert_triggered):
+            self._trigger_unproductive_alert()
+            self.alert_triggered = True
+    
+    def log_activity(self, app_name, window_title, duration, is_productive, timestamp=None):
+        """
+        Queue app activity for the storage backend.
+        timestamp is the epoch time the session ended (defaults to now).
+        """
+        end_time = time.time() if timestamp is None else timestamp
+        duration = round(duration, 2)
+        self.time_buckets.add(end_time, duration, is_productive)
+        
+        timestamp = datetime.fromtimestamp(end_time).strftime('%Y-%m-%d %H:%M:%S')
+        self.aggregates.add(timestamp[:10], app_name, duration, is_productive)
+        self.storage.append_activity(timestamp, app_name, window_title, duration, is_productive, end_time)
     
     def _trigger_unproductive_alert(self):
         """Trigger an alert for unproductive app usage"""
@@ -302,7 +303,6 @@ class ActivityTracker:
     def force_alert(self):
         """Force an alert for testing purposes"""
         print("Forcing productivity alert")
-        app_name, _ = self.get_active_window_info()
         self._trigger_unproductive_alert()
     
     def get_daily_summary(self, date=None):
@@ -313,38 +313,12 @@ class ActivityTracker:
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
         
-        total_time = 0
-        productive_time = 0
-        unproductive_time = 0
-        app_usage = {}
-        
-        try:
-            with open(config.ACTIVITY_LOG_FILE, 'r', newline='') as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip header
-                
-                for row in reader:
-                    if row[0].startswith(date):
-                        app_name = row[1]
-                        duration = float(row[3])
-                        is_productive = row[4]
-                        
-                        total_time += duration
-                        
-                        # Count productive and unproductive time
-                        if is_productive == 'True':
-                            productive_time += duration
-                        elif is_productive == 'False':
-                            unproductive_time += duration
-                        
-                        # Track app usage time
-                        if app_name in app_usage:
-                            app_usage[app_name] += duration
-                        else:
-                            app_usage[app_name] = duration
-        except Exception as e:
-            print(f"Error getting daily summary: {e}")
-            return None
+        # Totals are maintained in memory as activity is logged
+        totals = self.aggregates.get(date)
+        total_time = totals['total_time']
+        productive_time = totals['productive_time']
+        unproductive_time = totals['unproductive_time']
+        app_usage = totals['apps']
         
         # Sort apps by usage time
         sorted_apps = sorted(app_usage.items(), key=lambda x: x[1], reverse=True)
@@ -0,0 +1,235 @@
+"""
+Background writer module for appending rows to the activity log.
+"""
+
+import csv
+import os
+import queue
+import threading
+import time
+import config
+
+FSYNC_NEVER = "never"    # Leave durability to the OS
+FSYNC_BATCH = "batch"    # fsync after every group commit
+FSYNC_CLOSE = "close"    # fsync once when the writer is closed
+
+class ActivityLogWriter:
+    """
+    Appends activity rows from a queue on a dedicated thread.
+    The file handle stays open and rows are group-committed once the batch
+    is full or the flush interval has passed, so callers never touch the disk.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, path, flush_interval=None, batch_size=None, fsync_policy=None, on_commit=None):
+        self.path = path
+        self.on_commit = on_commit  # Called on the writer thread after each commit
+        self.flush_interval = config.ACTIVITY_LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.batch_size = config.ACTIVITY_LOG_BATCH_SIZE if batch_size is None else batch_size
+        self.fsync_policy = config.ACTIVITY_LOG_FSYNC if fsync_policy is None else fsync_policy
+        if self.fsync_policy not in (FSYNC_NEVER, FSYNC_BATCH, FSYNC_CLOSE):
+            raise ValueError(f"Unknown fsync policy: {self.fsync_policy}")
+        
+        self.queue = queue.Queue()
+        self.writer_thread = None
+        self.paused = False
+        self.closed = False
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the writer thread if it is not already running"""
+        with self._lock:
+            self._start_thread()
+    
+    def _start_thread(self):
+        """Start the writer thread unless paused, closed or running; caller holds the lock"""
+        if self.paused or self.closed or (self.writer_thread and self.writer_thread.is_alive()):
+            return
+        self.writer_thread = threading.Thread(target=self._write_loop)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+    
+    def write(self, row):
+        """Queue a row for writing; never blocks on disk I/O"""
+        with self._lock:
+            if self.closed:
+                print(f"Activity log writer for {self.path} is closed; dropping row")
+                return
+            self.queue.put(row)
+            self._start_thread()
+    
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed"""
+        with self._lock:
+            if not (self.writer_thread and self.writer_thread.is_alive()):
+                return True
+            done = threading.Event()
+            self.queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self, timeout=5):
+        """
+        Drain the queue, commit the remaining rows and stop the thread.
+        Rows written after this are dropped until open() is called.
+        """
+        with self._lock:
+            self.closed = True
+        self._stop_thread(timeout)
+    
+    def open(self):
+        """Accept rows again after close()"""
+        with self._lock:
+            self.closed = False
+            if not self.queue.empty():
+                self._start_thread()
+    
+    def _stop_thread(self, timeout=None):
+        """Commit queued rows and wait for the writer thread to exit"""
+        with self._lock:
+            thread = self.writer_thread
+            self.writer_thread = None
+        if thread and thread.is_alive():
+            self.queue.put(self._STOP)
+            thread.join(timeout=timeout)
+    
+    def pause(self):
+        """
+        Commit queued rows and release the destination, e.g. while the log
+        is rewritten. Rows written while paused wait in the queue. Waits
+        for the writer thread however long its last commit takes, so the
+        destination is never replaced under a live writer.
+        """
+        with self._lock:
+            self.paused = True
+        self._stop_thread()
+    
+    def resume(self):
+        """Start committing again after pause()"""
+        with self._lock:
+            self.paused = False
+            if not self.queue.empty():
+                self._start_thread()
+    
+    def _write_loop(self):
+        """Collect queued rows and commit them in batches"""
+        try:
+            self._open()
+        except Exception as e:
+            print(f"Error opening activity log: {e}")
+            self._abandon()
+            return
+        
+        batch = []
+        deadline = None
+        
+        try:
+            while True:
+                timeout = max(0, deadline - time.monotonic()) if batch else None
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                
+                if item is self._STOP:
+                    break
+                elif isinstance(item, threading.Event):
+                    self._commit(batch)
+                    batch = []
+                    item.set()
+                    continue
+                elif item is not None:
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval
+                    batch.append(item)
+                
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._commit(batch)
+                    batch = []
+        finally:
+            # Drain anything queued behind the stop request
+            waiters = []
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item is not self._STOP:
+                    batch.append(item)
+            
+            self._commit(batch)
+            try:
+                if self.fsync_policy != FSYNC_NEVER:
+                    self._sync()
+                self._close()
+            except Exception as e:
+                print(f"Error closing activity log: {e}")
+            for waiter in waiters:
+                waiter.set()
+    
+    def _abandon(self):
+        """
+        Give up after the destination failed to open: wake flush() callers
+        and leave the rows queued for the next write to retry
+        """
+        with self._lock:
+            if self.writer_thread is threading.current_thread():
+                self.writer_thread = None
+            rows = []
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is not self._STOP:
+                    rows.append(item)
+            for row in rows:
+                self.queue.put(row)
+    
+    def _commit(self, batch):
+        """Write a batch of rows as one group commit"""
+        if not batch:
+            return
+        try:
+            self._write_rows(batch)
+            if self.fsync_policy == FSYNC_BATCH:
+                self._sync()
+        except Exception as e:
+            print(f"Error logging activity: {e}")
+            return
+        
+        if self.on_commit:
+            try:
+                self.on_commit()
+            except Exception as e:
+                print(f"Error after committing activity: {e}")
+    
+    def _open(self):
+        """Open the destination on the writer thread"""
+        self.file = open(self.path, 'a', newline='')
+        self.csv_writer = csv.writer(self.file)
+    
+    def _write_rows(self, batch):
+        """
+        Write and flush a batch of rows. A row that cannot be encoded (e.g.
+        a window title outside the file's code page) is skipped on its own
+        instead of taking the rest of the batch with it.
+        """
+        for row in batch:
+            try:
+                self.csv_writer.writerow(row)
+            except (ValueError, csv.Error) as e:
+                print(f"Error logging activity for {row[1]}: {e}")
+        self.file.flush()
+    
+    def _sync(self):
+        """Force written rows to stable storage"""
+        os.fsync(self.file.fileno())
+    
+    def _close(self):
+        """Close the destination on the writer thread"""
+        self.file.close()
@@ -0,0 +1,93 @@
+"""
+Background computation of the Analysis tab with cancellation and caching.
+"""
+
+import threading
+
+class AnalysisJob:
+    """One requested computation; compute functions check cancelled() between steps"""
+    
+    def __init__(self, key, version):
+        self.key = key
+        self.version = version  # Data version when the job was requested
+        self._cancelled = threading.Event()
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+class AnalysisWorker:
+    """
+    Runs compute(job) on a worker thread and hands the result to
+    deliver(key, result), or the exception to fail(key, error) if compute
+    raised. A newer request cancels the job in flight, whose result is then
+    dropped. Results are cached per key together with the data version they
+    were computed at, so asking again before any new data arrives returns
+    the cached result without doing any work. A result is only cached if
+    the data version did not move while it was computed.
+    """
+    
+    def __init__(self, compute, data_version, deliver, fail=None):
+        self.compute = compute
+        self.data_version = data_version
+        self.deliver = deliver
+        self.fail = fail
+        self.cache = {}  # key -> (data version, result)
+        self.job = None
+        self._lock = threading.Lock()
+    
+    def request(self, key):
+        """
+        Return the cached result for key if the data has not changed since,
+        otherwise start computing it and return None.
+        """
+        version = self.data_version()
+        with self._lock:
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            if self.job is not None:
+                self.job.cancel()
+            job = self.job = AnalysisJob(key, version)
+        
+        thread = threading.Thread(target=self._run, args=(job,))
+        thread.daemon = True
+        thread.start()
+        return None
+    
+    def busy(self):
+        """Check whether a job is in flight"""
+        with self._lock:
+            return self.job is not None
+    
+    def invalidate(self):
+        """Forget every cached result"""
+        with self._lock:
+            self.cache.clear()
+    
+    def _run(self, job):
+        """Worker: compute, cache and deliver unless a newer request came in"""
+        try:
+            result = self.compute(job)
+        except Exception as e:
+            print(f"Error computing analysis: {e}")
+            with self._lock:
+                if self.job is job:
+                    self.job = None
+            # Let the caller clear its loading state; nothing is cached
+            if not job.cancelled() and self.fail is not None:
+                self.fail(job.key, e)
+            return
+        
+        with self._lock:
+            if self.job is job:
+                self.job = None
+            if result is None or job.cancelled():
+                return
+            # Data that arrived mid-computation is missing from the result:
+            # show it, but let the next request compute again
+            if self.data_version() == job.version:
+                self.cache[job.key] = (job.version, result)
+        self.deliver(job.key, result)
@@ -0,0 +1,198 @@
+"""
+Vectorized analytics over the activity history.
+"""
+
+import os
+from datetime import datetime, timedelta
+from binary_log import BinaryStorage, HEADER_SIZE, RECORD_SIZE, RECORD_DTYPE, NEUTRAL, PRODUCTIVE, UNPRODUCTIVE, encode_productive
+from daily_aggregates import empty_totals, date_range
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; callers check numpy_available()
+    np = None
+
+def numpy_available():
+    """Check whether NumPy is installed"""
+    return np is not None
+
+class ActivityFrame:
+    """
+    Activity sessions for a date range held as column arrays.
+    Each session has a day code (index into dates), an app code (index
+    into apps), a duration and a classification, so totals are computed
+    with np.bincount group-bys instead of Python loops over rows.
+    """
+    
+    def __init__(self, dates, apps, day, app, duration, kind):
+        self.dates = dates
+        self.apps = apps
+        self.day = day
+        self.app = app
+        self.duration = duration
+        self.kind = kind
+    
+    def __len__(self):
+        return len(self.duration)
+    
+    def _sum_by_day(self, mask=None):
+        """Seconds per day, optionally only for sessions matching mask"""
+        day, duration = (self.day, self.duration) if mask is None else (self.day[mask], self.duration[mask])
+        return np.bincount(day, weights=duration, minlength=len(self.dates))
+    
+    def _apps_by_day(self, mask=None):
+        """Per-day {app: seconds} dicts, optionally only for sessions matching mask"""
+        day, app, duration = self.day, self.app, self.duration
+        if mask is not None:
+            day, app, duration = day[mask], app[mask], duration[mask]
+        
+        app_count = max(len(self.apps), 1)
+        key = day.astype(np.int64) * app_count + app
+        size = len(self.dates) * app_count
+        seconds = np.bincount(key, weights=duration, minlength=size).reshape(len(self.dates), app_count)
+        sessions = np.bincount(key, minlength=size).reshape(len(self.dates), app_count)
+        
+        by_day = [{} for _ in self.dates]
+        for day_code, app_code in zip(*np.nonzero(sessions)):
+            by_day[day_code][self.apps[app_code]] = float(seconds[day_code, app_code])
+        return by_day
+    
+    def daily_totals(self):
+        """Return {date: totals} in the same shape as DailyAggregateStore.get"""
+        total = self._sum_by_day()
+        productive = self._sum_by_day(self.kind == PRODUCTIVE)
+        unproductive = self._sum_by_day(self.kind == UNPRODUCTIVE)
+        neutral = self._sum_by_day(self.kind == NEUTRAL)
+        apps = self._apps_by_day()
+        unproductive_apps = self._apps_by_day(self.kind == UNPRODUCTIVE)
+        
+        daily = {}
+        for i, date in enumerate(self.dates):
+            totals = empty_totals()
+            if apps[i]:
+                totals['total_time'] = float(total[i])
+                totals['productive_time'] = float(productive[i])
+                totals['unproductive_time'] = float(unproductive[i])
+                totals['neutral_time'] = float(neutral[i])
+                totals['apps'] = apps[i]
+                totals['unproductive_apps'] = unproductive_apps[i]
+            daily[date] = totals
+        return daily
+    
+    def period_totals(self, days=7):
+        """Return time totals for consecutive blocks of days (weeks by default)"""
+        period = self.day // days
+        periods = (len(self.dates) + days - 1) // days
+        columns = {
+            'total_time': None,
+            'productive_time': self.kind == PRODUCTIVE,
+            'unproductive_time': self.kind == UNPRODUCTIVE,
+            'neutral_time': self.kind == NEUTRAL,
+        }
+        sums = {
+            name: np.bincount(
+                period if mask is None else period[mask],
+                weights=self.duration if mask is None else self.duration[mask],
+                minlength=periods
+            )
+            for name, mask in columns.items()
+        }
+        
+        totals = []
+        for i in range(periods):
+            period_totals = {
+                'start_date': self.dates[i * days],
+                'end_date': self.dates[min((i + 1) * days, len(self.dates)) - 1]
+            }
+            for name, values in sums.items():
+                period_totals[name] = float(values[i])
+            totals.append(period_totals)
+        return totals
+    
+    def app_totals(self, is_productive=Ellipsis):
+        """
+        Return {app: seconds} over the whole range.
+        Pass is_productive (True/False/None) to count only that classification.
+        """
+        app, duration = self.app, self.duration
+        if is_productive is not Ellipsis:
+            mask = self.kind == encode_productive(is_productive)
+            app, duration = app[mask], duration[mask]
+        seconds = np.bincount(app, weights=duration, minlength=len(self.apps))
+        sessions = np.bincount(app, minlength=len(self.apps))
+        return {self.apps[i]: float(seconds[i]) for i in np.nonzero(sessions)[0]}
+    
+    def daily_summary(self, date):
+        """Return the same dict as ActivityTracker.get_daily_summary for one date"""
+        totals = self.daily_totals()[date]
+        total_time = totals['total_time']
+        productive_time = totals['productive_time']
+        sorted_apps = sorted(totals['apps'].items(), key=lambda x: x[1], reverse=True)
+        
+        return {
+            'date': date,
+            'total_time': total_time,
+            'productive_time': productive_time,
+            'unproductive_time': totals['unproductive_time'],
+            'productive_percentage': (productive_time / total_time * 100) if total_time > 0 else 0,
+            'apps': dict(sorted_apps[:10])  # Top 10 apps
+        }
+
+def load_frame(storage, start_date, end_date):
+    """
+    Load the sessions logged from start_date to end_date inclusive.
+    The binary log is memory-mapped and sliced directly; other backends
+    are read once through storage.iter_range.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required for vectorized analytics")
+    
+    storage.flush()
+    dates = date_range(start_date, end_date)
+    if isinstance(storage, BinaryStorage):
+        return _load_binary_frame(storage, dates)
+    
+    date_codes = {date: i for i, date in enumerate(dates)}
+    app_codes = {}
+    day, app, duration, kind = [], [], [], []
+    for record in storage.iter_range(start_date, end_date):
+        day.append(date_codes[record.timestamp[:10]])
+        app.append(app_codes.setdefault(record.app_name, len(app_codes)))
+        duration.append(record.duration)
+        kind.append(encode_productive(record.is_productive))
+    
+    return ActivityFrame(
+        dates,
+        list(app_codes),
+        np.array(day, dtype=np.int64),
+        np.array(app, dtype=np.int64),
+        np.array(duration, dtype=np.float64),
+        np.array(kind, dtype=np.uint8)
+    )
+
+def _load_binary_frame(storage, dates):
+    """Build a frame straight from the memory-mapped binary log"""
+    # Local midnight of every day in the range, plus the midnight that ends
+    # the last day (not +24h, which is wrong on DST changes)
+    midnights = [datetime.strptime(date, '%Y-%m-%d') for date in dates]
+    midnights.append(midnights[-1] + timedelta(days=1))
+    bounds = np.array([midnight.timestamp() for midnight in midnights])
+    
+    count = (os.path.getsize(storage.log_file) - HEADER_SIZE) // RECORD_SIZE
+    if count > 0:
+        records = np.memmap(storage.log_file, dtype=np.dtype(RECORD_DTYPE), mode='r', offset=HEADER_SIZE, shape=(count,))
+        first, last = np.searchsorted(records['timestamp'], [bounds[0], bounds[-1]])
+        records = records[first:last]
+    else:
+        records = np.zeros(0, dtype=np.dtype(RECORD_DTYPE))
+    
+    string_ids, app = np.unique(records['app_id'], return_inverse=True)
+    return ActivityFrame(
+        dates,
+        [storage.strings[int(i)] for i in string_ids],
+        np.searchsorted(bounds, records['timestamp'], side='right') - 1,
+        app.astype(np.int64),
+        # Durations are float32 on disk; round like the row readers do
+        np.round(records['duration'].astype(np.float64), 2),
+        np.array(records['classification'])
+    )
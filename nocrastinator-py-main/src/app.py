@@ -15,6 +15,11 @@ from datetime import datetime, timedelta
 from activity_tracker import ActivityTracker
 from focus_score import FocusScore
 from pomodoro import PomodoroTimer
+from time_buckets import format_heatmap
+from dashboard import DashboardProducer
+from ui_dispatch import UiDispatcher
+from analysis_worker import AnalysisWorker
+from backfill import discard_checkpoint
 import config
 
 class ProductivityTrackerApp:
@@ -37,10 +42,24 @@ class ProductivityTrackerApp:
         self.focus_score = FocusScore()
         self.pomodoro = PomodoroTimer()
         
-        # Set callbacks
-        self.pomodoro.on_tick = self.update_pomodoro_display
-        self.pomodoro.on_phase_change = self.handle_phase_change
-        self.activity_tracker.on_unproductive_alert = self.handle_unproductive_alert
+        # Dashboard data is gathered off the UI thread and handed over in snapshots
+        self.dashboard = DashboardProducer(self.activity_tracker, self.focus_score)
+        self.snapshot = None  # Last snapshot shown
+        
+        # Callbacks arrive on worker threads and are run on the Tk thread;
+        # bursts of timer ticks collapse into one repaint per frame
+        self.ui = UiDispatcher(self.root)
+        self.pomodoro.on_tick = self.ui.wrap(self.update_pomodoro_display)
+        self.pomodoro.on_phase_change = self.ui.wrap(self.handle_phase_change, coalesce=False)
+        self.activity_tracker.on_unproductive_alert = self.ui.wrap(self.handle_unproductive_alert, coalesce=False)
+        
+        # The Analysis tab is computed in the background and cached until new data arrives
+        self.analysis = AnalysisWorker(
+            self.compute_analysis,
+            self.focus_score.data_version,
+            self.ui.wrap(self.show_analysis),
+            self.ui.wrap(self.show_analysis_error)
+        )
         
         # Set up UI
         self.setup_ui()
@@ -49,8 +68,13 @@ class ProductivityTrackerApp:
         self.start_tracking()
         
         # Update UI periodically
+        self.ui.start()
+        self.dashboard.start()
         self.update_ui()
         
+        # Flush pending log rows when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         print("Application initialized")
     
     def setup_logging(self):
@@ -84,6 +108,9 @@ class ProductivityTrackerApp:
         # Create analysis tab
         self.create_analysis_tab()
         
+        # Create time-of-day heatmap tab
+        self.create_heatmap_tab()
+        
         # Create settings tab
         self.create_settings_tab()
         
@@ -216,6 +243,24 @@ class ProductivityTrackerApp:
         # Weekly overview section (using text instead of matplotlib)
         overview_frame = ttk.LabelFrame(analysis_frame, text="Weekly Overview")
         overview_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.overview_frame = overview_frame
+        
+        # Window length selector: 7 days shows the daily table, longer windows the rollups
+        window_frame = ttk.Frame(overview_frame)
+        window_frame.pack(fill="x", padx=5, pady=(5, 0))
+        ttk.Label(window_frame, text="Window:").pack(side="left")
+        self.window_var = tk.StringVar(value=f"{config.ANALYSIS_WINDOWS[0]} days")
+        window_selector = ttk.Combobox(
+            window_frame,
+            textvariable=self.window_var,
+            values=[f"{days} days" for days in config.ANALYSIS_WINDOWS],
+            state="readonly",
+            width=10
+        )
+        window_selector.pack(side="left", padx=5)
+        window_selector.bind("<<ComboboxSelected>>", lambda event: self.update_analysis_tab())
+        self.analysis_status_label = ttk.Label(window_frame, text="", foreground="gray")
+        self.analysis_status_label.pack(side="left", padx=5)
         
         # Text widget for data display
         self.weekly_data_text = tk.Text(overview_frame, height=12, wrap="none")
@@ -263,6 +308,40 @@ class ProductivityTrackerApp:
         self.suggestions_text = tk.Text(suggestions_frame, height=15, width=40, wrap="word", state="disabled")
         self.suggestions_text.pack(fill="both", expand=True, padx=10, pady=10)
     
+    def create_heatmap_tab(self):
+        """Create the time-of-day heatmap tab"""
+        heatmap_frame = ttk.Frame(self.notebook)
+        self.notebook.add(heatmap_frame, text="Heatmap")
+        
+        # Which measure to shade
+        kind_frame = ttk.Frame(heatmap_frame)
+        kind_frame.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(kind_frame, text="Show:").pack(side="left")
+        self.heatmap_kind_var = tk.StringVar(value="focus")
+        for kind, label in [("focus", "Focus ratio"), ("productive", "Productive time"), ("unproductive", "Unproductive time")]:
+            ttk.Radiobutton(
+                kind_frame,
+                text=label,
+                value=kind,
+                variable=self.heatmap_kind_var,
+                command=self.update_heatmap_tab
+            ).pack(side="left", padx=5)
+        
+        heatmap_box = ttk.LabelFrame(heatmap_frame, text="Weekday by Hour of Day")
+        heatmap_box.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.heatmap_text = tk.Text(heatmap_box, height=12, wrap="none", font=("Courier", 12), state="disabled")
+        self.heatmap_text.pack(fill="both", expand=True, padx=5, pady=5)
+    
+    def update_heatmap_tab(self):
+        """Redraw the heatmap from the time-of-day buckets"""
+        matrix = self.activity_tracker.time_buckets.heatmap(self.heatmap_kind_var.get())
+        
+        self.heatmap_text.configure(state="normal")
+        self.heatmap_text.delete(1.0, tk.END)
+        self.heatmap_text.insert(tk.END, format_heatmap(matrix))
+        self.heatmap_text.configure(state="disabled")
+    
     def create_settings_tab(self):
         """Create the settings tab"""
         settings_frame = ttk.Frame(self.notebook)
@@ -323,59 +402,60 @@ class ProductivityTrackerApp:
         """Toggle the Pomodoro timer on/off"""
         if not self.pomodoro.is_running:
             self.pomodoro.start()
-            self.start_button.configure(text="Stop")
-            self.pause_button.configure(state="normal")
-            self.reset_button.configure(state="normal")
+            self.ui.configure(self.start_button, text="Stop")
+            self.ui.configure(self.pause_button, state="normal")
+            self.ui.configure(self.reset_button, state="normal")
         else:
             self.pomodoro.stop()
-            self.start_button.configure(text="Start")
-            self.pause_button.configure(text="Pause", state="disabled")
-            self.reset_button.configure(state="disabled")
-            self.timer_label.configure(text=f"{config.POMODORO_WORK_DURATION:02d}:00")
-            self.phase_label.configure(text="Ready")
-            self.progress_var.set(0)
+            self.ui.configure(self.start_button, text="Start")
+            self.ui.configure(self.pause_button, text="Pause", state="disabled")
+            self.ui.configure(self.reset_button, state="disabled")
+            self.ui.configure(self.timer_label, text=f"{config.POMODORO_WORK_DURATION:02d}:00")
+            self.ui.configure(self.phase_label, text="Ready")
+            self.ui.set_var(self.progress_var, 0)
     
     def pause_resume_pomodoro(self):
         """Pause or resume the Pomodoro timer"""
         if self.pomodoro.is_running:
             if self.pomodoro.is_paused:
                 self.pomodoro.resume()
-                self.pause_button.configure(text="Pause")
+                self.ui.configure(self.pause_button, text="Pause")
             else:
                 self.pomodoro.pause()
-                self.pause_button.configure(text="Resume")
+                self.ui.configure(self.pause_button, text="Resume")
     
     def reset_pomodoro(self):
         """Reset the Pomodoro timer"""
         self.pomodoro.stop()
         self.pomodoro.start()
-        self.pause_button.configure(text="Pause")
+        self.ui.configure(self.pause_button, text="Pause")
     
     def update_pomodoro_display(self):
         """Update the Pomodoro timer display"""
-        self.timer_label.configure(text=self.pomodoro.get_time_remaining_str())
-        self.phase_label.configure(text=self.pomodoro.current_phase)
-        self.progress_var.set(self.pomodoro.get_progress())
+        self.ui.configure(self.timer_label, text=self.pomodoro.get_time_remaining_str())
+        self.ui.configure(self.phase_label, text=self.pomodoro.current_phase)
+        self.ui.set_var(self.progress_var, self.pomodoro.get_progress())
     
     def handle_phase_change(self, phase):
         """Handle Pomodoro phase changes"""
         if phase == "Work":
-            self.tip_label.configure(text="Focus on your task. Avoid distractions.")
+            self.ui.configure(self.tip_label, text="Focus on your task. Avoid distractions.")
         elif phase == "Short Break":
-            self.tip_label.configure(text="Take a short break. Stand up and stretch.")
+            self.ui.configure(self.tip_label, text="Take a short break. Stand up and stretch.")
         elif phase == "Long Break":
-            self.tip_label.configure(text="Take a longer break. Rest your eyes and mind.")
+            self.ui.configure(self.tip_label, text="Take a longer break. Rest your eyes and mind.")
     
     def handle_unproductive_alert(self, app_name):
         """Handle alerts for unproductive app usage"""
         alert_text = f"⚠️ Productivity Alert: You've been unproductive for over {config.UNPRODUCTIVE_TIME_THRESHOLD//60} minute(s).\nConsider switching to a more productive task."
-        self.alert_label.configure(text=alert_text, style="Alert.TLabel")
+        self.ui.configure(self.alert_label, text=alert_text, style="Alert.TLabel")
         
-        # Get the current app for more context
-        current_app, _ = self.activity_tracker.get_active_window_info()
+        # Get the current app for more context from the tracker's published state
+        current_app = self.activity_tracker.get_state().app_name
         
         # Update the tip label with advice
-        self.tip_label.configure(
+        self.ui.configure(
+            self.tip_label,
             text=f"Try switching to a productive app instead of using unproductive apps like {current_app}."
         )
         
@@ -384,10 +464,11 @@ class ProductivityTrackerApp:
     
     def clear_alert(self):
         """Clear the productivity alert"""
-        self.alert_label.configure(text="No alerts", style="TLabel")
+        self.ui.configure(self.alert_label, text="No alerts", style="TLabel")
         
         # Reset the tip label
-        self.tip_label.configure(
+        self.ui.configure(
+            self.tip_label,
             text="Start the Pomodoro timer to boost your productivity!"
         )
     
@@ -398,13 +479,103 @@ class ProductivityTrackerApp:
         # If analysis tab is selected, refresh the analysis
         if selected_tab == 1:  # Analysis tab
             self.update_analysis_tab()
+        elif selected_tab == 2:  # Heatmap tab
+            self.update_heatmap_tab()
     
     def update_analysis_tab(self):
-        """Update the analysis tab with current data"""
+        """Show the analysis for the selected window, computing it in the background if needed"""
+        window_days = int(self.window_var.get().split()[0])
+        result = self.analysis.request(window_days)
+        if result is not None:
+            self.show_analysis(window_days, result)
+        else:
+            self.analysis_status_label.configure(text="Loading analysis...")
+    
+    def compute_analysis(self, job):
+        """Gather the Analysis tab data on the worker thread; None when cancelled"""
+        window_days = job.key
+        
         # Get weekly analysis data
         analysis = self.focus_score.get_weekly_analysis()
+        if job.cancelled():
+            return None
         
-        # Update the weekly data text display
+        window_analysis = None
+        if window_days != 7:
+            window_analysis = self.focus_score.get_window_analysis(window_days)
+            if job.cancelled():
+                return None
+        
+        # Get today's summary and classify the most used apps
+        summary = self.activity_tracker.get_daily_summary()
+        top_apps = []
+        if summary and 'apps' in summary:
+            sorted_apps = sorted(summary['apps'].items(), key=lambda x: x[1], reverse=True)
+            for app_name, duration in sorted_apps[:len(self.app_labels)]:
+                top_apps.append((app_name, duration, self.activity_tracker.is_productive(app_name, "")))
+        
+        return {
+            'analysis': analysis,
+            'window_analysis': window_analysis,
+            'summary': summary,
+            'top_apps': top_apps
+        }
+    
+    def show_analysis(self, window_days, result):
+        """Update the analysis tab from a computed result"""
+        if window_days != int(self.window_var.get().split()[0]):
+            return  # The selection changed; its own result is on the way
+        self.analysis_status_label.configure(text="")
+        analysis = result['analysis']
+        
+        if window_days == 7:
+            self.overview_frame.configure(text="Weekly Overview")
+            self.update_weekly_text(analysis)
+        else:
+            self.overview_frame.configure(text=f"{window_days}-Day Overview")
+            self.update_window_text(result['window_analysis'])
+        
+        # Update most used apps
+        top_apps = result['top_apps']
+        for i, label in enumerate(self.app_labels):
+            if i < len(top_apps):
+                app_name, duration, productive = top_apps[i]
+                hours = duration / 3600
+                minutes = (duration % 3600) / 60
+                
+                if hours >= 1:
+                    time_str = f"{hours:.1f}h"
+                else:
+                    time_str = f"{minutes:.0f}m"
+                
+                if productive is True:
+                    prod_str = "(Productive)"
+                    label.configure(foreground="green")
+                elif productive is False:
+                    prod_str = "(Unproductive)"
+                    label.configure(foreground="red")
+                else:
+                    prod_str = "(Neutral)"
+                    label.configure(foreground="black")
+                
+                label.configure(text=f"{i+1}. {app_name} - {time_str} {prod_str}")
+            else:
+                label.configure(text=f"{i+1}. No data")
+        
+        # Update statistics
+        self.update_stats_text(analysis, result['summary'])
+        
+        # Update suggestions
+        self.update_suggestions_text(analysis['suggestions'])
+    
+    def show_analysis_error(self, window_days, error):
+        """Replace the loading message when the analysis could not be computed"""
+        if window_days != int(self.window_var.get().split()[0]):
+            return
+        self.analysis_status_label.configure(text=f"Analysis failed: {error}")
+    
+    def update_weekly_text(self, analysis):
+        """Show the day-by-day table for the past week"""
         self.weekly_data_text.config(state="normal")
         self.weekly_data_text.delete(1.0, tk.END)
         
@@ -448,46 +619,34 @@ class ProductivityTrackerApp:
         
         self.weekly_data_text.insert(tk.END, summary)
         self.weekly_data_text.config(state="disabled")
+    
+    def update_window_text(self, window_analysis):
+        """Show rolling-window statistics for a longer window"""
+        window = window_analysis['window']
+        previous = window_analysis['previous']
+        change = window_analysis['change']
+        percentiles = window['percentiles']
+        
+        text = f"{window['start_date']} to {window['end_date']} ({window['days_with_data']} of {window['days']} days with data)\n\n"
+        text += f"Average Focus Score: {window['average_score']:.1f} ({change['average_score']:+.1f} vs previous {window['days']} days)\n"
+        if percentiles[50] is not None:
+            text += f"Score Percentiles: 25th {percentiles[25]:.1f} | median {percentiles[50]:.1f} | 75th {percentiles[75]:.1f} | 90th {percentiles[90]:.1f}\n"
+        text += f"Total Productive Time: {window['productive_time'] / 3600:.2f} hours ({change['productive_time'] / 3600:+.2f})\n"
+        text += f"Total Unproductive Time: {window['unproductive_time'] / 3600:.2f} hours ({change['unproductive_time'] / 3600:+.2f})\n"
+        text += f"Previous Period Average: {previous['average_score']:.1f}\n"
+        text += f"Longest Streak: {window_analysis['longest_streak']} days\n"
+        
+        text += f"\n{'Week Ending':^12} | {'7-Day Average':^14}\n"
+        text += "-" * 30 + "\n"
+        for date_str, average in window_analysis['moving_average']:
+            date_display = f"{date_str[-2:]}/{date_str[5:7]}"  # Format as DD/MM
+            average_display = f"{average:.1f}" if average is not None else "-"
+            text += f"{date_display:^12} | {average_display:^14}\n"
         
-        # Update most used apps
-        # Get today's summary
-        summary = self.activity_tracker.get_daily_summary()
-        
-        if summary and 'apps' in summary:
-            apps = summary['apps']
-            sorted_apps = sorted(apps.items(), key=lambda x: x[1], reverse=True)
-            
-            for i, label in enumerate(self.app_labels):
-                if i < len(sorted_apps):
-                    app_name, duration = sorted_apps[i]
-                    hours = duration / 3600
-                    minutes = (duration % 3600) / 60
-                    
-                    if hours >= 1:
-                        time_str = f"{hours:.1f}h"
-                    else:
-                        time_str = f"{minutes:.0f}m"
-                    
-                    productive = self.activity_tracker.is_productive(app_name, "")
-                    if productive is True:
-                        prod_str = "(Productive)"
-                        label.configure(foreground="green")
-                    elif productive is False:
-                        prod_str = "(Unproductive)"
-                        label.configure(foreground="red")
-                    else:
-                        prod_str = "(Neutral)"
-                        label.configure(foreground="black")
-                    
-                    label.configure(text=f"{i+1}. {app_name} - {time_str} {prod_str}")
-                else:
-                    label.configure(text=f"{i+1}. No data")
-        
-        # Update statistics
-        self.update_stats_text(analysis, summary)
-        
-        # Update suggestions
-        self.update_suggestions_text(analysis['suggestions'])
+        self.weekly_data_text.config(state="normal")
+        self.weekly_data_text.delete(1.0, tk.END)
+        self.weekly_data_text.insert(tk.END, text)
+        self.weekly_data_text.config(state="disabled")
     
     def update_stats_text(self, analysis, summary):
         """Update the statistics text area"""
@@ -541,15 +700,14 @@ class ProductivityTrackerApp:
         
         if result:
             try:
-                # Remove data files
-                data_files = [
-                    config.ACTIVITY_LOG_FILE,
-                    config.FOCUS_SCORE_FILE
-                ]
+                # Stop tracking so the writer releases its files
+                self.dashboard.stop()
+                self.activity_tracker.stop_tracking()
                 
-                for file in data_files:
-                    if os.path.exists(file):
-                        os.remove(file)
+                # Remove the storage backend's data files
+                self.activity_tracker.storage.reset()
+                self.activity_tracker.time_buckets.reset()
+                discard_checkpoint()
                 
                 messagebox.showinfo(
                     "Reset Complete",
@@ -565,33 +723,46 @@ class ProductivityTrackerApp:
                     f"Failed to reset application data: {str(e)}"
                 )
     
+    def on_close(self):
+        """Stop background work and close the window"""
+        self.pomodoro.stop()
+        self.dashboard.stop()
+        self.ui.stop()
+        self.focus_score.save()
+        self.activity_tracker.stop_tracking()
+        self.root.destroy()
+    
     def update_ui(self):
-        """Update the UI periodically"""
+        """Apply the newest dashboard snapshot, if any, and poll again shortly"""
+        snapshot = self.dashboard.take_latest()
+        if snapshot is not None:
+            self.apply_snapshot(snapshot)
+        
+        # Schedule the next update
+        self.root.after(config.DASHBOARD_POLL_INTERVAL, self.update_ui)
+    
+    def apply_snapshot(self, snapshot):
+        """Update the dashboard widgets from a snapshot"""
+        self.snapshot = snapshot
+        
         # Update current activity
-        app_name, window_title = self.activity_tracker.get_active_window_info()
-        if app_name:
-            self.activity_label.configure(text= f"{app_name} - {window_title}")
-            is_productive = self.activity_tracker.is_productive(app_name, window_title)
-            if is_productive is True:
-                self.activity_type_label.configure(text="(Productive)", foreground="green")
-            elif is_productive is False:
-                self.activity_type_label.configure(text="(Unproductive)", foreground="red")
+        if snapshot.app_name:
+            self.ui.configure(self.activity_label, text= f"{snapshot.app_name} - {snapshot.window_title}")
+            if snapshot.is_productive is True:
+                self.ui.configure(self.activity_type_label, text="(Productive)", foreground="green")
+            elif snapshot.is_productive is False:
+                self.ui.configure(self.activity_type_label, text="(Unproductive)", foreground="red")
             else:
-                self.activity_type_label.configure(text="(Neutral)", foreground="black")
+                self.ui.configure(self.activity_type_label, text="(Neutral)", foreground="black")
         else:
-            self.activity_label.configure(text="None")
-            self.activity_type_label.configure(text="")
+            self.ui.configure(self.activity_label, text="None")
+            self.ui.configure(self.activity_type_label, text="")
         
         # Update focus score
-        score = self.focus_score.calculate_daily_score()
-        self.score_label.configure(text=f"{score:.1f}")
+        self.ui.configure(self.score_label, text=f"{snapshot.score:.1f}")
         
         # Update streak
-        streak = self.focus_score.get_streak()
-        self.streak_label.configure(text=f"Current streak: {streak} days")
-        
-        # Schedule the next update
-        self.root.after(1000, self.update_ui)
+        self.ui.configure(self.streak_label, text=f"Current streak: {snapshot.streak} days")
 
 def main():
     """Main entry point for the application"""
@@ -0,0 +1,169 @@
+"""
+Parallel recompute of historical focus scores.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import config
+from storage import create_storage
+from daily_aggregates import DailyAggregateStore, empty_totals
+from focus_score import score_record
+from score_cache import config_fingerprints
+
+def make_shards(first_date, last_date, shard_days):
+    """Split first_date..last_date into (start, end) shards of shard_days days"""
+    shards = []
+    start = datetime.strptime(first_date, '%Y-%m-%d').date()
+    last = datetime.strptime(last_date, '%Y-%m-%d').date()
+    while start <= last:
+        end = min(start + timedelta(days=shard_days - 1), last)
+        shards.append((start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+        start = end + timedelta(days=1)
+    return shards
+
+def config_values():
+    """The current config settings, passed to workers so they read the same files"""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+def aggregate_shard(backend, settings, start_date, end_date):
+    """
+    Worker: aggregate one shard of history with its own read-only storage
+    instance, so workers never write index sidecars the parent also saves.
+    Returns {date: totals} for the days in the shard that have activity.
+    """
+    for name, value in settings.items():
+        setattr(config, name, value)
+    
+    storage = create_storage(backend, read_only=True)
+    try:
+        days = DailyAggregateStore(storage).get_range(start_date, end_date)
+    finally:
+        storage.close()
+    return {date: totals for date, totals in days.items() if totals['total_time'] > 0}
+
+def discard_checkpoint(checkpoint_file=None):
+    """Delete the checkpoint of an interrupted backfill, e.g. when the data it covers is reset"""
+    checkpoint_file = checkpoint_file or config.BACKFILL_CHECKPOINT_FILE
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+class ScoreBackfill:
+    """
+    Recomputes every stored daily score from the activity history.
+    The history is split into date shards aggregated in a process pool;
+    finished shards are checkpointed so an interrupted run resumes where it
+    stopped, and all scores are written back in a single batch at the end.
+    """
+    
+    CHECKPOINT_VERSION = 1
+    
+    def __init__(self, storage=None, backend=None, shard_days=None, workers=None, checkpoint_file=None):
+        self.backend = backend or config.STORAGE_BACKEND
+        self.owns_storage = storage is None
+        self.storage = storage or create_storage(self.backend)
+        self.shard_days = shard_days or config.BACKFILL_SHARD_DAYS
+        self.workers = workers
+        self.checkpoint_file = checkpoint_file or config.BACKFILL_CHECKPOINT_FILE
+    
+    def run(self, progress=None, restart=False):
+        """
+        Rescore the whole history. progress(done, total, shard) is called as
+        shards finish. Returns the number of score records written.
+        """
+        # Make sure queued rows are on disk before workers read them
+        self.storage.flush()
+        span = self.storage.date_span()
+        scores = self.storage.load_scores()
+        if span is None and not scores:
+            return 0
+        
+        first, last = span if span else (min(scores), max(scores))
+        shards = make_shards(first, last, self.shard_days)
+        checkpoint = self._load_checkpoint(first, last) if not restart else None
+        if checkpoint is None:
+            checkpoint = {'version': self.CHECKPOINT_VERSION, 'backend': self.backend, 'first': first,
+                          'last': last, 'shard_days': self.shard_days, 'done': {}}
+        
+        pending = [shard for shard in shards if shard[0] not in checkpoint['done']]
+        done = len(shards) - len(pending)
+        if progress and done:
+            progress(done, len(shards), None)
+        
+        if pending:
+            settings = config_values()
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(aggregate_shard, self.backend, settings, start, end): (start, end)
+                    for start, end in pending
+                }
+                try:
+                    for future in as_completed(futures):
+                        shard = futures[future]
+                        checkpoint['done'][shard[0]] = future.result()
+                        self._save_checkpoint(checkpoint)
+                        done += 1
+                        if progress:
+                            progress(done, len(shards), shard)
+                except BaseException:
+                    # Interrupted: drop queued shards, the checkpoint keeps finished ones
+                    for future in futures:
+                        future.cancel()
+                    raise
+        
+        # Score every day with activity, and rescore days that already had a
+        # score so stale entries from idle days are recalculated too
+        totals = {}
+        for days in checkpoint['done'].values():
+            totals.update(days)
+        for date in scores:
+            if first <= date <= last and date not in totals:
+                totals[date] = empty_totals()
+        
+        # Totals come from the classification stored at log time, which may
+        # predate the current category lists: a day keeps its categories
+        # stamp, and new days get none, so FocusScore reclassifies them
+        fingerprints = config_fingerprints()
+        for date, day_totals in totals.items():
+            categories_fp = scores[date].get('categories_fp') if date in scores else None
+            scores[date] = score_record(day_totals, dict(fingerprints, categories_fp=categories_fp))
+        self.storage.save_scores(scores)
+        if self.owns_storage:
+            self.storage.close()
+        
+        discard_checkpoint(self.checkpoint_file)
+        return len(totals)
+    
+    def _load_checkpoint(self, first, last):
+        """Return the saved checkpoint if it belongs to this same run"""
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file, 'r') as file:
+                checkpoint = json.load(file)
+        except Exception as e:
+            print(f"Error loading backfill checkpoint: {e}")
+            return None
+        
+        same_run = (
+            checkpoint.get('version') == self.CHECKPOINT_VERSION
+            and checkpoint.get('backend') == self.backend
+            and checkpoint.get('first') == first
+            and checkpoint.get('shard_days') == self.shard_days
+        )
+        if not same_run:
+            return None
+        # The last shard may have grown since the checkpoint; aggregate it again
+        if checkpoint.get('last') != last:
+            final_start = make_shards(first, checkpoint['last'], self.shard_days)[-1][0]
+            checkpoint['done'].pop(final_start, None)
+            checkpoint['last'] = last
+        return checkpoint
+    
+    def _save_checkpoint(self, checkpoint):
+        """Write the checkpoint with a temp file and atomic rename"""
+        temp_file = f"{self.checkpoint_file}.tmp"
+        with open(temp_file, 'w') as file:
+            json.dump(checkpoint, file, separators=(',', ':'))
+        os.replace(temp_file, self.checkpoint_file)
@@ -0,0 +1,430 @@
+"""
+Compact binary activity log with fixed-width records readable through mmap.
+"""
+
+import csv
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime, timedelta
+import config
+from activity_writer import ActivityLogWriter
+from storage import ActivityStorage, ActivityRecord, JsonScoreFile, parse_productive
+
+# File header: magic, format version, record size
+HEADER_FORMAT = '<8sII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b'NOCRLOG\x00'
+FORMAT_VERSION = 1
+
+# One session: end time (epoch seconds), duration, classification, app id, title id
+RECORD_FORMAT = '<dfB3xII'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Numpy description of the same layout, for zero-copy column access
+RECORD_DTYPE = [
+    ('timestamp', '<f8'),
+    ('duration', '<f4'),
+    ('classification', 'u1'),
+    ('padding', 'V3'),
+    ('app_id', '<u4'),
+    ('title_id', '<u4'),
+]
+
+# String table entries are a little-endian length followed by UTF-8 bytes
+LENGTH_FORMAT = '<I'
+LENGTH_SIZE = struct.calcsize(LENGTH_FORMAT)
+
+NEUTRAL = 0
+PRODUCTIVE = 1
+UNPRODUCTIVE = 2
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def encode_productive(is_productive):
+    """Map True/False/None to the classification byte"""
+    if is_productive is True:
+        return PRODUCTIVE
+    elif is_productive is False:
+        return UNPRODUCTIVE
+    return NEUTRAL
+
+def decode_productive(classification):
+    """Map the classification byte back to True/False/None"""
+    if classification == PRODUCTIVE:
+        return True
+    elif classification == UNPRODUCTIVE:
+        return False
+    return None
+
+def date_bounds(start_date, end_date):
+    """
+    Epoch seconds from the start of start_date to the end of end_date (local
+    time). The end is None (unbounded) when end_date is the last calendar day.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d').timestamp()
+    last_day = datetime.strptime(end_date, '%Y-%m-%d')
+    if last_day.date() == datetime.max.date():
+        return start, None
+    # Next local midnight rather than +24h: DST days are 23 or 25 hours long
+    end = (last_day + timedelta(days=1)).timestamp()
+    return start, end
+
+def parse_timestamp(timestamp, after=None):
+    """
+    Epoch seconds for a local 'YYYY-MM-DD HH:MM:SS'. In the hour repeated
+    when DST ends the string names two moments; the second one is taken
+    when the first would fall before after (the previous record's time).
+    """
+    moment = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    epoch = moment.timestamp()
+    if after is not None and epoch < after:
+        epoch = max(epoch, moment.replace(fold=1).timestamp())
+    return epoch
+
+class StringTable:
+    """
+    Append-only table of interned strings.
+    Ids are positions in the table, so a record stores 4 bytes instead of
+    repeating the app name or window title.
+    """
+    
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only  # Leave a partial entry on disk instead of dropping it
+        self.strings = []
+        self.ids = {}
+        self.pending = []
+        self._lock = threading.Lock()
+        self._load()
+    
+    def _load(self):
+        """Read every complete entry, dropping a partial one left by a crash"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        
+        position = 0
+        while position + LENGTH_SIZE <= len(data):
+            (length,) = struct.unpack_from(LENGTH_FORMAT, data, position)
+            end = position + LENGTH_SIZE + length
+            if end > len(data):
+                break
+            self._add(data[position + LENGTH_SIZE:end].decode('utf-8'))
+            position = end
+        
+        if position < len(data) and not self.read_only:
+            with open(self.path, 'r+b') as file:
+                file.truncate(position)
+    
+    def _add(self, string):
+        """Register a string and return its id"""
+        string_id = len(self.strings)
+        self.strings.append(string)
+        self.ids[string] = string_id
+        return string_id
+    
+    def intern(self, string):
+        """Return the id of string, assigning a new one if needed"""
+        with self._lock:
+            string_id = self.ids.get(string)
+            if string_id is None:
+                string_id = self._add(string)
+                self.pending.append(string)
+            return string_id
+    
+    def take_pending(self):
+        """Return encoded entries for strings not yet written to disk"""
+        with self._lock:
+            pending, self.pending = self.pending, []
+        chunks = []
+        for string in pending:
+            encoded = string.encode('utf-8')
+            chunks.append(struct.pack(LENGTH_FORMAT, len(encoded)) + encoded)
+        return b''.join(chunks)
+    
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+class BinaryActivityWriter(ActivityLogWriter):
+    """
+    Background writer for the binary log.
+    New strings are written to the string table before any record that
+    refers to them, so a crash never leaves a dangling id.
+    """
+    
+    def __init__(self, path, strings, **kwargs):
+        super().__init__(path, **kwargs)
+        self.strings = strings
+    
+    def _open(self):
+        init_binary_log(self.path)
+        self.file = open(self.path, 'ab')
+        self.strings_file = open(self.strings.path, 'ab')
+    
+    def _write_rows(self, batch):
+        records = []
+        for timestamp, duration, classification, app_name, window_title in batch:
+            try:
+                # Check before interning so a string that cannot be stored gets no id
+                app_name.encode('utf-8')
+                window_title.encode('utf-8')
+            except UnicodeEncodeError as e:
+                print(f"Error logging activity for {app_name}: {e}")
+                continue
+            records.append(struct.pack(RECORD_FORMAT, timestamp, duration, classification,
+                                       self.strings.intern(app_name), self.strings.intern(window_title)))
+        records = b''.join(records)
+        self.strings_file.write(self.strings.take_pending())
+        self.strings_file.flush()
+        self.file.write(records)
+        self.file.flush()
+    
+    def _sync(self):
+        os.fsync(self.strings_file.fileno())
+        os.fsync(self.file.fileno())
+    
+    def _close(self):
+        self.strings_file.close()
+        self.file.close()
+
+def init_binary_log(path):
+    """Create the log with its header, or drop a partial trailing record"""
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+        with open(path, 'wb') as file:
+            file.write(struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, RECORD_SIZE))
+        return
+    
+    with open(path, 'r+b') as file:
+        magic, version, record_size = struct.unpack(HEADER_FORMAT, file.read(HEADER_SIZE))
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} binary activity log")
+        
+        size = os.path.getsize(path)
+        complete = HEADER_SIZE + (size - HEADER_SIZE) // RECORD_SIZE * RECORD_SIZE
+        if complete != size:
+            file.truncate(complete)
+
+class BinaryStorage(ActivityStorage):
+    """
+    Activity history as fixed-width binary records plus an interned string
+    table, with focus scores in JSON. Records are appended in time order, so
+    date queries binary-search the memory-mapped file instead of parsing it.
+    """
+    
+    name = "binary"
+    
+    def __init__(self, log_file=None, strings_file=None, scores_file=None, read_only=False):
+        self.log_file = log_file or config.BINARY_LOG_FILE
+        if not read_only:
+            os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+            init_binary_log(self.log_file)
+        
+        self.strings = StringTable(strings_file or config.BINARY_STRINGS_FILE, read_only)
+        self.score_file = JsonScoreFile(scores_file)
+        self.writer = BinaryActivityWriter(self.log_file, self.strings)
+        self.last_end_time = self._last_timestamp()
+    
+    def append_activity(self, timestamp, app_name, window_title, duration, is_productive, end_time=None):
+        if end_time is None:
+            end_time = parse_timestamp(timestamp, self.last_end_time)
+        # Date queries binary-search the records, so they must stay in time
+        # order even if the clock is set back
+        if self.last_end_time is not None:
+            end_time = max(end_time, self.last_end_time)
+        self.last_end_time = end_time
+        self.writer.write((end_time, duration, encode_productive(is_productive), app_name, window_title or ""))
+    
+    def iter_day(self, date):
+        return self.iter_range(date, date)
+    
+    def iter_range(self, start_date, end_date):
+        start, end = date_bounds(start_date, end_date)
+        for timestamp, duration, classification, app_id, title_id in self.iter_raw(start, end):
+            yield ActivityRecord(
+                datetime.fromtimestamp(timestamp).strftime(TIMESTAMP_FORMAT),
+                self.strings[app_id],
+                self.strings[title_id],
+                round(duration, 2),
+                decode_productive(classification)
+            )
+    
+    def iter_raw(self, start=None, end=None):
+        """Yield raw record tuples with start <= timestamp < end (epoch seconds)"""
+        with open(self.log_file, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            count = (size - HEADER_SIZE) // RECORD_SIZE
+            if count <= 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                first = 0 if start is None else self._bisect(mapped, count, start)
+                last = count if end is None else self._bisect(mapped, count, end)
+                if first >= last:
+                    return
+                data = mapped[HEADER_SIZE + first * RECORD_SIZE:HEADER_SIZE + last * RECORD_SIZE]
+        yield from struct.iter_unpack(RECORD_FORMAT, data)
+    
+    def date_span(self):
+        with open(self.log_file, 'rb') as file:
+            count = (os.fstat(file.fileno()).st_size - HEADER_SIZE) // RECORD_SIZE
+            if count <= 0:
+                return None
+            file.seek(HEADER_SIZE)
+            (first,) = struct.unpack('<d', file.read(8))
+            file.seek(HEADER_SIZE + (count - 1) * RECORD_SIZE)
+            (last,) = struct.unpack('<d', file.read(8))
+        return (datetime.fromtimestamp(first).strftime('%Y-%m-%d'), datetime.fromtimestamp(last).strftime('%Y-%m-%d'))
+    
+    def _last_timestamp(self):
+        """End time of the newest record, or None if the log is empty"""
+        with open(self.log_file, 'rb') as file:
+            count = (os.fstat(file.fileno()).st_size - HEADER_SIZE) // RECORD_SIZE
+            if count <= 0:
+                return None
+            file.seek(HEADER_SIZE + (count - 1) * RECORD_SIZE)
+            (last,) = struct.unpack('<d', file.read(8))
+        return last
+    
+    def reclassify(self, classify, on_change=None, chunk_records=4096):
+        # Rows are deduplicated by string ids, so each distinct pair is decoded once
+        classifications = {}
+        rows = changed = 0
+        changed_dates = set()
+        
+        self.writer.pause()
+        try:
+            temp_file = f"{self.log_file}.tmp"
+            with open(self.log_file, 'rb') as source, open(temp_file, 'wb') as target:
+                target.write(source.read(HEADER_SIZE))
+                while True:
+                    chunk = source.read(chunk_records * RECORD_SIZE)
+                    chunk = chunk[:len(chunk) // RECORD_SIZE * RECORD_SIZE]
+                    if not chunk:
+                        break
+                    
+                    records = []
+                    for timestamp, duration, classification, app_id, title_id in struct.iter_unpack(RECORD_FORMAT, chunk):
+                        key = (app_id, title_id)
+                        new = classifications.get(key)
+                        if new is None:
+                            new = classifications[key] = encode_productive(classify(self.strings[app_id], self.strings[title_id]))
+                        if new != classification:
+                            changed += 1
+                            moment = datetime.fromtimestamp(timestamp).strftime(TIMESTAMP_FORMAT)
+                            changed_dates.add(moment[:10])
+                            if on_change is not None:
+                                on_change(ActivityRecord(
+                                    moment, self.strings[app_id], self.strings[title_id],
+                                    round(duration, 2), decode_productive(classification)
+                                ), decode_productive(new))
+                        records.append(struct.pack(RECORD_FORMAT, timestamp, duration, new, app_id, title_id))
+                    rows += len(records)
+                    target.write(b''.join(records))
+                target.flush()
+                os.fsync(target.fileno())
+            
+            if changed:
+                os.replace(temp_file, self.log_file)
+            else:
+                os.remove(temp_file)
+        finally:
+            self.writer.resume()
+        return rows, changed, sorted(changed_dates)
+    
+    @staticmethod
+    def _bisect(mapped, count, timestamp):
+        """Index of the first record at or after timestamp"""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            (value,) = struct.unpack_from('<d', mapped, HEADER_SIZE + middle * RECORD_SIZE)
+            if value < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def load_scores(self):
+        return self.score_file.load()
+    
+    def save_scores(self, scores, dates=None):
+        self.score_file.save(scores, dates)
+    
+    def flush(self):
+        self.writer.flush()
+    
+    def close(self):
+        self.writer.close()
+    
+    def open(self):
+        self.writer.open()
+    
+    def data_files(self):
+        return [self.log_file, self.strings.path] + self.score_file.data_files()
+    
+    def reset(self):
+        super().reset()
+        self.strings = self.writer.strings = StringTable(self.strings.path)
+        self.last_end_time = None
+
+def convert_csv_log(log_file=None, binary_file=None, strings_file=None):
+    """
+    Convert an activity_log.csv into the binary format.
+    Refuses to overwrite a binary log that already holds records.
+    Returns (rows converted, CSV size in bytes, binary size in bytes).
+    """
+    log_file = log_file or config.ACTIVITY_LOG_FILE
+    binary_file = binary_file or config.BINARY_LOG_FILE
+    strings_file = strings_file or config.BINARY_STRINGS_FILE
+    
+    os.makedirs(os.path.dirname(binary_file) or ".", exist_ok=True)
+    init_binary_log(binary_file)
+    if os.path.getsize(binary_file) > HEADER_SIZE:
+        raise RuntimeError(f"{binary_file} already contains activity; refusing to convert twice")
+    
+    strings = StringTable(strings_file)
+    rows = 0
+    previous = None
+    ordered = True
+    with open(log_file, 'r', newline='') as source, open(binary_file, 'ab') as records, open(strings_file, 'ab') as table:
+        reader = csv.reader(source)
+        next(reader, None)  # Skip header
+        
+        for row in reader:
+            epoch = parse_timestamp(row[0], previous)
+            if previous is not None and epoch < previous:
+                ordered = False
+            previous = epoch
+            records.write(struct.pack(
+                RECORD_FORMAT, epoch, float(row[3]), encode_productive(parse_productive(row[4])),
+                strings.intern(row[1]), strings.intern(row[2])
+            ))
+            rows += 1
+            if len(strings.pending) >= 1024:
+                table.write(strings.take_pending())
+        table.write(strings.take_pending())
+    
+    # Rows logged while the clock was set back would break the binary search
+    if not ordered:
+        sort_records(binary_file)
+    
+    binary_size = os.path.getsize(binary_file) + os.path.getsize(strings_file)
+    return rows, os.path.getsize(log_file), binary_size
+
+def sort_records(path):
+    """Rewrite a binary log with its records in time order (stable for equal times)"""
+    with open(path, 'rb') as file:
+        header = file.read(HEADER_SIZE)
+        data = file.read()
+    records = [data[i:i + RECORD_SIZE] for i in range(0, len(data) // RECORD_SIZE * RECORD_SIZE, RECORD_SIZE)]
+    records.sort(key=lambda record: struct.unpack_from('<d', record)[0])
+    
+    temp_file = f"{path}.tmp"
+    with open(temp_file, 'wb') as file:
+        file.write(header)
+        file.write(b''.join(records))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, path)
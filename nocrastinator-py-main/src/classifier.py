@@ -0,0 +1,101 @@
+"""
+Activity classifier module for deciding whether an app or website is productive.
+"""
+
+import config
+from lru import LRUCache
+from website_extractor import WebsiteExtractor
+
+class ActivityClassifier:
+    """
+    Classifies (app, window title) pairs as productive, unproductive or neutral.
+    Lookup sets are built once from config and results are memoized in a
+    bounded LRU cache, since the same windows get classified over and over.
+    """
+    
+    def __init__(self, browsers, extract_website, cache_size=None, verbose=True):
+        self.browsers = frozenset(browser.lower() for browser in browsers)
+        self.extract_website = extract_website
+        self.verbose = verbose  # Print detected websites as they are classified
+        if cache_size is None:
+            cache_size = config.CLASSIFIER_CACHE_SIZE
+        
+        self.productive_apps = frozenset(app.lower() for app in config.PRODUCTIVE_APPS)
+        self.unproductive_apps = frozenset(app.lower() for app in config.UNPRODUCTIVE_APPS)
+        
+        # Plain substring loops beat a combined regex for lists this short
+        self.productive_websites = tuple(config.PRODUCTIVE_WEBSITES)
+        self.unproductive_websites = tuple(config.UNPRODUCTIVE_WEBSITES)
+        
+        self._cache = LRUCache(cache_size)
+    
+    def is_productive(self, app_name, window_title):
+        """
+        Determine if an app or website is productive.
+        
+        Returns:
+        - True: Productive
+        - False: Unproductive
+        - None: Neutral
+        """
+        key = (app_name, window_title)
+        result = self._cache.get(key)
+        if result is LRUCache.MISSING:
+            result = self._classify(app_name, window_title)
+            self._cache.put(key, result)
+        return result
+    
+    def clear_cache(self):
+        """Forget all memoized classifications"""
+        self._cache.clear()
+    
+    def match_sites(self, text):
+        """
+        Check text against the website lists.
+        Any productive site wins over unproductive ones; None if nothing matches.
+        """
+        for site in self.productive_websites:
+            if site in text:
+                return True
+        for site in self.unproductive_websites:
+            if site in text:
+                return False
+        return None
+    
+    def _classify(self, app_name, window_title):
+        """Classify a pair without consulting the cache"""
+        app_name = app_name.lower()
+        window_title = window_title or ""
+        
+        # First check if app is a browser
+        if app_name in self.browsers:
+            website = self.extract_website(app_name, window_title)
+            
+            if website:
+                result = self.match_sites(website)
+                if result is True:
+                    if self.verbose:
+                        print(f"Productive website detected: {website}")
+                    return True
+                elif result is False:
+                    if self.verbose:
+                        print(f"Unproductive website detected: {website}")
+                    return False
+                
+                # If website is found but not categorized, log it for future categorization
+                if self.verbose:
+                    print(f"Uncategorized website detected: {website}")
+        
+        # Check if app is in productive or unproductive lists
+        if app_name in self.productive_apps:
+            return True
+        elif app_name in self.unproductive_apps:
+            return False
+        
+        # If not determined yet, check window title for website names
+        return self.match_sites(window_title.lower())
+
+def create_classifier(verbose=True, cache_size=None):
+    """Classifier for config.BROWSERS with its own website extractor"""
+    extractor = WebsiteExtractor(config.BROWSERS, verbose=verbose)
+    return ActivityClassifier(config.BROWSERS, extractor.extract, cache_size, verbose)
@@ -0,0 +1,255 @@
+"""
+Command line tools for the Productivity Tracker.
+"""
+
+import argparse
+import json
+import config
+
+def import_sqlite(args):
+    """Copy the CSV/JSON history into the SQLite database"""
+    from sqlite_storage import import_legacy_data
+    
+    try:
+        rows, scores = import_legacy_data(args.database, args.log, args.scores)
+    except RuntimeError as e:
+        raise SystemExit(f"Error: {e}")
+    print(f"Imported {rows} activity rows and {scores} focus scores into {args.database or config.SQLITE_DATABASE_FILE}")
+    print('Set STORAGE_BACKEND = "sqlite" in config.py to use it.')
+
+def import_binary(args):
+    """Convert activity_log.csv into the binary log format"""
+    from binary_log import convert_csv_log
+    
+    try:
+        rows, csv_size, binary_size = convert_csv_log(args.log, args.output, args.strings)
+    except RuntimeError as e:
+        raise SystemExit(f"Error: {e}")
+    saved = 100 * (1 - binary_size / csv_size) if csv_size else 0
+    print(f"Converted {rows} activity rows into {args.output or config.BINARY_LOG_FILE}")
+    print(f"{csv_size} bytes of CSV became {binary_size} bytes ({saved:.0f}% smaller)")
+    print('Set STORAGE_BACKEND = "binary" in config.py to use it.')
+
+def format_hours(seconds):
+    """Format seconds as hours with one decimal"""
+    return f"{seconds / 3600:.1f}h"
+
+def show_rollups(args):
+    """Print rolling-window summaries of the stored focus scores"""
+    import contextlib
+    import io
+    from focus_score import FocusScore
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        focus_score = FocusScore(refresh_categories=False)
+    
+    print(f"{'Window':>8} | {'Days':>4} | {'Avg':>5} | {'Change':>6} | {'P25':>5} | {'Median':>6} | {'P90':>5} | {'Productive':>10} | {'Unproductive':>12} | {'Streak':>6}")
+    print("-" * 94)
+    for days in args.days:
+        analysis = focus_score.get_window_analysis(days, args.end_date)
+        window = analysis['window']
+        percentiles = window['percentiles']
+        cells = [f"{percentiles[p]:.1f}" if percentiles[p] is not None else "-" for p in (25, 50, 90)]
+        print(
+            f"{days:>7}d | {window['days_with_data']:>4} | {window['average_score']:>5.1f} | "
+            f"{analysis['change']['average_score']:>+6.1f} | {cells[0]:>5} | {cells[1]:>6} | {cells[2]:>5} | "
+            f"{format_hours(window['productive_time']):>10} | {format_hours(window['unproductive_time']):>12} | "
+            f"{analysis['longest_streak']:>6}"
+        )
+
+def show_heatmap(args):
+    """Print a weekday-by-hour heatmap from the time-of-day buckets"""
+    from time_buckets import format_heatmap, get_time_buckets
+    
+    matrix = get_time_buckets().heatmap(args.kind, args.start_date, args.end_date, args.resolution)
+    print(format_heatmap(matrix, args.resolution))
+
+def backfill_scores(args):
+    """Recompute every stored focus score with the current weights"""
+    from backfill import ScoreBackfill
+    
+    def report(done, total, shard):
+        if shard is None:
+            print(f"Resuming: {done}/{total} shards already aggregated")
+        else:
+            print(f"[{done}/{total}] aggregated {shard[0]} to {shard[1]} ({done * 100 // total}%)")
+    
+    backfill = ScoreBackfill(shard_days=args.shard_days, workers=args.workers)
+    written = backfill.run(progress=report, restart=args.restart)
+    print(f"Rescored {written} days with PRODUCTIVE_TIME_WEIGHT={config.PRODUCTIVE_TIME_WEIGHT}, "
+          f"UNPRODUCTIVE_TIME_WEIGHT={config.UNPRODUCTIVE_TIME_WEIGHT}")
+
+def reclassify_activity(args):
+    """Classify the stored history again with the current category lists"""
+    from reclassify import reclassify_history
+    
+    summary = reclassify_history()
+    print(f"Classified {summary['pairs']} distinct app/title pairs across {summary['rows']} activity rows")
+    print(f"{summary['changed_rows']} rows changed on {len(summary['changed_dates'])} days")
+    for date in summary['changed_dates']:
+        print(f"  {date}")
+    print(f"Updated {len(summary['rescored_dates'])} focus scores")
+
+def query_daemon(command, **args):
+    """Send a command to the headless daemon and return its result"""
+    from ipc import DaemonClient
+    
+    try:
+        return DaemonClient().request(command, **args)
+    except RuntimeError as e:
+        raise SystemExit(f"Error: {e}")
+
+def print_json(result):
+    """Print an API result for scripts"""
+    print(json.dumps(result, indent=2))
+
+def format_minutes(seconds):
+    """Format seconds as whole minutes, or hours past one hour"""
+    return format_hours(seconds) if seconds >= 3600 else f"{seconds / 60:.0f}m"
+
+def format_productive(is_productive):
+    """Label a classification the way the dashboard does"""
+    return {True: "Productive", False: "Unproductive"}.get(is_productive, "Neutral")
+
+def format_pomodoro(timer):
+    """One-line Pomodoro timer status"""
+    if not timer['is_running']:
+        return "not running"
+    paused = " (paused)" if timer['is_paused'] else ""
+    return f"{timer['phase']} {timer['time_remaining_str']}, cycle {timer['cycle'] + 1}{paused}"
+
+def show_status(args):
+    """Print the daemon's current activity, score and timer"""
+    status = query_daemon("status")
+    if args.json:
+        return print_json(status)
+    
+    if status['app_name']:
+        print(f"Activity: {status['app_name']} - {status['window_title']} "
+              f"({format_productive(status['is_productive'])}) for {format_minutes(status['session_seconds'] or 0)}")
+    else:
+        print("Activity: None")
+    if status['unproductive_seconds'] is not None:
+        print(f"Unproductive for {format_minutes(status['unproductive_seconds'])}")
+    print(f"Focus score: {status['score']:.1f}")
+    print(f"Current streak: {status['streak']} days")
+    print(f"Pomodoro: {format_pomodoro(status['pomodoro'])}")
+
+def show_summary(args):
+    """Print a day's activity summary from the daemon"""
+    summary = query_daemon("summary", date=args.date)
+    if args.json:
+        return print_json(summary)
+    
+    print(f"Activity on {summary['date']}:")
+    print(f"- Total tracked: {format_hours(summary['total_time'])}")
+    print(f"- Productive: {format_hours(summary['productive_time'])} ({summary['productive_percentage']:.1f}%)")
+    print(f"- Unproductive: {format_hours(summary['unproductive_time'])}")
+    if summary['apps']:
+        print("Most used apps:")
+        for i, (app_name, duration) in enumerate(summary['apps'].items(), 1):
+            print(f"{i:>3}. {app_name} - {format_minutes(duration)}")
+
+def show_weekly(args):
+    """Print the past week's scores and suggestions from the daemon"""
+    analysis = query_daemon("weekly")
+    if args.json:
+        return print_json(analysis)
+    
+    print(f"{'Date':<10} | {'Score':>5} | {'Productive':>10} | {'Unproductive':>12}")
+    print("-" * 47)
+    for date, score, productive, unproductive in zip(
+        analysis['dates'], analysis['scores'], analysis['productive_times'], analysis['unproductive_times']
+    ):
+        print(f"{date:<10} | {score:>5.1f} | {productive:>9.1f}h | {unproductive:>11.1f}h")
+    print(f"Average score: {analysis['average_score']:.1f}")
+    print(f"Current streak: {analysis['streak']} days")
+    if analysis['most_productive_day']:
+        print(f"Most productive: {analysis['most_productive_day']}")
+    for suggestion in analysis['suggestions']:
+        print(f"- {suggestion}")
+
+def control_timer(args):
+    """Start, pause, resume or stop the daemon's Pomodoro timer"""
+    timer = query_daemon("pomodoro", action=args.action)
+    if args.json:
+        return print_json(timer)
+    print(f"Pomodoro: {format_pomodoro(timer)}")
+
+def stop_daemon(args):
+    """Ask the daemon to save its data and exit"""
+    query_daemon("shutdown")
+    print("Daemon is shutting down")
+
+def build_parser():
+    """Build the argument parser with one subcommand per tool"""
+    parser = argparse.ArgumentParser(description="Productivity Tracker command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    importer = subparsers.add_parser("import-sqlite", help="import activity_log.csv and focus_scores.json into SQLite")
+    importer.add_argument("--log", help=f"activity log to import (default: {config.ACTIVITY_LOG_FILE})")
+    importer.add_argument("--scores", help=f"focus scores to import (default: {config.FOCUS_SCORE_FILE})")
+    importer.add_argument("--database", help=f"database to create (default: {config.SQLITE_DATABASE_FILE})")
+    importer.set_defaults(func=import_sqlite)
+    
+    converter = subparsers.add_parser("import-binary", help="convert activity_log.csv into the binary log format")
+    converter.add_argument("--log", help=f"activity log to convert (default: {config.ACTIVITY_LOG_FILE})")
+    converter.add_argument("--output", help=f"binary log to create (default: {config.BINARY_LOG_FILE})")
+    converter.add_argument("--strings", help=f"string table to create (default: {config.BINARY_STRINGS_FILE})")
+    converter.set_defaults(func=import_binary)
+    
+    rollup = subparsers.add_parser("rollup", help="show rolling-window focus score statistics")
+    rollup.add_argument("--days", type=int, nargs="+", default=config.ANALYSIS_WINDOWS,
+                        help=f"window lengths in days (default: {' '.join(map(str, config.ANALYSIS_WINDOWS))})")
+    rollup.add_argument("--end-date", help="last day of each window as YYYY-MM-DD (default: today)")
+    rollup.set_defaults(func=show_rollups)
+    
+    heatmap = subparsers.add_parser("heatmap", help="show when in the day focus is strongest")
+    heatmap.add_argument("--kind", default="focus", choices=["focus", "productive", "unproductive", "neutral", "total"],
+                         help="measure to shade (default: focus ratio)")
+    heatmap.add_argument("--start-date", help="first day to include as YYYY-MM-DD (default: all history)")
+    heatmap.add_argument("--end-date", help="last day to include as YYYY-MM-DD (default: all history)")
+    heatmap.add_argument("--resolution", type=int, default=60, help="minutes per column (default: 60)")
+    heatmap.set_defaults(func=show_heatmap)
+    
+    backfill = subparsers.add_parser("backfill", help="recompute all focus scores after changing the scoring weights (close the app first)")
+    backfill.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    backfill.add_argument("--shard-days", type=int, help=f"days of history per task (default: {config.BACKFILL_SHARD_DAYS})")
+    backfill.add_argument("--restart", action="store_true", help="ignore the checkpoint of an interrupted run")
+    backfill.set_defaults(func=backfill_scores)
+    
+    reclassify = subparsers.add_parser("reclassify", help="classify logged activity again after changing the app or website lists (close the app first)")
+    reclassify.set_defaults(func=reclassify_activity)
+    
+    # Queries for a daemon started with `python main.py --headless`
+    status = subparsers.add_parser("status", help="show the daemon's current activity, focus score and timer")
+    status.add_argument("--json", action="store_true", help="print the raw API result")
+    status.set_defaults(func=show_status)
+    
+    summary = subparsers.add_parser("summary", help="show a day's activity summary from the daemon")
+    summary.add_argument("--date", help="day to summarize as YYYY-MM-DD (default: today)")
+    summary.add_argument("--json", action="store_true", help="print the raw API result")
+    summary.set_defaults(func=show_summary)
+    
+    weekly = subparsers.add_parser("weekly", help="show the past week's scores and suggestions from the daemon")
+    weekly.add_argument("--json", action="store_true", help="print the raw API result")
+    weekly.set_defaults(func=show_weekly)
+    
+    timer = subparsers.add_parser("timer", help="control the daemon's Pomodoro timer")
+    timer.add_argument("action", nargs="?", default="status", choices=["status", "start", "pause", "resume", "stop"],
+                       help="what to do with the timer (default: status)")
+    timer.add_argument("--json", action="store_true", help="print the raw API result")
+    timer.set_defaults(func=control_timer)
+    
+    shutdown = subparsers.add_parser("shutdown", help="stop the daemon after saving its data")
+    shutdown.set_defaults(func=stop_daemon)
+    
+    return parser
+
+def main(argv=None):
+    """Entry point for the command line tools"""
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -60,6 +60,38 @@ PRODUCTIVE_WEBSITES = [
     "kaggle.com",
 ]
 
+# Browser process names; their window titles are checked for websites
+BROWSERS = ["chrome.exe", "msedge.exe", "firefox.exe", "opera.exe", "brave.exe", "safari.exe"]
+
+# Maximum number of (app, window title) classifications to memoize
+CLASSIFIER_CACHE_SIZE = 4096
+
+# Maximum number of browser window titles to remember extracted domains for
+WEBSITE_CACHE_SIZE = 4096
+
+# Foreground window probe: "auto", "win32", "x11", "replay" or "null" (tracks nothing)
+WINDOW_PROBE_BACKEND = "auto"
+
+# Use focus-change events from the probe backend when it supports them
+ACTIVITY_EVENT_DRIVEN = True
+
+# Adaptive polling (in seconds): checks run every ACTIVITY_POLL_INTERVAL right
+# after a window change and back off by ACTIVITY_POLL_BACKOFF while the window
+# stays the same, up to ACTIVITY_POLL_MAX_INTERVAL. With events enabled,
+# polling runs at the maximum interval only as a safety net.
+ACTIVITY_POLL_INTERVAL = 0.5
+ACTIVITY_POLL_MAX_INTERVAL = 5.0
+ACTIVITY_POLL_BACKOFF = 1.5
+
+# Dashboard refresh: snapshots are built in the background every
+# DASHBOARD_REFRESH_INTERVAL seconds, and the window checks for a new one
+# every DASHBOARD_POLL_INTERVAL milliseconds
+DASHBOARD_REFRESH_INTERVAL = 1.0
+DASHBOARD_POLL_INTERVAL = 100
+
+# Callbacks from worker threads are run on the Tk thread once per frame (milliseconds)
+UI_FRAME_INTERVAL = 50
+
 # Time threshold for unproductive app alert (in seconds)
 UNPRODUCTIVE_TIME_THRESHOLD = 60  # 1 minute
 
@@ -74,8 +106,50 @@ MIN_FOCUS_SCORE = 0
 MAX_FOCUS_SCORE = 100
 PRODUCTIVE_TIME_WEIGHT = 0.7
 UNPRODUCTIVE_TIME_WEIGHT = 0.3
+FOCUS_SCORE_SAVE_INTERVAL = 60  # Persist today's live score at most this often (seconds)
+FOCUS_SCORE_COMPACT_AFTER = 256  # Journal entries before they are folded into focus_scores.json
+ANALYSIS_WINDOWS = [7, 30, 90, 365]  # Window lengths (days) offered on the Analysis tab
+
+# Time-of-day buckets behind the heatmap (bucket size in minutes must divide a day evenly)
+TIME_BUCKET_MINUTES = 15
+TIME_BUCKET_SAVE_INTERVAL = 300  # Save the buckets at most this often (seconds)
+TIME_BUCKET_COMPACT_AFTER = 288  # Journaled saves before they are folded into time_buckets.json on load
+
+# Score backfill (`python cli.py backfill`): days of history per worker task
+BACKFILL_SHARD_DAYS = 30
 
 # Data storage
 DATA_DIRECTORY = "data"
 ACTIVITY_LOG_FILE = f"{DATA_DIRECTORY}/activity_log.csv"
-FOCUS_SCORE_FILE = f"{DATA_DIRECTORY}/focus_scores.json" 
\ No newline at end of file
+FOCUS_SCORE_FILE = f"{DATA_DIRECTORY}/focus_scores.json"
+ACTIVITY_INDEX_FILE = f"{ACTIVITY_LOG_FILE}.idx"  # Per-date byte offsets into the activity log
+FOCUS_SCORE_JOURNAL_FILE = f"{FOCUS_SCORE_FILE}.journal"  # Score updates since the last compaction
+TIME_BUCKET_FILE = f"{DATA_DIRECTORY}/time_buckets.json"
+TIME_BUCKET_JOURNAL_FILE = f"{TIME_BUCKET_FILE}.journal"  # Days changed since the last compaction
+BACKFILL_CHECKPOINT_FILE = f"{DATA_DIRECTORY}/backfill_checkpoint.json"  # Progress of an interrupted backfill
+SQLITE_DATABASE_FILE = f"{DATA_DIRECTORY}/nocrastinator.db"
+BINARY_LOG_FILE = f"{DATA_DIRECTORY}/activity_log.bin"
+BINARY_STRINGS_FILE = f"{DATA_DIRECTORY}/activity_strings.bin"  # App names and titles used by the binary log
+
+# Storage backend: "csv" (activity_log.csv + focus_scores.json), "sqlite" or
+# "binary" (fixed-width records + focus_scores.json). Run `python cli.py
+# import-sqlite` or `python cli.py import-binary` once to copy existing history.
+STORAGE_BACKEND = "csv"
+
+# Activity log writer: rows are group-committed when the batch is full or
+# the flush interval (in seconds) has passed since the first buffered row.
+# ACTIVITY_LOG_FSYNC is "never", "batch" (fsync every commit) or "close".
+ACTIVITY_LOG_FLUSH_INTERVAL = 2.0
+ACTIVITY_LOG_BATCH_SIZE = 64
+ACTIVITY_LOG_FSYNC = "batch"
+
+# Headless daemon (`python main.py --headless`) and its local JSON API, used by
+# `python cli.py status` and friends. The API listens on DAEMON_HOST:DAEMON_PORT,
+# or on the Unix socket DAEMON_SOCKET_FILE when set and the platform supports it.
+# Each request must carry the token the daemon writes to DAEMON_TOKEN_FILE when
+# it starts; only the current user can read that file.
+DAEMON_HOST = "127.0.0.1"  # Keep on loopback: the token is sent in clear text
+DAEMON_PORT = 47615
+DAEMON_SOCKET_FILE = None
+DAEMON_TOKEN_FILE = f"{DATA_DIRECTORY}/daemon_token"
+DAEMON_CLIENT_TIMEOUT = 10.0  # Seconds the CLI waits for an answer
\ No newline at end of file
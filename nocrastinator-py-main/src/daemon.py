@@ -0,0 +1,209 @@
+"""
+Headless tracker daemon serving a local JSON API.
+"""
+
+import hmac
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+import config
+from activity_tracker import ActivityTracker
+from focus_score import FocusScore
+from pomodoro import PomodoroTimer
+from ipc import api_address, decode_message, encode_message, use_unix_socket, write_token
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers one JSON line per request until the client disconnects"""
+    
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(encode_message(self.server.tracker_daemon.dispatch(line)))
+
+class _TcpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+class TrackerDaemon:
+    """
+    Runs the activity tracker, focus score and Pomodoro timer without Tk.
+    Requests are answered on server threads; the main thread keeps today's
+    score current and saved until the daemon is stopped.
+    """
+    
+    POMODORO_ACTIONS = ("status", "start", "pause", "resume", "stop")
+    
+    def __init__(self):
+        self.activity_tracker = ActivityTracker()
+        self.focus_score = FocusScore()
+        self.pomodoro = PomodoroTimer()
+        
+        self.commands = {
+            "status": self.get_status,
+            "summary": self.get_summary,
+            "weekly": self.get_weekly,
+            "pomodoro": self.control_pomodoro,
+            "shutdown": self.request_stop
+        }
+        self.server = None
+        self.server_thread = None
+        self.token = None  # Written for clients by start(); no request is served without it
+        self._stop = threading.Event()
+    
+    def start(self):
+        """Start listening and tracking; raises OSError if the address is taken"""
+        self.server = self._create_server()
+        try:
+            self.token = write_token()
+        except OSError:
+            self.server.server_close()
+            self.server = None
+            raise
+        self.server.tracker_daemon = self
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        
+        self.activity_tracker.start_tracking()
+        print(f"Daemon listening on {api_address()}")
+    
+    def run(self):
+        """Block until a shutdown request, SIGTERM or Ctrl+C, then stop"""
+        try:
+            while not self._stop.wait(config.FOCUS_SCORE_SAVE_INTERVAL):
+                # Keeps today's score current and persisted without a dashboard
+                self.focus_score.calculate_daily_score()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+    
+    def request_stop(self):
+        """Ask the main loop to shut the daemon down"""
+        self._stop.set()
+        return {"stopping": True}
+    
+    def stop(self):
+        """Stop serving, then flush the timer, scores and activity log"""
+        self._stop.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            if use_unix_socket() and os.path.exists(config.DAEMON_SOCKET_FILE):
+                os.remove(config.DAEMON_SOCKET_FILE)
+            if os.path.exists(config.DAEMON_TOKEN_FILE):
+                os.remove(config.DAEMON_TOKEN_FILE)
+            self.server = None
+            self.token = None
+        
+        self.pomodoro.stop()
+        self.focus_score.save()
+        self.activity_tracker.stop_tracking()
+        print("Daemon stopped")
+    
+    def _create_server(self):
+        """Bind the API on the configured Unix socket or loopback port"""
+        if not use_unix_socket():
+            return _TcpServer((config.DAEMON_HOST, config.DAEMON_PORT), _RequestHandler)
+        
+        path = config.DAEMON_SOCKET_FILE
+        if os.path.exists(path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(path)
+                except OSError:
+                    # Left behind by a daemon that did not exit cleanly
+                    os.remove(path)
+                else:
+                    raise OSError(f"another daemon is already listening on {path}")
+        server = _UnixServer(path, _RequestHandler)
+        os.chmod(path, 0o600)
+        return server
+    
+    def dispatch(self, line):
+        """Run the command in one request line and build the response"""
+        command = None
+        try:
+            message = decode_message(line)
+            if not self._authorized(message.get("token")):
+                return {"ok": False, "error": f"Missing or wrong API token; it is in {config.DAEMON_TOKEN_FILE}"}
+            command = message.get("command")
+            handler = self.commands.get(command)
+            if handler is None:
+                return {"ok": False, "error": f"Unknown command: {command}"}
+            return {"ok": True, "result": handler(**(message.get("args") or {}))}
+        except (ValueError, TypeError) as e:
+            return {"ok": False, "error": f"Invalid request: {e}"}
+        except Exception as e:
+            print(f"Error handling {command}: {e}")
+            return {"ok": False, "error": str(e)}
+    
+    def _authorized(self, token):
+        """Check a request's token against the one written at startup"""
+        if self.token is None or not isinstance(token, str):
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8"))
+    
+    def get_status(self):
+        """Current activity, today's score and streak, and the timer"""
+        state = self.activity_tracker.get_state()
+        now = time.time()
+        return {
+            "app_name": state.app_name,
+            "window_title": state.window_title,
+            "is_productive": state.is_productive,
+            "session_seconds": now - state.session_start if state.session_start else None,
+            "unproductive_seconds": now - state.unproductive_since if state.unproductive_since else None,
+            "score": self.focus_score.calculate_daily_score(),
+            "streak": self.focus_score.get_streak(),
+            "pomodoro": self.get_pomodoro_status()
+        }
+    
+    def get_summary(self, date=None):
+        """Activity summary for date (YYYY-MM-DD, default today)"""
+        if date is not None:
+            datetime.strptime(date, '%Y-%m-%d')
+        return self.activity_tracker.get_daily_summary(date)
+    
+    def get_weekly(self):
+        """Scores and suggestions for the past week"""
+        return self.focus_score.get_weekly_analysis()
+    
+    def get_pomodoro_status(self):
+        """Timer phase and progress"""
+        return {
+            "phase": self.pomodoro.current_phase,
+            "time_remaining": self.pomodoro.time_remaining,
+            "time_remaining_str": self.pomodoro.get_time_remaining_str(),
+            "progress": self.pomodoro.get_progress(),
+            "cycle": self.pomodoro.current_cycle,
+            "is_running": self.pomodoro.is_running,
+            "is_paused": self.pomodoro.is_paused
+        }
+    
+    def control_pomodoro(self, action="status"):
+        """Start, pause, resume or stop the timer and return its status"""
+        if action not in self.POMODORO_ACTIONS:
+            raise ValueError(f"action must be one of {', '.join(self.POMODORO_ACTIONS)}")
+        if action != "status":
+            getattr(self.pomodoro, action)()
+        return self.get_pomodoro_status()
+
+def main():
+    """Run the tracker without a window until stopped"""
+    daemon = TrackerDaemon()
+    try:
+        daemon.start()
+    except OSError as e:
+        raise SystemExit(f"Error: could not listen on {api_address()}: {e}")
+    
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.request_stop())
+    daemon.run()
@@ -0,0 +1,229 @@
+"""
+In-memory daily activity aggregates maintained as activity is logged.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from storage import get_storage
+
+def empty_totals():
+    """Return zeroed totals for one day"""
+    return {
+        'total_time': 0,
+        'productive_time': 0,
+        'unproductive_time': 0,
+        'neutral_time': 0,
+        'apps': {},
+        'unproductive_apps': {}
+    }
+
+def copy_totals(totals):
+    """Return a copy of a day's totals that callers may modify"""
+    copy = dict(totals)
+    copy['apps'] = dict(totals['apps'])
+    copy['unproductive_apps'] = dict(totals['unproductive_apps'])
+    return copy
+
+def date_range(start_date, end_date):
+    """Return every 'YYYY-MM-DD' from start_date to end_date inclusive"""
+    current = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    dates = []
+    while current <= end:
+        dates.append(current.strftime('%Y-%m-%d'))
+        current += timedelta(days=1)
+    return dates
+
+def add_to_totals(totals, app_name, duration, is_productive):
+    """Add one activity session to a day's totals"""
+    totals['total_time'] += duration
+    
+    if is_productive is True:
+        totals['productive_time'] += duration
+    elif is_productive is False:
+        totals['unproductive_time'] += duration
+        totals['unproductive_apps'][app_name] = totals['unproductive_apps'].get(app_name, 0) + duration
+    else:
+        totals['neutral_time'] += duration
+    
+    totals['apps'][app_name] = totals['apps'].get(app_name, 0) + duration
+
+def move_in_totals(totals, app_name, duration, old, new):
+    """Move one session's time from its old classification to its new one"""
+    add_to_totals(totals, app_name, -duration, old)
+    add_to_totals(totals, app_name, duration, new)
+    if totals['unproductive_apps'].get(app_name, 1) <= 1e-6:
+        del totals['unproductive_apps'][app_name]
+
+class DailyAggregateStore:
+    """
+    Keeps per-day productive, unproductive and neutral seconds plus per-app
+    seconds. Today is seeded from disk once and then updated as sessions are
+    logged; other days are read from storage on first use and cached, so
+    repeated summaries never rescan the log.
+    """
+    
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
+        self.days = {}
+        self.versions = {}  # Bumped whenever a day's totals change
+        self.generation = 0  # Bumped when every day is invalidated
+        self.rewrites = 0  # Bumped when stored sessions start being reclassified
+        self.loaded_in = {}  # Date -> rewrites count when its totals were loaded
+        self._lock = threading.Lock()
+    
+    def seed(self, date=None):
+        """Load a day's totals from disk (default: today) unless already loaded"""
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        self._load_missing([date])
+    
+    def add(self, date, app_name, duration, is_productive):
+        """Record a logged session against its date"""
+        while True:
+            with self._lock:
+                totals = self.days.get(date)
+                if totals is not None:
+                    add_to_totals(totals, app_name, duration, is_productive)
+                    self.versions[date] = self.versions.get(date, 0) + 1
+                    return
+            self._load_missing([date])
+    
+    def version(self, date):
+        """Return a token that changes whenever the totals for date change"""
+        with self._lock:
+            return (self.generation, self.versions.get(date, 0))
+    
+    def get(self, date):
+        """Return a copy of the totals for date"""
+        while True:
+            with self._lock:
+                totals = self.days.get(date)
+                if totals is not None:
+                    return copy_totals(totals)
+            self._load_missing([date])
+    
+    def get_range(self, start_date, end_date):
+        """
+        Return copies of the totals for every date from start_date to
+        end_date inclusive, loading all uncached days in a single pass
+        """
+        dates = date_range(start_date, end_date)
+        while True:
+            with self._lock:
+                missing = [date for date in dates if date not in self.days]
+                if not missing:
+                    return {date: copy_totals(self.days[date]) for date in dates}
+            self._load_missing(missing)
+    
+    def _load_missing(self, dates):
+        """
+        Load uncached dates from storage without holding the lock, so add()
+        from the tracking thread never waits behind a long scan. Days another
+        thread cached meanwhile are kept; if an invalidate() ran during the
+        load, the loaded totals are discarded and callers load again.
+        """
+        with self._lock:
+            missing = [date for date in dates if date not in self.days]
+            token = (self.generation, [self.versions.get(date, 0) for date in missing])
+            rewrites = self.rewrites
+        if not missing:
+            return
+        
+        if len(missing) == 1:
+            loaded = {missing[0]: self._load_day(missing[0])}
+        else:
+            loaded = self._load_days(missing)
+        
+        with self._lock:
+            if (self.generation, [self.versions.get(date, 0) for date in missing]) != token:
+                return
+            for date in missing:
+                if date not in self.days:
+                    self.days[date] = loaded[date]
+                    self.loaded_in[date] = rewrites
+    
+    def invalidate(self, date=None):
+        """Drop cached totals for one date, or for every date"""
+        with self._lock:
+            if date is None:
+                self.days.clear()
+                self.generation += 1
+            else:
+                self.days.pop(date, None)
+                self.versions[date] = self.versions.get(date, 0) + 1
+    
+    def begin_reclassify(self):
+        """
+        Call before stored sessions are reclassified. Returns the token to
+        pass to reclassified() once the new classifications are committed.
+        """
+        with self._lock:
+            self.rewrites += 1
+            return self.rewrites
+    
+    def reclassified(self, token, changes):
+        """
+        Move the time of reclassified sessions between classifications in
+        the cached totals. changes lists (record as stored before, new
+        is_productive). Cached totals are adjusted rather than reloaded, so
+        sessions still queued for the log are kept. Days loaded after
+        begin_reclassify() may already hold the new classifications and are
+        dropped instead, as are loads still in flight.
+        """
+        by_date = {}
+        for record, is_productive in changes:
+            by_date.setdefault(record.timestamp[:10], []).append((record, is_productive))
+        
+        with self._lock:
+            for date, records in by_date.items():
+                totals = self.days.get(date)
+                if totals is not None and self.loaded_in.get(date, 0) < token:
+                    for record, is_productive in records:
+                        move_in_totals(totals, record.app_name, record.duration, record.is_productive, is_productive)
+                else:
+                    self.days.pop(date, None)
+                self.versions[date] = self.versions.get(date, 0) + 1
+    
+    def _load_day(self, date):
+        """Aggregate a day's rows from storage"""
+        totals = empty_totals()
+        try:
+            for record in self.storage.iter_day(date):
+                add_to_totals(totals, record.app_name, record.duration, record.is_productive)
+        except Exception as e:
+            print(f"Error loading daily totals: {e}")
+        return totals
+    
+    def _load_days(self, dates):
+        """Aggregate several days' rows from storage in one streaming pass"""
+        from analytics import numpy_available, load_frame
+        
+        if numpy_available():
+            try:
+                daily = load_frame(self.storage, dates[0], dates[-1]).daily_totals()
+                return {date: daily[date] for date in dates}
+            except Exception as e:
+                print(f"Error loading daily totals: {e}")
+        
+        days = {date: empty_totals() for date in dates}
+        try:
+            for record in self.storage.iter_range(dates[0], dates[-1]):
+                totals = days.get(record.timestamp[:10])
+                if totals is not None:
+                    add_to_totals(totals, record.app_name, record.duration, record.is_productive)
+        except Exception as e:
+            print(f"Error loading daily totals: {e}")
+        return days
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_daily_aggregates(storage=None):
+    """Return the shared aggregate store for a storage backend"""
+    storage = storage or get_storage()
+    with _stores_lock:
+        store = _stores.get(storage)
+        if store is None:
+            store = _stores[storage] = DailyAggregateStore(storage)
+        return store
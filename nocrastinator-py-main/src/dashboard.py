@@ -0,0 +1,96 @@
+"""
+Background producer of dashboard snapshots for the Tk refresh loop.
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+import config
+
+DashboardSnapshot = namedtuple(
+    'DashboardSnapshot',
+    ['created_at', 'app_name', 'window_title', 'is_productive', 'score', 'streak']
+)
+
+class DashboardProducer:
+    """
+    Builds immutable dashboard snapshots on a worker thread.
+    Everything that may block (score calculation and its saves) happens
+    here; the current activity comes from the tracker's published state.
+    The UI thread only takes the newest snapshot from the queue and
+    applies it to the widgets. The queue holds at most one snapshot, so a
+    busy UI never falls behind.
+    """
+    
+    def __init__(self, activity_tracker, focus_score, interval=None):
+        self.activity_tracker = activity_tracker
+        self.focus_score = focus_score
+        self.interval = config.DASHBOARD_REFRESH_INTERVAL if interval is None else interval
+        self.snapshots = queue.Queue(maxsize=1)
+        self.worker_thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+    
+    def start(self):
+        """Start producing snapshots"""
+        if self.worker_thread and self.worker_thread.is_alive():
+            return
+        self._stop.clear()
+        self.worker_thread = threading.Thread(target=self._produce_loop)
+        self.worker_thread.daemon = True
+        self.worker_thread.start()
+    
+    def stop(self, timeout=2):
+        """Stop the worker and wait for the snapshot in progress"""
+        self._stop.set()
+        self._wake.set()
+        if self.worker_thread:
+            self.worker_thread.join(timeout=timeout)
+            self.worker_thread = None
+    
+    def refresh(self):
+        """Build the next snapshot now instead of waiting for the interval"""
+        self._wake.set()
+    
+    def take_latest(self):
+        """Return the newest snapshot produced since the last call, or None"""
+        try:
+            return self.snapshots.get_nowait()
+        except queue.Empty:
+            return None
+    
+    def build_snapshot(self):
+        """Collect the current activity, score and streak"""
+        # The tracker's published state, so the dashboard shows what is being logged
+        state = self.activity_tracker.get_state()
+        return DashboardSnapshot(
+            created_at=time.time(),
+            app_name=state.app_name,
+            window_title=state.window_title,
+            is_productive=state.is_productive,
+            score=self.focus_score.calculate_daily_score(),
+            streak=self.focus_score.get_streak()
+        )
+    
+    def _publish(self, snapshot):
+        """Replace any snapshot the UI has not taken yet"""
+        while True:
+            try:
+                self.snapshots.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self.snapshots.get_nowait()
+                except queue.Empty:
+                    pass
+    
+    def _produce_loop(self):
+        """Build a snapshot every interval until stopped"""
+        while not self._stop.is_set():
+            try:
+                self._publish(self.build_snapshot())
+            except Exception as e:
+                print(f"Error building dashboard snapshot: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -3,10 +3,51 @@ Focus score module for calculating productivity metrics.
 """
 
 import os
-import csv
-import json
+import threading
+import time
 from datetime import datetime, timedelta
 import config
+from storage import get_storage
+from daily_aggregates import get_daily_aggregates
+from streaks import StreakTracker
+from rollups import RollupEngine
+from score_cache import config_fingerprints, ScoreRefresher
+
+def score_record(totals, fingerprints=None):
+    """
+    Calculate the focus score record for one day's totals.
+    Score is based on productive vs. unproductive time. The record is
+    stamped with fingerprints of the config it was calculated under.
+    """
+    total_time = totals['total_time']
+    productive_time = totals['productive_time']
+    unproductive_time = totals['unproductive_time']
+    
+    # Calculate score (0-100)
+    if total_time < 60:  # Less than a minute of data
+        score = 0
+    else:
+        # Weighted score - productive time increases score, unproductive decreases it
+        weighted_productive = productive_time * config.PRODUCTIVE_TIME_WEIGHT
+        weighted_unproductive = unproductive_time * config.UNPRODUCTIVE_TIME_WEIGHT
+        
+        if weighted_productive + weighted_unproductive > 0:
+            score = (weighted_productive / (weighted_productive + weighted_unproductive)) * 100
+        else:
+            score = 50  # Neutral score if no data
+        
+        # Cap score between 0-100
+        score = max(0, min(100, score))
+    
+    record = {
+        'score': score,
+        'total_time': total_time,
+        'productive_time': productive_time,
+        'unproductive_time': unproductive_time,
+        'neutral_time': totals['neutral_time']
+    }
+    record.update(fingerprints or config_fingerprints())
+    return record
 
 class FocusScore:
     """
@@ -14,8 +55,18 @@ class FocusScore:
     Tracks daily scores and provides analysis over time.
     """
     
-    def __init__(self):
-        self.scores_file = config.FOCUS_SCORE_FILE
+    def __init__(self, refresh_categories=True):
+        """
+        refresh_categories: reclassify the stored activity in the background
+        when the category lists changed. Tools running beside the app pass
+        False, since only the process writing the log may rewrite it.
+        """
+        self.storage = get_storage()
+        self.aggregates = get_daily_aggregates(self.storage)
+        # Scores are read from the dashboard worker and the UI thread
+        self._lock = threading.RLock()
+        # Bumped when scores change other than from logged activity (see data_version)
+        self.revision = 0
         
         # Create data directory if it doesn't exist
         os.makedirs(config.DATA_DIRECTORY, exist_ok=True)
@@ -23,156 +74,264 @@ class FocusScore:
         # Load existing scores or create new ones
         self.scores = self._load_scores()
         
+        # Cached scores calculated under other settings are brought up to date
+        self.fingerprints = config_fingerprints()
+        self.refresher = ScoreRefresher(self.storage)
+        self._refresh_stale_scores(refresh_categories)
+        
+        # Streak runs are built once and then updated with every score
+        self.streaks = StreakTracker()
+        self.streaks.rebuild(self.scores)
+        self.rollups = RollupEngine()
+        self.rollups.rebuild(self.scores)
+        
+        # Today's score is live: recomputed when its totals change and
+        # persisted at most every FOCUS_SCORE_SAVE_INTERVAL seconds
+        self.live_date = None
+        self.live_version = None
+        self.live_unsaved = False
+        self.live_saved_at = 0
+        
         print("Focus score calculator initialized")
     
     def _load_scores(self):
-        """Load focus scores from file"""
-        if os.path.exists(self.scores_file):
-            try:
-                with open(self.scores_file, 'r') as file:
-                    return json.load(file)
-            except Exception as e:
-                print(f"Error loading scores: {e}")
-                return {}
-        else:
-            return {}
+        """Load focus scores from storage"""
+        return self.storage.load_scores()
     
-    def _save_scores(self):
-        """Save focus scores to file"""
-        try:
-            with open(self.scores_file, 'w') as file:
-                json.dump(self.scores, file, indent=2)
-        except Exception as e:
-            print(f"Error saving scores: {e}")
+    def _save_scores(self, dates=None):
+        """Save focus scores to storage"""
+        self.storage.save_scores(self.scores, dates)
     
-    def calculate_daily_score(self, date=None):
+    def _refresh_stale_scores(self, refresh_categories):
         """
-        Calculate focus score for a given date.
-        Score is based on productive vs. unproductive time.
+        Find cached scores stamped with other config fingerprints. Changed
+        weights only need the stored totals, so those days are rescored
+        right away; changed category lists mean the logged sessions must be
+        classified again, which happens in the background while the old
+        totals are served (rescored with the current weights).
         """
-        if date is None:
-            date = datetime.now().strftime('%Y-%m-%d')
+        rescored = []
+        stale = []
+        for date, record in self.scores.items():
+            if all(record.get(key) == value for key, value in self.fingerprints.items()):
+                continue
+            
+            categories_fp = record.get('categories_fp')
+            if record.get('weights_fp') != self.fingerprints['weights_fp']:
+                # Keep the old categories stamp so the day is still known to be stale
+                self.scores[date] = score_record(record, dict(self.fingerprints, categories_fp=categories_fp))
+                rescored.append(date)
+            if categories_fp != self.fingerprints['categories_fp']:
+                stale.append(date)
         
-        # If we already calculated today's score, return it
-        if date in self.scores:
-            return self.scores[date]['score']
+        if rescored:
+            print(f"Rescored {len(rescored)} days for the current score weights")
+            self._save_scores(rescored)
         
-        # Calculate from activity log
-        total_time = 0
-        productive_time = 0
-        unproductive_time = 0
-        neutral_time = 0
+        # The log holds sessions classified under other category lists until
+        # the refresher has rewritten them
+        self.categories_current = not stale
+        if stale and refresh_categories:
+            print(f"Refreshing {len(stale)} days for the current categories in the background")
+            self.refresher.start()
+    
+    def _row_fingerprints(self):
+        """
+        Fingerprints for a record calculated from logged totals. While the
+        log still holds sessions classified under other category lists, the
+        categories stamp is left empty so the day stays marked stale.
+        """
+        if self.categories_current:
+            return self.fingerprints
+        return dict(self.fingerprints, categories_fp=None)
+    
+    def _apply_refreshed_scores(self):
+        """
+        Once the background refresher has reclassified the log, rescore the
+        days whose sessions changed and restamp the rest, whose totals were
+        right all along.
+        """
+        if self.categories_current or self.refresher.busy():
+            return
+        refreshed = self.refresher.take_results()
+        if refreshed is None:
+            # Not started or failed: the days stay marked stale
+            return
         
-        try:
-            # Read activity data
-            with open(config.ACTIVITY_LOG_FILE, 'r', newline='') as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip header
-                
-                for row in reader:
-                    if row[0].startswith(date):
-                        duration = float(row[3])
-                        is_productive = row[4]
-                        
-                        total_time += duration
-                        
-                        if is_productive == 'True':
-                            productive_time += duration
-                        elif is_productive == 'False':
-                            unproductive_time += duration
-                        else:
-                            neutral_time += duration
-        except Exception as e:
-            print(f"Error reading activity data: {e}")
-            return 0
+        self.categories_current = True
+        dates = []
+        for date in list(self.scores):
+            if date == self.live_date:
+                continue
+            if date in refreshed:
+                self._set_score(date, score_record(refreshed[date], self.fingerprints))
+            elif self.scores[date].get('categories_fp') != self.fingerprints['categories_fp']:
+                self._set_score(date, score_record(self.scores[date], self.fingerprints))
+            else:
+                continue
+            dates.append(date)
         
-        # Calculate score (0-100)
-        if total_time < 60:  # Less than a minute of data
-            score = 0
-        else:
-            # Weighted score - productive time increases score, unproductive decreases it
-            weighted_productive = productive_time * config.PRODUCTIVE_TIME_WEIGHT
-            weighted_unproductive = unproductive_time * config.UNPRODUCTIVE_TIME_WEIGHT
+        # Today is rescored from its refreshed totals with the current stamp
+        self.live_version = None
+        self.revision += 1
+        if dates:
+            self._save_scores(dates)
+    
+    def _set_score(self, date, record):
+        """Store a day's score record and keep the streaks and rollups in step"""
+        self.scores[date] = record
+        self.streaks.update(date, record['score'])
+        self.rollups.update(date, record)
+    
+    def data_version(self):
+        """
+        Return a token that changes whenever the data behind the scores
+        changes: new activity today, invalidated aggregates, refreshed
+        categories or a new day. Scores calculated lazily from unchanged data
+        leave it alone. Takes no score lock, so the UI can check it while a
+        worker is busy calculating.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        return (today, self.revision, self.aggregates.version(today))
+    
+    def calculate_daily_score(self, date=None):
+        """
+        Calculate focus score for a given date.
+        Score is based on productive vs. unproductive time.
+        Today's score follows new activity; past days are calculated once.
+        """
+        with self._lock:
+            today = datetime.now().strftime('%Y-%m-%d')
+            if date is None:
+                date = today
+            self._apply_refreshed_scores()
             
-            if weighted_productive + weighted_unproductive > 0:
-                score = (weighted_productive / (weighted_productive + weighted_unproductive)) * 100
-            else:
-                score = 50  # Neutral score if no data
+            # Also runs after midnight so yesterday's live score gets finalized
+            if date == today or (self.live_date is not None and self.live_date != today):
+                live_score = self._update_live_score(today)
+                if date == today:
+                    return live_score
             
-            # Cap score between 0-100
-            score = max(0, min(100, score))
+            # Past days only change when the settings do, and stale scores are
+            # refreshed in the background, so a stored score is served as is
+            if date in self.scores:
+                return self.scores[date]['score']
+            
+            # Daily totals are kept up to date as activity is logged
+            self._set_score(date, score_record(self.aggregates.get(date), self._row_fingerprints()))
+            self._save_scores([date])
+            return self.scores[date]['score']
+    
+    def _update_live_score(self, today):
+        """Recompute today's score if its totals changed and persist it when due"""
+        if self.live_date != today:
+            if self.live_date is not None:
+                # Finalize yesterday with everything logged before midnight
+                self._set_score(self.live_date, score_record(self.aggregates.get(self.live_date), self._row_fingerprints()))
+                self._save_scores([self.live_date])
+            self.live_date = today
+            self.live_version = None
+            self.live_unsaved = False
         
-        # Save score with details
-        self.scores[date] = {
-            'score': score,
-            'total_time': total_time,
-            'productive_time': productive_time,
-            'unproductive_time': unproductive_time,
-            'neutral_time': neutral_time
-        }
+        version = self.aggregates.version(today)
+        if version != self.live_version:
+            self.live_version = version
+            self._set_score(today, score_record(self.aggregates.get(today), self._row_fingerprints()))
+            self.live_unsaved = True
         
-        self._save_scores()
-        return score
+        if self.live_unsaved and time.monotonic() - self.live_saved_at >= config.FOCUS_SCORE_SAVE_INTERVAL:
+            self.save()
+        return self.scores[today]['score']
+    
+    def save(self):
+        """Persist today's live score if it changed since it was last saved"""
+        with self._lock:
+            if self.live_unsaved:
+                self._save_scores([self.live_date])
+                self.live_unsaved = False
+                self.live_saved_at = time.monotonic()
+    
+    def aggregate_range(self, start_date, end_date):
+        """
+        Per-day totals and scores plus per-app unproductive time for a date
+        range, read from storage in a single pass. Days without a stored
+        score are scored and saved together.
+        """
+        with self._lock:
+            days = self.aggregates.get_range(start_date, end_date)
+            self._apply_refreshed_scores()
+            
+            # Refresh the live score so today is not scored from a stale entry
+            today = datetime.now().strftime('%Y-%m-%d')
+            if today in days:
+                self.calculate_daily_score(today)
+            
+            new_dates = [date for date in days if date not in self.scores]
+            for date in new_dates:
+                self._set_score(date, score_record(days[date], self._row_fingerprints()))
+            if new_dates:
+                self._save_scores(new_dates)
+            
+            unproductive_apps = {}
+            for totals in days.values():
+                for app_name, duration in totals['unproductive_apps'].items():
+                    unproductive_apps[app_name] = unproductive_apps.get(app_name, 0) + duration
+            
+            return {
+                'dates': list(days),
+                'totals': days,
+                'scores': {date: self.scores[date]['score'] for date in days},
+                'unproductive_apps': unproductive_apps
+            }
     
     def get_streak(self):
         """Calculate the current productivity streak"""
-        min_score = 50  # Minimum score to count as productive day
-        
-        # Sort dates in reverse order (newest first)
-        dates = sorted(self.scores.keys(), reverse=True)
-        
-        if not dates:
-            return 0
-        
-        streak = 0
-        today = datetime.now().date()
-        
-        for i, date_str in enumerate(dates):
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            score = self.scores[date_str]['score']
-            
-            # Check if this date is part of continuous streak
-            expected_date = today - timedelta(days=i)
+        with self._lock:
+            return self.streaks.current_streak()
+    
+    def get_longest_streak(self, start_date=None, end_date=None):
+        """Longest productivity streak, optionally limited to a date range"""
+        with self._lock:
+            return self.streaks.longest_streak(start_date, end_date)
+    
+    def get_window_analysis(self, days, end_date=None):
+        """
+        Rolling-window view of the stored daily scores: the window summary,
+        the change from the previous window of the same length, a 7-day
+        moving average sampled once a week and the longest streak inside it.
+        """
+        with self._lock:
+            # Make sure today's live score is current before reading it
+            self.calculate_daily_score()
             
-            if date == expected_date and score >= min_score:
-                streak += 1
-            else:
-                break
-        
-        return streak
+            comparison = self.rollups.compare(days, end_date)
+            window = comparison['current']
+            return {
+                'window': window,
+                'previous': comparison['previous'],
+                'change': comparison['change'],
+                'moving_average': self.rollups.moving_average(7, days, window['end_date'], step=7),
+                'longest_streak': self.get_longest_streak(window['start_date'], window['end_date'])
+            }
     
     def get_weekly_analysis(self):
         """Get analysis for the past week"""
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=6)  # 7 days including today
         
-        dates = []
+        # One pass over the week's activity scores every day and totals distractions
+        week = self.aggregate_range(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        
+        dates = week['dates']
         scores = []
         productive_times = []
         unproductive_times = []
         
-        # Get data for each day in the week
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            dates.append(date_str)
-            
-            # Calculate score if not already calculated
-            if date_str not in self.scores:
-                self.calculate_daily_score(date_str)
-            
-            # Add data if available
-            if date_str in self.scores:
-                data = self.scores[date_str]
-                scores.append(data['score'])
-                productive_times.append(data['productive_time'] / 3600)  # Convert to hours
-                unproductive_times.append(data['unproductive_time'] / 3600)  # Convert to hours
-            else:
-                scores.append(0)
-                productive_times.append(0)
-                unproductive_times.append(0)
-            
-            current_date += timedelta(days=1)
+        for date_str in dates:
+            data = self.scores[date_str]
+            scores.append(data['score'])
+            productive_times.append(data['productive_time'] / 3600)  # Convert to hours
+            unproductive_times.append(data['unproductive_time'] / 3600)  # Convert to hours
         
         # Most productive day
         if scores:
@@ -182,7 +341,7 @@ class FocusScore:
             most_productive_day = None
         
         # Calculate improvement suggestions
-        suggestions = self._generate_suggestions()
+        suggestions = self._generate_suggestions(week)
         
         return {
             'dates': dates,
@@ -195,40 +354,20 @@ class FocusScore:
             'suggestions': suggestions
         }
     
-    def _generate_suggestions(self):
-        """Generate improvement suggestions based on data"""
+    def _generate_suggestions(self, week=None):
+        """
+        Generate improvement suggestions based on data.
+        week is an aggregate_range result for the past 7 days, computed if not given.
+        """
         suggestions = []
         
-        # Get recent days
-        now = datetime.now().date()
-        recent_days = [now - timedelta(days=i) for i in range(7)]
-        recent_day_strs = [d.strftime('%Y-%m-%d') for d in recent_days]
+        if week is None:
+            now = datetime.now().date()
+            week = self.aggregate_range((now - timedelta(days=6)).strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d'))
         
-        # Get data for recent days
-        recent_scores = []
-        unproductive_apps = {}
-        
-        for date_str in recent_day_strs:
-            if date_str in self.scores:
-                recent_scores.append(self.scores[date_str]['score'])
-            
-            # Get app usage for that day
-            try:
-                with open(config.ACTIVITY_LOG_FILE, 'r', newline='') as file:
-                    reader = csv.reader(file)
-                    next(reader)  # Skip header
-                    
-                    for row in reader:
-                        if row[0].startswith(date_str) and row[4] == 'False':
-                            app_name = row[1]
-                            duration = float(row[3])
-                            
-                            if app_name in unproductive_apps:
-                                unproductive_apps[app_name] += duration
-                            else:
-                                unproductive_apps[app_name] = duration
-            except Exception as e:
-                print(f"Error reading app data: {e}")
+        # Recent scores, newest first
+        recent_scores = [week['scores'][date_str] for date_str in reversed(week['dates'])]
+        unproductive_apps = week['unproductive_apps']
         
         # Suggestion 1: Productivity trend
         if recent_scores and len(recent_scores) >= 3:
@@ -0,0 +1,101 @@
+"""
+Wire protocol and client for the headless daemon's JSON API.
+
+Each request and response is one line of JSON. A request names a command
+and its arguments, plus the token from config.DAEMON_TOKEN_FILE:
+    {"command": "summary", "args": {"date": "2024-05-01"}, "token": "..."}
+and is answered with {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+This module imports nothing heavy, so the CLI client starts quickly.
+"""
+
+import json
+import os
+import secrets
+import socket
+import config
+
+def use_unix_socket():
+    """Check whether the API uses a Unix socket instead of TCP"""
+    return bool(config.DAEMON_SOCKET_FILE) and hasattr(socket, "AF_UNIX")
+
+def api_address():
+    """Describe where the API listens, for messages"""
+    if use_unix_socket():
+        return config.DAEMON_SOCKET_FILE
+    return f"{config.DAEMON_HOST}:{config.DAEMON_PORT}"
+
+def write_token():
+    """
+    Write a new random API token to config.DAEMON_TOKEN_FILE and return it.
+    The file is created readable and writable by the current user only, so
+    other local users cannot talk to the daemon.
+    """
+    path = config.DAEMON_TOKEN_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    token = secrets.token_hex(32)
+    temp_file = f"{path}.tmp"
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as file:
+        file.write(token)
+    os.replace(temp_file, path)
+    return token
+
+def read_token():
+    """Return the token of the running daemon; raises OSError if there is none"""
+    with open(config.DAEMON_TOKEN_FILE) as file:
+        return file.read().strip()
+
+def encode_message(message):
+    """Serialize one message as a JSON line"""
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+def decode_message(line):
+    """Parse one JSON line into a dict"""
+    message = json.loads(line.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError("message must be a JSON object")
+    return message
+
+class DaemonClient:
+    """Sends commands to a running daemon, one connection per request"""
+    
+    def __init__(self, timeout=None):
+        self.timeout = config.DAEMON_CLIENT_TIMEOUT if timeout is None else timeout
+    
+    def _connect(self):
+        """Open a connection to the daemon"""
+        if use_unix_socket():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(config.DAEMON_SOCKET_FILE)
+            except OSError:
+                sock.close()
+                raise
+            return sock
+        return socket.create_connection((config.DAEMON_HOST, config.DAEMON_PORT), timeout=self.timeout)
+    
+    def request(self, command, **args):
+        """
+        Run command on the daemon and return its result.
+        Raises RuntimeError if the daemon is unreachable or the command failed.
+        """
+        try:
+            token = read_token()
+            with self._connect() as sock:
+                sock.sendall(encode_message({"command": command, "args": args, "token": token}))
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+        except (ConnectionRefusedError, FileNotFoundError):
+            raise RuntimeError(f"No daemon is listening on {api_address()}; start one with `python main.py --headless`")
+        except OSError as e:
+            raise RuntimeError(f"Could not reach the daemon on {api_address()}: {e}")
+        
+        if not line:
+            raise RuntimeError("The daemon closed the connection without answering")
+        response = decode_message(line)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "unknown error"))
+        return response.get("result")
@@ -0,0 +1,45 @@
+"""
+Small thread-safe LRU cache used to memoize per-window lookups.
+"""
+
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry when full.
+    A maxsize of 0 disables caching entirely.
+    """
+    
+    MISSING = object()
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value for key, or LRUCache.MISSING"""
+        with self._lock:
+            value = self._data.get(key, self.MISSING)
+            if value is not self.MISSING:
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        """Store a value, evicting the oldest entry if the cache is full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
@@ -2,14 +2,23 @@
 Main entry point for the Productivity Tracker application.
 """
 
+import argparse
 import os
 import sys
-from app import main
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Productivity Tracker")
+    parser.add_argument("--headless", action="store_true",
+                        help="track without a window and serve the local API used by `python cli.py status`")
+    args = parser.parse_args()
+    
     # Make sure the data directory exists
     from config import DATA_DIRECTORY
     os.makedirs(DATA_DIRECTORY, exist_ok=True)
     
-    # Launch the application
-    main() 
\ No newline at end of file
+    # Launch the application; the daemon never imports Tk
+    if args.headless:
+        from daemon import main
+    else:
+        from app import main
+    main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Bulk reclassification of stored activity with the current category lists.
+"""
+
+from classifier import create_classifier
+from storage import get_storage
+from daily_aggregates import get_daily_aggregates
+from time_buckets import get_time_buckets
+from focus_score import score_record
+from score_cache import config_fingerprints, date_runs
+
+class PairClassifier:
+    """
+    Classifies each distinct (app, window title) pair once, however many
+    stored rows share it. Results are kept for the whole run instead of in
+    a bounded cache, since history holds far more pairs than a session.
+    """
+    
+    def __init__(self, classifier=None):
+        self.classifier = classifier or create_classifier(verbose=False, cache_size=0)
+        self.results = {}
+    
+    def __call__(self, app_name, window_title):
+        key = (app_name, window_title or "")
+        if key not in self.results:
+            self.results[key] = self.classifier.is_productive(app_name, window_title)
+        return self.results[key]
+
+def refresh_changed_days(storage, changed_dates):
+    """
+    Bring everything derived from the log in line after reclassification:
+    cached daily totals, time-of-day buckets and focus scores. Changed days
+    are rescored; every other score is restamped with the current config,
+    since its rows now agree with the current category lists.
+    Returns the dates whose score records were rewritten.
+    """
+    aggregates = get_daily_aggregates(storage)
+    for date in changed_dates:
+        aggregates.invalidate(date)
+    if changed_dates:
+        get_time_buckets(storage).rebuild()
+    
+    totals = {}
+    for start_date, end_date in date_runs(changed_dates):
+        totals.update(aggregates.get_range(start_date, end_date))
+    
+    scores = storage.load_scores()
+    fingerprints = config_fingerprints()
+    updated = []
+    for date, record in scores.items():
+        if date in totals:
+            scores[date] = score_record(totals[date], fingerprints)
+        elif any(record.get(key) != value for key, value in fingerprints.items()):
+            scores[date] = score_record(record, fingerprints)
+        else:
+            continue
+        updated.append(date)
+    if updated:
+        storage.save_scores(scores, updated)
+    return updated
+
+def reclassify_history(storage=None, classifier=None):
+    """
+    Re-run the classifier over every stored session and refresh the days
+    whose classifications changed. Returns a summary with the number of
+    rows, distinct (app, title) pairs and changed rows, the changed dates
+    and the dates whose scores were rewritten.
+    """
+    storage = storage or get_storage()
+    classify = PairClassifier(classifier)
+    rows, changed_rows, changed_dates = storage.reclassify(classify)
+    rescored = refresh_changed_days(storage, changed_dates)
+    return {
+        'rows': rows,
+        'pairs': len(classify.results),
+        'changed_rows': changed_rows,
+        'changed_dates': changed_dates,
+        'rescored_dates': rescored
+    }
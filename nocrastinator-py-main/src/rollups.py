@@ -0,0 +1,271 @@
+"""
+Rolling-window analytics over the daily focus score records.
+"""
+
+import bisect
+from datetime import date as date_type
+from streaks import date_ordinal
+
+ROLLUP_FIELDS = ['score', 'total_time', 'productive_time', 'unproductive_time', 'neutral_time']
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+
+def ordinal_date(ordinal):
+    """Convert an ordinal back to 'YYYY-MM-DD'"""
+    return date_type.fromordinal(ordinal).strftime('%Y-%m-%d')
+
+class ScoreTree:
+    """
+    Persistent segment tree over the rank of each day's score.
+    Version i holds the scores of days 0..i-1, so subtracting two versions
+    gives the multiset of scores in any window and the k-th smallest is
+    found in O(log n) without sorting the window.
+    """
+    
+    def __init__(self, values):
+        self.values = values  # Sorted distinct scores the tree can hold
+        self.size = max(len(values), 1)
+        # Node 0 is the shared empty tree whose children point back to itself
+        self.left = [0]
+        self.right = [0]
+        self.count = [0]
+        self.roots = [0]
+    
+    def append(self, score):
+        """Add a version with one more day; score is None for days without data"""
+        root = self.roots[-1]
+        if score is not None:
+            root = self._insert(root, 0, self.size - 1, bisect.bisect_left(self.values, score))
+        self.roots.append(root)
+    
+    def _insert(self, node, low, high, position):
+        """Return a new root with one more value at position, sharing untouched nodes"""
+        new = len(self.count)
+        self.left.append(self.left[node])
+        self.right.append(self.right[node])
+        self.count.append(self.count[node] + 1)
+        if low < high:
+            middle = (low + high) // 2
+            if position <= middle:
+                self.left[new] = self._insert(self.left[node], low, middle, position)
+            else:
+                self.right[new] = self._insert(self.right[node], middle + 1, high, position)
+        return new
+    
+    def kth(self, first, last, k):
+        """k-th smallest (0-based) score among days first..last-1"""
+        old, new = self.roots[first], self.roots[last]
+        low, high = 0, self.size - 1
+        while low < high:
+            middle = (low + high) // 2
+            in_left = self.count[self.left[new]] - self.count[self.left[old]]
+            if k < in_left:
+                old, new = self.left[old], self.left[new]
+                high = middle
+            else:
+                k -= in_left
+                old, new = self.right[old], self.right[new]
+                low = middle + 1
+        return self.values[low]
+    
+    def count_less(self, first, last, score):
+        """Number of scores below score among days first..last-1"""
+        position = bisect.bisect_left(self.values, score)
+        old, new = self.roots[first], self.roots[last]
+        low, high = 0, self.size - 1
+        less = 0
+        while low < high and position > low:
+            middle = (low + high) // 2
+            if position > middle:
+                less += self.count[self.left[new]] - self.count[self.left[old]]
+                old, new = self.right[old], self.right[new]
+                low = middle + 1
+            else:
+                old, new = self.left[old], self.left[new]
+                high = middle
+        if position > high:
+            less += self.count[new] - self.count[old]
+        return less
+
+class RollupEngine:
+    """
+    Answers rolling-window questions (averages, totals, percentiles,
+    period-over-period change) for any window of days.
+    Daily records are laid out on a dense day axis with prefix sums, so
+    window sums are O(1). Percentiles come from a ScoreTree over every
+    day but the newest, which is merged in at query time; this way the
+    live score for today can change without rebuilding the tree.
+    Days without a stored record are left out of averages and percentiles.
+    """
+    
+    def __init__(self):
+        self.records = {}  # ordinal -> score record
+        self.base = None  # Ordinal of day index 0
+        self.prefix = {}  # field -> prefix sums over the day axis
+        self.counts = []  # Prefix count of days with a record
+        self.tree = None
+        self.dirty = True
+    
+    def rebuild(self, scores):
+        """Rebuild from a {date: score record} dict"""
+        self.records = {date_ordinal(date): record for date, record in scores.items()}
+        self.dirty = True
+    
+    def update(self, date_str, record):
+        """Record a new or changed score record for one date"""
+        ordinal = date_ordinal(date_str)
+        self.records[ordinal] = record
+        if self.dirty:
+            return
+        
+        last = self.base + len(self.counts) - 2
+        if ordinal == last:
+            # The newest day is outside the tree; only its prefix entries move
+            self._set_last(record)
+        elif ordinal > last and self._tree_holds(last):
+            # Finalize the previous newest day in the tree and pad any gap
+            self.tree.append(self._tree_score(last))
+            for _ in range(last + 1, ordinal):
+                self.tree.append(None)
+                self._append_day(None)
+            self._append_day(record)
+        else:
+            # Past days changed, or the finalized score is new to the tree
+            self.dirty = True
+    
+    def _tree_score(self, ordinal):
+        """Score of a day, or None if it has no record"""
+        record = self.records.get(ordinal)
+        return None if record is None else record['score']
+    
+    def _tree_holds(self, ordinal):
+        """Check the tree's value domain contains the score of a finalized day"""
+        score = self._tree_score(ordinal)
+        if score is None:
+            return True
+        position = bisect.bisect_left(self.tree.values, score)
+        return position < len(self.tree.values) and self.tree.values[position] == score
+    
+    def _append_day(self, record):
+        """Extend the prefix sums by one day"""
+        for field in ROLLUP_FIELDS:
+            sums = self.prefix[field]
+            sums.append(sums[-1] + (record[field] if record else 0))
+        self.counts.append(self.counts[-1] + (1 if record else 0))
+    
+    def _set_last(self, record):
+        """Replace the newest day's contribution to the prefix sums"""
+        for field in ROLLUP_FIELDS:
+            sums = self.prefix[field]
+            sums[-1] = sums[-2] + record[field]
+        self.counts[-1] = self.counts[-2] + 1
+    
+    def _build(self):
+        """Lay the records out on the day axis and build the prefix sums and tree"""
+        self.dirty = False
+        self.prefix = {field: [0] for field in ROLLUP_FIELDS}
+        self.counts = [0]
+        if not self.records:
+            self.base = date_type.today().toordinal()
+            self.tree = ScoreTree([])
+            self._append_day(None)
+            return
+        
+        self.base = min(self.records)
+        last = max(self.records)
+        finalized = [record['score'] for ordinal, record in self.records.items() if ordinal != last]
+        self.tree = ScoreTree(sorted(set(finalized)))
+        for ordinal in range(self.base, last + 1):
+            record = self.records.get(ordinal)
+            self._append_day(record)
+            if ordinal != last:
+                self.tree.append(None if record is None else record['score'])
+    
+    def _clip(self, start, end):
+        """Convert an ordinal window to day indexes [first, last) on the axis"""
+        days = len(self.counts) - 1
+        first = min(max(start - self.base, 0), days)
+        last = min(max(end - self.base + 1, 0), days)
+        return first, max(first, last)
+    
+    def _window_sum(self, field, first, last):
+        sums = self.prefix[field]
+        return sums[last] - sums[first]
+    
+    def _kth(self, first, last, k):
+        """k-th smallest score among days first..last-1, merging the newest day"""
+        newest = len(self.counts) - 2
+        if last <= newest or self.counts[last] == self.counts[last - 1]:
+            return self.tree.kth(first, min(last, newest), k)
+        
+        # The newest day has a record; merge its score into the tree's answer
+        score = self.records[self.base + newest]['score']
+        less = self.tree.count_less(first, newest, score) if first < newest else 0
+        if k < less:
+            return self.tree.kth(first, newest, k)
+        elif k == less:
+            return score
+        return self.tree.kth(first, newest, k - 1)
+    
+    def percentile(self, percent, first, last):
+        """Linearly interpolated score percentile over days first..last-1"""
+        n = self.counts[last] - self.counts[first]
+        if n == 0:
+            return None
+        position = percent / 100 * (n - 1)
+        lower = int(position)
+        low_value = self._kth(first, last, lower)
+        if lower == position:
+            return low_value
+        high_value = self._kth(first, last, lower + 1)
+        return low_value + (high_value - low_value) * (position - lower)
+    
+    def window(self, days, end_date=None, percentiles=DEFAULT_PERCENTILES):
+        """Summary of the days-long window ending on end_date (default: today)"""
+        if self.dirty:
+            self._build()
+        end = date_type.today().toordinal() if end_date is None else date_ordinal(end_date)
+        start = end - days + 1
+        first, last = self._clip(start, end)
+        
+        with_data = self.counts[last] - self.counts[first]
+        summary = {
+            'start_date': ordinal_date(start),
+            'end_date': ordinal_date(end),
+            'days': days,
+            'days_with_data': with_data,
+            'average_score': self._window_sum('score', first, last) / with_data if with_data else 0,
+            'percentiles': {percent: self.percentile(percent, first, last) for percent in percentiles}
+        }
+        for field in ROLLUP_FIELDS[1:]:
+            summary[field] = self._window_sum(field, first, last)
+        return summary
+    
+    def compare(self, days, end_date=None):
+        """Compare a window with the window of the same length just before it"""
+        current = self.window(days, end_date)
+        previous_end = date_ordinal(current['start_date']) - 1
+        previous = self.window(days, ordinal_date(previous_end))
+        
+        change = {}
+        for field in ['average_score'] + ROLLUP_FIELDS[1:]:
+            change[field] = current[field] - previous[field]
+        return {'current': current, 'previous': previous, 'change': change}
+    
+    def moving_average(self, days, span, end_date=None, step=1):
+        """
+        The days-long moving average score for every step-th day of the span
+        ending on end_date. Returns (date, average or None) pairs, oldest first.
+        """
+        if self.dirty:
+            self._build()
+        end = date_type.today().toordinal() if end_date is None else date_ordinal(end_date)
+        
+        points = []
+        for ordinal in range(end - span + 1, end + 1):
+            if (end - ordinal) % step:
+                continue
+            first, last = self._clip(ordinal - days + 1, ordinal)
+            with_data = self.counts[last] - self.counts[first]
+            average = self._window_sum('score', first, last) / with_data if with_data else None
+            points.append((ordinal_date(ordinal), average))
+        return points
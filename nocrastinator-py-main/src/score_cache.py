@@ -0,0 +1,117 @@
+"""
+Config fingerprints for cached focus scores and background refresh of stale days.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+import config
+from website_extractor import KNOWN_SITES
+from daily_aggregates import get_daily_aggregates
+from time_buckets import get_time_buckets
+
+def fingerprint(values):
+    """Short stable hash of JSON-serializable settings"""
+    data = json.dumps(values, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+def weights_fingerprint():
+    """Fingerprint of the settings that turn daily totals into a score"""
+    return fingerprint([config.PRODUCTIVE_TIME_WEIGHT, config.UNPRODUCTIVE_TIME_WEIGHT])
+
+def categories_fingerprint():
+    """Fingerprint of the settings that decide whether a session is productive"""
+    return fingerprint({
+        'browsers': sorted(browser.lower() for browser in config.BROWSERS),
+        'productive_apps': sorted(app.lower() for app in config.PRODUCTIVE_APPS),
+        'unproductive_apps': sorted(app.lower() for app in config.UNPRODUCTIVE_APPS),
+        'productive_websites': sorted(config.PRODUCTIVE_WEBSITES),
+        'unproductive_websites': sorted(config.UNPRODUCTIVE_WEBSITES),
+        'known_sites': list(KNOWN_SITES.items())  # Order matters here: first match wins
+    })
+
+def config_fingerprints():
+    """Fingerprints stamped on every score record"""
+    return {'weights_fp': weights_fingerprint(), 'categories_fp': categories_fingerprint()}
+
+def date_runs(dates):
+    """Group dates into (start, end) runs of consecutive days"""
+    runs = []
+    for date in sorted(dates):
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+        if runs and runs[-1][1] == day - timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')) for start, end in runs]
+
+class ScoreRefresher:
+    """
+    Brings stored activity in line with changed category lists. Every
+    logged session is classified again with the current config and
+    rewritten where its classification changed, and the cached daily totals
+    and time buckets are moved along, so summaries, the heatmap and scores
+    all see the same classifications. The work runs on a daemon thread;
+    the owner collects the totals of the days that changed with
+    take_results() and rescores them on its own thread.
+    """
+    
+    def __init__(self, storage):
+        self.storage = storage
+        self.results = None
+        self.thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the refresh unless it is already running"""
+        with self._lock:
+            if self.thread is not None:
+                return
+            self.results = None
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def busy(self):
+        """Check whether the refresh is still running"""
+        with self._lock:
+            return self.thread is not None
+    
+    def take_results(self):
+        """
+        Return and forget the {date: totals} of the days whose sessions
+        changed, once the refresh has finished; None before that, after a
+        failure or if they were already taken.
+        """
+        with self._lock:
+            results, self.results = self.results, None
+            return results
+    
+    def _run(self):
+        """Worker: reclassify the log, then update the derived data"""
+        from reclassify import PairClassifier
+        
+        aggregates = get_daily_aggregates(self.storage)
+        time_buckets = get_time_buckets(self.storage)
+        changes = []
+        results = None
+        try:
+            token = aggregates.begin_reclassify()
+            classify = PairClassifier()
+            rows, changed, changed_dates = self.storage.reclassify(
+                classify, lambda record, is_productive: changes.append((record, is_productive))
+            )
+            aggregates.reclassified(token, changes)
+            time_buckets.reclassified(changes)
+            time_buckets.save()
+            
+            results = {}
+            for start_date, end_date in date_runs(changed_dates):
+                results.update(aggregates.get_range(start_date, end_date))
+            print(f"Reclassified {changed} of {rows} activity rows for the current categories")
+        except Exception as e:
+            print(f"Error refreshing activity for the current categories: {e}")
+        
+        with self._lock:
+            self.results = results
+            self.thread = None
@@ -0,0 +1,275 @@
+"""
+SQLite storage backend for activity history and focus scores.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+import config
+from activity_writer import ActivityLogWriter, FSYNC_BATCH
+from storage import ActivityStorage, ActivityRecord, JsonScoreFile, parse_productive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    date TEXT NOT NULL,
+    app_name TEXT NOT NULL,
+    window_title TEXT,
+    duration REAL NOT NULL,
+    is_productive INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_activity_timestamp ON activity(timestamp);
+CREATE INDEX IF NOT EXISTS idx_activity_date ON activity(date);
+CREATE INDEX IF NOT EXISTS idx_activity_app ON activity(app_name);
+
+CREATE TABLE IF NOT EXISTS focus_scores (
+    date TEXT PRIMARY KEY,
+    score REAL NOT NULL,
+    record TEXT NOT NULL
+);
+"""
+
+INSERT_ACTIVITY = (
+    "INSERT INTO activity (timestamp, date, app_name, window_title, duration, is_productive) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+UPSERT_SCORE = (
+    "INSERT INTO focus_scores (date, score, record) VALUES (?, ?, ?) "
+    "ON CONFLICT(date) DO UPDATE SET score = excluded.score, record = excluded.record"
+)
+
+def connect(database_file, read_only=False):
+    """Open a connection to the database in WAL mode, or a read-only one"""
+    if read_only:
+        return sqlite3.connect(f"file:{database_file}?mode=ro", uri=True, check_same_thread=False)
+    connection = sqlite3.connect(database_file, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+def activity_params(timestamp, app_name, window_title, duration, is_productive):
+    """Convert one session into INSERT_ACTIVITY parameters"""
+    productive = None if is_productive is None else int(is_productive)
+    return (timestamp, timestamp[:10], app_name, window_title, duration, productive)
+
+class SqliteActivityWriter(ActivityLogWriter):
+    """Background writer that group-commits activity rows in one transaction"""
+    
+    def _open(self):
+        self.connection = connect(self.path)
+        # In WAL mode NORMAL only syncs at checkpoints; FULL syncs every commit
+        synchronous = "FULL" if self.fsync_policy == FSYNC_BATCH else "NORMAL"
+        self.connection.execute(f"PRAGMA synchronous={synchronous}")
+    
+    def _write_rows(self, batch):
+        try:
+            with self.connection:
+                self.connection.executemany(INSERT_ACTIVITY, batch)
+        except (ValueError, sqlite3.InterfaceError):
+            # The batch was rolled back; keep every row that can be stored
+            with self.connection:
+                for row in batch:
+                    try:
+                        self.connection.execute(INSERT_ACTIVITY, row)
+                    except (ValueError, sqlite3.InterfaceError) as e:
+                        print(f"Error logging activity for {row[2]}: {e}")
+    
+    def _sync(self):
+        # Commits are made durable by the synchronous pragma
+        pass
+    
+    def _close(self):
+        self.connection.close()
+
+class SqliteStorage(ActivityStorage):
+    """
+    Activity history and focus scores in one SQLite database.
+    WAL mode lets the UI and analysis read while the tracker writes, and
+    indexes on timestamp, date and app keep queries off full scans.
+    """
+    
+    name = "sqlite"
+    
+    def __init__(self, database_file=None, read_only=False):
+        self.database_file = database_file or config.SQLITE_DATABASE_FILE
+        self.read_only = read_only
+        
+        self._local = threading.local()
+        self._connections = {}  # Thread -> its reader connection
+        self._connections_lock = threading.Lock()
+        self._generation = 0  # Bumped by close() so live threads reconnect
+        
+        if not read_only:
+            os.makedirs(os.path.dirname(self.database_file) or ".", exist_ok=True)
+            self._connection().executescript(SCHEMA)
+        self.writer = SqliteActivityWriter(self.database_file)
+    
+    def _connection(self):
+        """Return this thread's reader connection, replacing one from before close()"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.generation != self._generation:
+            connection.close()
+            connection = None
+        if connection is None:
+            connection = connect(self.database_file, self.read_only)
+            self._local.connection = connection
+            self._local.generation = self._generation
+            with self._connections_lock:
+                self._connections[threading.current_thread()] = connection
+                self._close_exited()
+        return connection
+    
+    def _close_exited(self):
+        """Close connections left by threads that have exited; caller holds the lock"""
+        for thread in [thread for thread in self._connections if not thread.is_alive()]:
+            self._connections.pop(thread).close()
+    
+    def append_activity(self, timestamp, app_name, window_title, duration, is_productive, end_time=None):
+        self.writer.write(activity_params(timestamp, app_name, window_title, duration, is_productive))
+    
+    def iter_day(self, date):
+        return self._iter_query(
+            "SELECT timestamp, app_name, window_title, duration, is_productive "
+            "FROM activity WHERE date = ? ORDER BY id",
+            (date,)
+        )
+    
+    def iter_range(self, start_date, end_date):
+        return self._iter_query(
+            "SELECT timestamp, app_name, window_title, duration, is_productive "
+            "FROM activity WHERE date BETWEEN ? AND ? ORDER BY id",
+            (start_date, end_date)
+        )
+    
+    def _iter_query(self, query, params):
+        """Yield ActivityRecords for a query over the activity table"""
+        for timestamp, app_name, window_title, duration, productive in self._connection().execute(query, params):
+            is_productive = None if productive is None else bool(productive)
+            yield ActivityRecord(timestamp, app_name, window_title, duration, is_productive)
+    
+    def date_span(self):
+        first, last = self._connection().execute("SELECT MIN(date), MAX(date) FROM activity").fetchone()
+        return (first, last) if first else None
+    
+    def reclassify(self, classify, on_change=None):
+        self.flush()
+        connection = self._connection()
+        rows = connection.execute("SELECT COUNT(*) FROM activity").fetchone()[0]
+        pairs = connection.execute("SELECT DISTINCT app_name, window_title FROM activity").fetchall()
+        
+        changed = 0
+        changed_dates = set()
+        where = "app_name = ? AND window_title IS ? AND is_productive IS NOT ?"
+        # One transaction, so readers see either the old or the new classifications
+        with connection:
+            for app_name, window_title in pairs:
+                is_productive = classify(app_name, window_title)
+                params = (app_name, window_title, None if is_productive is None else int(is_productive))
+                records = list(self._iter_query(
+                    "SELECT timestamp, app_name, window_title, duration, is_productive "
+                    f"FROM activity WHERE {where} ORDER BY id",
+                    params
+                ))
+                if records:
+                    changed += connection.execute(
+                        f"UPDATE activity SET is_productive = ? WHERE {where}", params[2:] + params
+                    ).rowcount
+                    changed_dates.update(record.timestamp[:10] for record in records)
+                    if on_change is not None:
+                        for record in records:
+                            on_change(record, is_productive)
+        return rows, changed, sorted(changed_dates)
+    
+    def load_scores(self):
+        """Load focus scores from the database"""
+        try:
+            rows = self._connection().execute("SELECT date, record FROM focus_scores")
+            return {date: json.loads(record) for date, record in rows}
+        except Exception as e:
+            print(f"Error loading scores: {e}")
+            return {}
+    
+    def save_scores(self, scores, dates=None):
+        """Upsert the changed score records (all of them if dates is None)"""
+        if dates is None:
+            dates = list(scores)
+        try:
+            connection = self._connection()
+            with connection:
+                connection.executemany(UPSERT_SCORE, [
+                    (date, scores[date]['score'], json.dumps(scores[date]))
+                    for date in dates if date in scores
+                ])
+        except Exception as e:
+            print(f"Error saving scores: {e}")
+    
+    def flush(self):
+        self.writer.flush()
+    
+    def close(self):
+        """
+        Stop the writer and close this thread's connection and those of
+        exited threads. Other live threads may be mid-query, so each of
+        them closes its own connection on its next query.
+        """
+        self.writer.close()
+        with self._connections_lock:
+            self._generation += 1
+            self._close_exited()
+            connection = self._connections.pop(threading.current_thread(), None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+    
+    def open(self):
+        self.writer.open()
+    
+    def data_files(self):
+        return [self.database_file, f"{self.database_file}-wal", f"{self.database_file}-shm"]
+
+def import_legacy_data(database_file=None, log_file=None, scores_file=None, batch_size=10000):
+    """
+    One-shot import of an existing activity_log.csv and focus_scores.json.
+    Refuses to run if the database already holds activity.
+    Returns (activity rows imported, score records imported).
+    """
+    database_file = database_file or config.SQLITE_DATABASE_FILE
+    log_file = log_file or config.ACTIVITY_LOG_FILE
+    scores_file = scores_file or config.FOCUS_SCORE_FILE
+    
+    os.makedirs(os.path.dirname(database_file) or ".", exist_ok=True)
+    connection = connect(database_file)
+    try:
+        connection.executescript(SCHEMA)
+        if connection.execute("SELECT EXISTS (SELECT 1 FROM activity)").fetchone()[0]:
+            raise RuntimeError(f"{database_file} already contains activity; refusing to import twice")
+        
+        rows_imported = 0
+        with connection:
+            if os.path.exists(log_file):
+                with open(log_file, 'r', newline='') as file:
+                    reader = csv.reader(file)
+                    next(reader, None)  # Skip header
+                    
+                    batch = []
+                    for row in reader:
+                        batch.append(activity_params(row[0], row[1], row[2], float(row[3]), parse_productive(row[4])))
+                        if len(batch) >= batch_size:
+                            connection.executemany(INSERT_ACTIVITY, batch)
+                            rows_imported += len(batch)
+                            batch = []
+                    connection.executemany(INSERT_ACTIVITY, batch)
+                    rows_imported += len(batch)
+            
+            scores = JsonScoreFile(scores_file).load()
+            if scores:
+                connection.executemany(UPSERT_SCORE, [
+                    (date, record['score'], json.dumps(record)) for date, record in scores.items()
+                ])
+        
+        return rows_imported, len(scores)
+    finally:
+        connection.close()
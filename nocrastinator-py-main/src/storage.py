@@ -0,0 +1,352 @@
+"""
+Storage backends for activity history and focus scores.
+"""
+
+import csv
+import json
+import os
+import threading
+from collections import namedtuple
+import config
+from activity_index import ActivityLogIndex, get_activity_index
+from activity_writer import ActivityLogWriter
+
+# One logged activity session; timestamp is 'YYYY-MM-DD HH:MM:SS' when it ended
+ActivityRecord = namedtuple(
+    'ActivityRecord',
+    ['timestamp', 'app_name', 'window_title', 'duration', 'is_productive']
+)
+
+def parse_productive(value):
+    """Convert the is_productive column of the activity log back to True/False/None"""
+    if value == 'True':
+        return True
+    elif value == 'False':
+        return False
+    return None
+
+def record_from_row(row):
+    """Build an ActivityRecord from a CSV row"""
+    return ActivityRecord(row[0], row[1], row[2], float(row[3]), parse_productive(row[4]))
+
+class ActivityStorage:
+    """
+    Interface shared by the storage backends.
+    Appends must never block on disk I/O; reads return ActivityRecord rows
+    in the order they were logged.
+    """
+    
+    name = "base"
+    
+    def append_activity(self, timestamp, app_name, window_title, duration, is_productive, end_time=None):
+        """
+        Queue one activity session for writing. end_time is the epoch time
+        the session ended, when known; timestamp is the same moment as local
+        time, which drops sub-seconds and is ambiguous in the hour repeated
+        when DST ends.
+        """
+        raise NotImplementedError
+    
+    def iter_day(self, date):
+        """Yield the ActivityRecords logged on date ('YYYY-MM-DD')"""
+        raise NotImplementedError
+    
+    def iter_range(self, start_date, end_date):
+        """Yield the ActivityRecords logged from start_date to end_date inclusive"""
+        raise NotImplementedError
+    
+    def date_span(self):
+        """Return (first date, last date) with logged activity, or None if there is none"""
+        first = last = None
+        for record in self.iter_range('1970-01-01', '9999-12-31'):
+            date = record.timestamp[:10]
+            if first is None or date < first:
+                first = date
+            if last is None or date > last:
+                last = date
+        return (first, last) if first else None
+    
+    def reclassify(self, classify, on_change=None):
+        """
+        Rewrite every stored session's classification as classify(app_name,
+        window_title), atomically. on_change(record, is_productive) is called
+        for each changed session, with the record as stored before the
+        rewrite, ahead of the commit. Returns (rows, rows changed, sorted
+        dates with a changed row).
+        """
+        raise NotImplementedError
+    
+    def load_scores(self):
+        """Return every stored daily focus score record keyed by date"""
+        raise NotImplementedError
+    
+    def save_scores(self, scores, dates=None):
+        """Persist score records; dates optionally lists the ones that changed"""
+        raise NotImplementedError
+    
+    def flush(self):
+        """Block until queued activity has been written"""
+        pass
+    
+    def close(self):
+        """
+        Commit queued activity and release file handles. Reads still work;
+        activity appended afterwards is dropped until open() is called.
+        """
+        pass
+    
+    def open(self):
+        """Accept appended activity again after close()"""
+        pass
+    
+    def data_files(self):
+        """Return the files holding this backend's data"""
+        return []
+    
+    def reset(self):
+        """Close the backend and delete all of its data"""
+        self.close()
+        for file in self.data_files():
+            if os.path.exists(file):
+                os.remove(file)
+
+class JsonScoreFile:
+    """
+    Daily focus score records kept as a focus_scores.json snapshot plus an
+    append-only journal. Each save appends one compact line per changed
+    date, so its cost does not grow with history; the journal is folded
+    into the snapshot with an atomic rename once it gets long.
+    
+    Every compaction bumps a generation number stored in the snapshot and
+    on each journal line. A journal left behind by a crash mid-compaction
+    belongs to an older generation and is skipped, since its entries may
+    be older than the records in the new snapshot.
+    """
+    
+    GENERATION_KEY = "_generation"  # Dates never start with an underscore
+    
+    def __init__(self, path=None, journal_path=None):
+        self.path = path or config.FOCUS_SCORE_FILE
+        if journal_path is None:
+            journal_path = config.FOCUS_SCORE_JOURNAL_FILE if self.path == config.FOCUS_SCORE_FILE else f"{self.path}.journal"
+        self.journal_path = journal_path
+        self.journal_entries = 0
+        self.generation = 0
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Load focus scores: the snapshot with the journal replayed over it"""
+        scores = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as file:
+                    scores = json.load(file)
+            except Exception as e:
+                print(f"Error loading scores: {e}")
+        generation = scores.pop(self.GENERATION_KEY, 0)
+        
+        entries = 0
+        if os.path.exists(self.journal_path):
+            try:
+                with open(self.journal_path, 'r+b') as file:
+                    good_size = 0
+                    for line in file:
+                        try:
+                            if not line.endswith(b'\n'):
+                                raise ValueError("incomplete entry")
+                            entry = json.loads(line)
+                        except ValueError:
+                            # Torn write from a crash; drop it so later appends stay readable
+                            file.truncate(good_size)
+                            break
+                        if entry.get('generation', 0) >= generation:
+                            scores[entry['date']] = entry['record']
+                        good_size += len(line)
+                        entries += 1
+            except Exception as e:
+                print(f"Error loading score journal: {e}")
+        # Stale entries count too, so they are compacted away
+        self.journal_entries = entries
+        self.generation = generation
+        return scores
+    
+    def save(self, scores, dates=None):
+        """Journal the records for dates, or write a full snapshot if dates is None"""
+        try:
+            with self._lock:
+                if dates is None or self.journal_entries + len(dates) > config.FOCUS_SCORE_COMPACT_AFTER:
+                    self._compact(scores)
+                    return
+                
+                lines = [
+                    json.dumps({'generation': self.generation, 'date': date, 'record': scores[date]},
+                               separators=(',', ':')) + '\n'
+                    for date in dates if date in scores
+                ]
+                if not lines:
+                    return
+                with open(self.journal_path, 'a') as file:
+                    file.write(''.join(lines))
+                self.journal_entries += len(lines)
+        except Exception as e:
+            print(f"Error saving scores: {e}")
+    
+    def compact(self, scores):
+        """Fold the journal into a fresh snapshot of scores"""
+        with self._lock:
+            self._compact(scores)
+    
+    def _compact(self, scores):
+        """Write the snapshot to a temp file, rename it into place and empty the journal"""
+        generation = self.generation + 1
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, 'w') as file:
+            json.dump({**scores, self.GENERATION_KEY: generation}, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.path)
+        self.generation = generation
+        
+        # A journal that survives a crash here is from the previous
+        # generation and is skipped on load
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_entries = 0
+    
+    def data_files(self):
+        """Return the snapshot and journal files"""
+        return [self.path, self.journal_path]
+
+class CsvStorage(ActivityStorage):
+    """
+    The original storage: an append-only activity_log.csv with a per-date
+    offset index, and focus scores in a JSON file.
+    """
+    
+    name = "csv"
+    
+    def __init__(self, log_file=None, scores_file=None, read_only=False):
+        self.log_file = log_file or config.ACTIVITY_LOG_FILE
+        self.score_file = JsonScoreFile(scores_file)
+        
+        if read_only:
+            # A private index that is never saved, so readers in other
+            # processes do not race the owner over the sidecar
+            index_file = config.ACTIVITY_INDEX_FILE if self.log_file == config.ACTIVITY_LOG_FILE else None
+            self.index = ActivityLogIndex(self.log_file, index_file, persist=False)
+        else:
+            os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+            self.init_activity_log()
+            self.index = get_activity_index(self.log_file)
+        
+        # Rows are appended by a background writer so tracking never waits on disk,
+        # and the per-date offset index is extended after every commit
+        self.writer = ActivityLogWriter(self.log_file, on_commit=self.index.refresh)
+    
+    def init_activity_log(self):
+        """Initialize activity log file with headers if it doesn't exist"""
+        if not os.path.exists(self.log_file):
+            with open(self.log_file, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow([
+                    'timestamp',
+                    'app_name',
+                    'window_title',
+                    'duration_seconds',
+                    'is_productive'
+                ])
+    
+    def append_activity(self, timestamp, app_name, window_title, duration, is_productive, end_time=None):
+        self.writer.write([timestamp, app_name, window_title, duration, str(is_productive)])
+    
+    def iter_day(self, date):
+        for row in self.index.iter_rows(date):
+            yield record_from_row(row)
+    
+    def iter_range(self, start_date, end_date):
+        for row in self.index.iter_rows_between(start_date, end_date):
+            yield record_from_row(row)
+    
+    def date_span(self):
+        return self.index.date_span()
+    
+    def reclassify(self, classify, on_change=None):
+        # The writer holds the log open, so it waits while the file is replaced
+        self.writer.pause()
+        try:
+            rows = changed = 0
+            changed_dates = set()
+            temp_file = f"{self.log_file}.tmp"
+            with open(self.log_file, 'r', newline='') as source, open(temp_file, 'w', newline='') as target:
+                reader = csv.reader(source)
+                writer = csv.writer(target)
+                for row in reader:
+                    if reader.line_num > 1 and len(row) >= 5:
+                        rows += 1
+                        is_productive = classify(row[1], row[2])
+                        if is_productive != parse_productive(row[4]):
+                            if on_change is not None:
+                                on_change(record_from_row(row), is_productive)
+                            row[4] = str(is_productive)
+                            changed += 1
+                            changed_dates.add(row[0][:10])
+                    writer.writerow(row)
+                target.flush()
+                os.fsync(target.fileno())
+            
+            if changed:
+                os.replace(temp_file, self.log_file)
+                self.index.rebuild()
+            else:
+                os.remove(temp_file)
+        finally:
+            self.writer.resume()
+        return rows, changed, sorted(changed_dates)
+    
+    def load_scores(self):
+        return self.score_file.load()
+    
+    def save_scores(self, scores, dates=None):
+        self.score_file.save(scores, dates)
+    
+    def flush(self):
+        self.writer.flush()
+    
+    def close(self):
+        self.writer.close()
+        self.index.save()
+    
+    def open(self):
+        self.writer.open()
+    
+    def data_files(self):
+        return [self.log_file, self.index.index_file] + self.score_file.data_files()
+
+def create_storage(backend=None, read_only=False):
+    """
+    Create the storage backend named by backend (default: config.STORAGE_BACKEND).
+    A read_only instance only queries existing data: it creates, repairs
+    and saves nothing, so it is safe to open alongside the owning process.
+    """
+    backend = backend or config.STORAGE_BACKEND
+    if backend == CsvStorage.name:
+        return CsvStorage(read_only=read_only)
+    elif backend == "sqlite":
+        from sqlite_storage import SqliteStorage
+        return SqliteStorage(read_only=read_only)
+    elif backend == "binary":
+        from binary_log import BinaryStorage
+        return BinaryStorage(read_only=read_only)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+def get_storage(backend=None):
+    """Return the shared storage instance for a backend"""
+    backend = backend or config.STORAGE_BACKEND
+    with _storages_lock:
+        storage = _storages.get(backend)
+        if storage is None:
+            storage = _storages[backend] = create_storage(backend)
+        return storage
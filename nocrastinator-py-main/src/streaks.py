@@ -0,0 +1,155 @@
+"""
+Incremental productivity streak tracking over daily focus scores.
+"""
+
+import bisect
+from datetime import datetime, date as date_type
+
+STREAK_MIN_SCORE = 50  # Minimum score to count as productive day
+
+def date_ordinal(date_str):
+    """Convert 'YYYY-MM-DD' to a proleptic Gregorian ordinal"""
+    return datetime.strptime(date_str, '%Y-%m-%d').date().toordinal()
+
+class StreakTracker:
+    """
+    Keeps the productive days as sorted runs of consecutive dates.
+    Score updates insert, extend, merge or split runs in place, so the
+    current streak is read from the last run without touching the score
+    history. A sparse table over run lengths answers the longest streak
+    between two dates in constant time after a rebuild.
+    """
+    
+    def __init__(self, min_score=STREAK_MIN_SCORE):
+        self.min_score = min_score
+        self.productive = set()  # Ordinals of productive days
+        self.starts = []  # Run start ordinals, sorted
+        self.ends = []  # Run end ordinals (inclusive), parallel to starts
+        self.latest = None  # Newest ordinal with any stored score
+        self._table = None  # Sparse table of run lengths, rebuilt lazily
+    
+    def rebuild(self, scores):
+        """Rebuild the runs from a {date: score record} dict"""
+        self.productive = set()
+        self.latest = None
+        for date_str, record in scores.items():
+            ordinal = date_ordinal(date_str)
+            if self.latest is None or ordinal > self.latest:
+                self.latest = ordinal
+            if record['score'] >= self.min_score:
+                self.productive.add(ordinal)
+        
+        self.starts = []
+        self.ends = []
+        for ordinal in sorted(self.productive):
+            if self.ends and self.ends[-1] == ordinal - 1:
+                self.ends[-1] = ordinal
+            else:
+                self.starts.append(ordinal)
+                self.ends.append(ordinal)
+        self._table = None
+    
+    def update(self, date_str, score):
+        """Record a new or changed score for one date"""
+        ordinal = date_ordinal(date_str)
+        if self.latest is None or ordinal > self.latest:
+            self.latest = ordinal
+        
+        productive = score >= self.min_score
+        if productive == (ordinal in self.productive):
+            return
+        if productive:
+            self._add_day(ordinal)
+        else:
+            self._remove_day(ordinal)
+        self._table = None
+    
+    def _add_day(self, ordinal):
+        """Mark a day productive, extending or merging neighbouring runs"""
+        self.productive.add(ordinal)
+        i = bisect.bisect_left(self.starts, ordinal)
+        joins_previous = i > 0 and self.ends[i - 1] == ordinal - 1
+        joins_next = i < len(self.starts) and self.starts[i] == ordinal + 1
+        
+        if joins_previous and joins_next:
+            self.ends[i - 1] = self.ends[i]
+            del self.starts[i]
+            del self.ends[i]
+        elif joins_previous:
+            self.ends[i - 1] = ordinal
+        elif joins_next:
+            self.starts[i] = ordinal
+        else:
+            self.starts.insert(i, ordinal)
+            self.ends.insert(i, ordinal)
+    
+    def _remove_day(self, ordinal):
+        """Mark a day unproductive, shrinking or splitting its run"""
+        self.productive.discard(ordinal)
+        i = bisect.bisect_right(self.starts, ordinal) - 1
+        start, end = self.starts[i], self.ends[i]
+        
+        if start == end:
+            del self.starts[i]
+            del self.ends[i]
+        elif ordinal == start:
+            self.starts[i] = ordinal + 1
+        elif ordinal == end:
+            self.ends[i] = ordinal - 1
+        else:
+            self.ends[i] = ordinal - 1
+            self.starts.insert(i + 1, ordinal + 1)
+            self.ends.insert(i + 1, end)
+    
+    def current_streak(self, today=None):
+        """Consecutive productive days ending today (0 if today is not productive)"""
+        today = (today or date_type.today()).toordinal()
+        if not self.ends or self.ends[-1] != today or self.latest != today:
+            return 0
+        return today - self.starts[-1] + 1
+    
+    def longest_streak(self, start_date=None, end_date=None):
+        """Longest run of productive days within the dates given (inclusive)"""
+        if not self.starts:
+            return 0
+        start = self.starts[0] if start_date is None else date_ordinal(start_date)
+        end = self.ends[-1] if end_date is None else date_ordinal(end_date)
+        if start > end:
+            return 0
+        
+        # Runs overlapping [start, end]: from the last run ending at or after
+        # start to the last run starting at or before end
+        first = bisect.bisect_left(self.ends, start)
+        last = bisect.bisect_right(self.starts, end) - 1
+        if first > last:
+            return 0
+        if first == last:
+            return min(self.ends[first], end) - max(self.starts[first], start) + 1
+        
+        # The outer runs may be clipped by the range; inner runs count in full
+        longest = max(
+            self.ends[first] - max(self.starts[first], start) + 1,
+            min(self.ends[last], end) - self.starts[last] + 1
+        )
+        if last - first > 1:
+            longest = max(longest, self._max_length(first + 1, last - 1))
+        return longest
+    
+    def _max_length(self, first, last):
+        """Longest full run among runs first..last (inclusive)"""
+        if self._table is None:
+            self._build_table()
+        level = (last - first + 1).bit_length() - 1
+        row = self._table[level]
+        return max(row[first], row[last - (1 << level) + 1])
+    
+    def _build_table(self):
+        """Build the sparse table: level k holds the max over 2**k runs"""
+        lengths = [end - start + 1 for start, end in zip(self.starts, self.ends)]
+        table = [lengths]
+        span = 1
+        while span * 2 <= len(lengths):
+            previous = table[-1]
+            table.append([max(previous[i], previous[i + span]) for i in range(len(lengths) - span * 2 + 1)])
+            span *= 2
+        self._table = table
@@ -0,0 +1,362 @@
+"""
+Time-of-day buckets of productive, unproductive and neutral seconds.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import config
+from storage import get_storage
+
+KINDS = ['productive', 'unproductive', 'neutral']
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+SHADES = " .:-=+*#%@"
+
+def kind_index(is_productive):
+    """Row of the bucket arrays that a classification is counted in"""
+    if is_productive is True:
+        return 0
+    elif is_productive is False:
+        return 1
+    return 2
+
+class TimeBucketStore:
+    """
+    Splits every logged session into fixed-size time-of-day buckets.
+    Each date keeps one array per classification, and running totals by
+    weekday are updated with every session, so a weekday-by-hour heatmap
+    is read from a 7 x buckets table however much history is stored.
+    The arrays are saved to a JSON sidecar and caught up from storage on
+    load, replaying only the rows logged after the last save.
+    
+    Like the focus score file, the sidecar is a snapshot plus a journal:
+    each save appends one line with just the days changed since the last
+    save, so saving from the tracking thread does not get slower as
+    history grows. The journal is folded into the snapshot on load once it
+    gets long, and lines from before the last compaction are skipped.
+    """
+    
+    FILE_VERSION = 1
+    
+    def __init__(self, storage=None, path=None, bucket_minutes=None):
+        self.storage = storage or get_storage()
+        self.path = path or config.TIME_BUCKET_FILE
+        self.journal_path = config.TIME_BUCKET_JOURNAL_FILE if self.path == config.TIME_BUCKET_FILE else f"{self.path}.journal"
+        self.bucket_minutes = bucket_minutes or config.TIME_BUCKET_MINUTES
+        if 1440 % self.bucket_minutes:
+            raise ValueError(f"Bucket size must divide a day evenly: {self.bucket_minutes} minutes")
+        self.bucket_seconds = self.bucket_minutes * 60
+        self.buckets_per_day = 1440 // self.bucket_minutes
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Keeps journal lines in save order
+        self._reset()
+    
+    def _reset(self):
+        """Forget all buckets"""
+        self.days = {}
+        self.weekday_totals = [self._empty_day() for _ in WEEKDAYS]
+        self.last_timestamp = None  # Newest session end covered, as 'YYYY-MM-DD HH:MM:SS'
+        self.at_last = 0  # Sessions ending exactly at last_timestamp that are covered
+        self.generation = 0  # Bumped by every compaction
+        self.journal_entries = 0
+        self.saved_at = time.monotonic()
+        self.dirty_days = set()  # Dates changed since the last save
+    
+    def _empty_day(self):
+        """Zeroed [productive, unproductive, neutral] bucket arrays for one day"""
+        return [[0.0] * self.buckets_per_day for _ in KINDS]
+    
+    def load(self):
+        """Load the sidecar and its journal, then replay storage rows they do not cover yet"""
+        with self._lock:
+            self._reset()
+            snapshot_loaded = False
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as file:
+                        data = json.load(file)
+                    if data.get('version') == self.FILE_VERSION and data.get('bucket_minutes') == self.bucket_minutes:
+                        self.days = data['days']
+                        self.last_timestamp = data['last_timestamp']
+                        self.at_last = data['at_last']
+                        self.generation = data.get('generation', 0)
+                        snapshot_loaded = True
+                except Exception as e:
+                    print(f"Error loading time buckets: {e}")
+                    self._reset()
+            # Without a usable snapshot the journal would cover only some days
+            if snapshot_loaded or not os.path.exists(self.path):
+                self._replay_journal()
+            for date, day in self.days.items():
+                self._add_day_to_weekday(date, day)
+            
+            start_date = self.last_timestamp[:10] if self.last_timestamp else '1970-01-01'
+            skip = self.at_last
+            try:
+                for record in self.storage.iter_range(start_date, '9999-12-31'):
+                    if self.last_timestamp:
+                        if record.timestamp < self.last_timestamp:
+                            continue
+                        if record.timestamp == self.last_timestamp and skip:
+                            skip -= 1
+                            continue
+                    end = datetime.strptime(record.timestamp, '%Y-%m-%d %H:%M:%S')
+                    self._add(end, record.duration, record.is_productive, record.timestamp)
+            except Exception as e:
+                print(f"Error catching up time buckets: {e}")
+        
+        if not snapshot_loaded or self.journal_entries > config.TIME_BUCKET_COMPACT_AFTER:
+            self.compact()
+    
+    def _replay_journal(self):
+        """Apply journaled days of the snapshot's generation; caller holds the lock"""
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, 'r+b') as file:
+                good_size = 0
+                for line in file:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError("incomplete entry")
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash; drop it so later appends stay readable
+                        file.truncate(good_size)
+                        break
+                    good_size += len(line)
+                    self.journal_entries += 1
+                    # Lines left behind by a crash mid-compaction are older than the snapshot
+                    if entry['generation'] != self.generation or entry['bucket_minutes'] != self.bucket_minutes:
+                        continue
+                    self.days.update(entry['days'])
+                    self.last_timestamp = entry['last_timestamp']
+                    self.at_last = entry['at_last']
+        except Exception as e:
+            print(f"Error loading time bucket journal: {e}")
+    
+    def _add_day_to_weekday(self, date, day):
+        """Fold one day's arrays into the weekday totals"""
+        totals = self.weekday_totals[datetime.strptime(date, '%Y-%m-%d').weekday()]
+        for kind in range(len(KINDS)):
+            row = totals[kind]
+            for bucket, seconds in enumerate(day[kind]):
+                if seconds:
+                    row[bucket] += seconds
+    
+    def add(self, end_time, duration, is_productive):
+        """Add a session that ended at end_time (epoch seconds)"""
+        # Sessions are stored with whole-second end times; bucket them the same way
+        end = datetime.fromtimestamp(math.floor(end_time))
+        with self._lock:
+            self._add(end, duration, is_productive, end.strftime('%Y-%m-%d %H:%M:%S'))
+        if time.monotonic() - self.saved_at >= config.TIME_BUCKET_SAVE_INTERVAL:
+            self.save()
+    
+    def _split(self, end, duration):
+        """Yield (date, weekday, bucket, seconds) for the buckets a session ending at end overlaps"""
+        cursor = end - timedelta(seconds=duration)
+        remaining = duration
+        
+        while remaining > 1e-9:
+            second_of_day = cursor.hour * 3600 + cursor.minute * 60 + cursor.second + cursor.microsecond / 1e6
+            bucket = min(int(second_of_day // self.bucket_seconds), self.buckets_per_day - 1)
+            portion = min(remaining, (bucket + 1) * self.bucket_seconds - second_of_day)
+            
+            yield cursor.strftime('%Y-%m-%d'), cursor.weekday(), bucket, portion
+            remaining -= portion
+            cursor += timedelta(seconds=portion)
+    
+    def _add(self, end, duration, is_productive, timestamp):
+        """Split a session across the buckets (and days) it overlaps"""
+        kind = kind_index(is_productive)
+        for date, weekday, bucket, portion in self._split(end, duration):
+            day = self.days.get(date)
+            if day is None:
+                day = self.days[date] = self._empty_day()
+            day[kind][bucket] += portion
+            self.weekday_totals[weekday][kind][bucket] += portion
+            self.dirty_days.add(date)
+        
+        if timestamp == self.last_timestamp:
+            self.at_last += 1
+        elif self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+            self.at_last = 1
+    
+    def reclassified(self, changes):
+        """
+        Move the time of reclassified sessions to their new classification.
+        changes lists (record as stored before, new is_productive).
+        """
+        with self._lock:
+            for record, is_productive in changes:
+                old, new = kind_index(record.is_productive), kind_index(is_productive)
+                end = datetime.strptime(record.timestamp, '%Y-%m-%d %H:%M:%S')
+                for date, weekday, bucket, portion in self._split(end, record.duration):
+                    day = self.days.get(date)
+                    if day is None:
+                        continue
+                    for arrays in (day, self.weekday_totals[weekday]):
+                        arrays[old][bucket] = max(0.0, arrays[old][bucket] - portion)
+                        arrays[new][bucket] += portion
+                    self.dirty_days.add(date)
+    
+    def save(self):
+        """Append the days changed since the last save to the journal"""
+        with self._save_lock:
+            with self._lock:
+                self.saved_at = time.monotonic()
+                if not self.dirty_days:
+                    return
+                line = json.dumps({
+                    'generation': self.generation,
+                    'bucket_minutes': self.bucket_minutes,
+                    'last_timestamp': self.last_timestamp,
+                    'at_last': self.at_last,
+                    'days': {date: self.days[date] for date in sorted(self.dirty_days)}
+                }, separators=(',', ':')) + '\n'
+                self.dirty_days = set()
+            try:
+                with open(self.journal_path, 'a') as file:
+                    file.write(line)
+                self.journal_entries += 1
+            except Exception as e:
+                print(f"Error saving time buckets: {e}")
+    
+    def compact(self):
+        """Write every day to a fresh snapshot (temp file plus atomic rename) and empty the journal"""
+        with self._save_lock:
+            with self._lock:
+                generation = self.generation + 1
+                data = json.dumps({
+                    'version': self.FILE_VERSION,
+                    'generation': generation,
+                    'bucket_minutes': self.bucket_minutes,
+                    'last_timestamp': self.last_timestamp,
+                    'at_last': self.at_last,
+                    'days': self.days
+                }, separators=(',', ':'))
+                self.saved_at = time.monotonic()
+                self.dirty_days = set()
+            try:
+                temp_file = f"{self.path}.tmp"
+                with open(temp_file, 'w') as file:
+                    file.write(data)
+                os.replace(temp_file, self.path)
+                self.generation = generation
+                
+                # A journal that survives a crash here is from the previous
+                # generation and is skipped on load
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                self.journal_entries = 0
+            except Exception as e:
+                print(f"Error saving time buckets: {e}")
+    
+    def reset(self):
+        """Forget all buckets and delete the sidecar and its journal"""
+        with self._lock:
+            self._reset()
+            for path in (self.path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def rebuild(self):
+        """Recount every bucket from storage, e.g. after history was reclassified"""
+        self.reset()
+        self.load()
+    
+    def day_buckets(self, date):
+        """Return a copy of one date's [productive, unproductive, neutral] bucket arrays"""
+        with self._lock:
+            day = self.days.get(date)
+            return [list(row) for row in day] if day else self._empty_day()
+    
+    def heatmap(self, kind='productive', start_date=None, end_date=None, resolution_minutes=60):
+        """
+        Return a weekday x time-slot matrix (7 rows, Monday first).
+        kind is 'productive', 'unproductive', 'neutral', 'total' (seconds) or
+        'focus' (productive share of classified time). Slots without data are None.
+        Without dates the running weekday totals are used, so the cost does
+        not depend on history; with dates the days in range are summed.
+        """
+        if resolution_minutes % self.bucket_minutes or 1440 % resolution_minutes:
+            raise ValueError(f"Resolution must be a multiple of {self.bucket_minutes} minutes that divides a day")
+        group = resolution_minutes // self.bucket_minutes
+        
+        with self._lock:
+            if start_date is None and end_date is None:
+                sources = self.weekday_totals
+            else:
+                sources = [self._empty_day() for _ in WEEKDAYS]
+                for date, day in self.days.items():
+                    if (start_date is None or date >= start_date) and (end_date is None or date <= end_date):
+                        weekday = sources[datetime.strptime(date, '%Y-%m-%d').weekday()]
+                        for k in range(len(KINDS)):
+                            weekday[k] = [a + b for a, b in zip(weekday[k], day[k])]
+            
+            matrix = []
+            for weekday in sources:
+                slots = [
+                    [sum(row[i:i + group]) for i in range(0, self.buckets_per_day, group)]
+                    for row in weekday
+                ]
+                matrix.append(self._combine(kind, slots))
+            return matrix
+    
+    @staticmethod
+    def _combine(kind, slots):
+        """Turn per-kind slot sums into one heatmap row, None where nothing was tracked"""
+        productive, unproductive, neutral = slots
+        if kind == 'focus':
+            return [p / (p + u) if p + u > 0 else None for p, u in zip(productive, unproductive)]
+        elif kind == 'total':
+            values = [p + u + n for p, u, n in zip(productive, unproductive, neutral)]
+        elif kind in KINDS:
+            values = slots[KINDS.index(kind)]
+        else:
+            raise ValueError(f"Unknown heatmap kind: {kind}")
+        return [
+            value if p + u + n > 0 else None
+            for value, p, u, n in zip(values, productive, unproductive, neutral)
+        ]
+
+def format_heatmap(matrix, resolution_minutes=60):
+    """Render a heatmap matrix as text, one shaded character per slot"""
+    values = [value for row in matrix for value in row if value is not None]
+    peak = max(values) if values else 0
+    slots = len(matrix[0]) if matrix else 0
+    per_label = max(1, 180 // resolution_minutes)  # Label every 3 hours
+    
+    header = "    "
+    for slot in range(0, slots, per_label):
+        header += f"{slot * resolution_minutes // 60:<{per_label}}"[:per_label]
+    lines = [header.rstrip()]
+    for weekday, row in zip(WEEKDAYS, matrix):
+        cells = ""
+        for value in row:
+            if value is None:
+                cells += " "
+            else:
+                shade = int(value / peak * (len(SHADES) - 1) + 0.5) if peak > 0 else 1
+                cells += SHADES[min(len(SHADES) - 1, max(1, shade))]
+        lines.append(f"{weekday} {cells}")
+    lines.append(f"Scale: '{SHADES[1]}' low to '{SHADES[-1]}' high, blank = no data")
+    return "\n".join(lines)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_time_buckets(storage=None):
+    """Return the shared, loaded bucket store for a storage backend"""
+    storage = storage or get_storage()
+    with _stores_lock:
+        store = _stores.get(storage)
+        if store is None:
+            store = _stores[storage] = TimeBucketStore(storage)
+            store.load()
+        return store
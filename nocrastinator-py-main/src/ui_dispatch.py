@@ -0,0 +1,88 @@
+"""
+Dispatcher that runs worker-thread callbacks on the Tk main loop.
+"""
+
+import threading
+import config
+
+class UiDispatcher:
+    """
+    Marshals callbacks from worker threads onto the Tk thread.
+    Posted calls are queued and run once per frame by a pump scheduled
+    with after(), so Tk is only ever touched from its own thread. Repeated
+    posts of the same callback within a frame collapse into the last one
+    (a burst of timer ticks paints once), which runs where the last post
+    was queued, after anything posted before it; posts with coalesce=False
+    always run. configure() and set_var() skip widget updates whose value is
+    already on screen.
+    """
+    
+    _MISSING = object()
+    
+    def __init__(self, root, interval=None):
+        self.root = root
+        self.interval = config.UI_FRAME_INTERVAL if interval is None else interval
+        self.running = False
+        self._pending = {}  # key -> (callback, args), in order of each key's last post
+        self._lock = threading.Lock()
+        self._rendered = {}  # widget -> {option: value last applied}
+    
+    def start(self):
+        """Start pumping queued callbacks on the Tk thread"""
+        if not self.running:
+            self.running = True
+            self.root.after(self.interval, self._pump)
+    
+    def stop(self):
+        """Stop pumping; calls still queued are dropped"""
+        self.running = False
+        with self._lock:
+            self._pending = {}
+    
+    def post(self, callback, *args, coalesce=True):
+        """Queue callback(*args) to run on the Tk thread; safe from any thread"""
+        key = callback if coalesce else object()
+        with self._lock:
+            # Re-inserted rather than updated, so it runs after earlier posts
+            self._pending.pop(key, None)
+            self._pending[key] = (callback, args)
+    
+    def wrap(self, callback, coalesce=True):
+        """Return a function that posts callback with its arguments"""
+        def post(*args):
+            self.post(callback, *args, coalesce=coalesce)
+        return post
+    
+    def _pump(self):
+        """Run the callbacks queued since the last frame"""
+        if not self.running:
+            return
+        with self._lock:
+            calls, self._pending = self._pending, {}
+        for callback, args in calls.values():
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in UI callback: {e}")
+        self.root.after(self.interval, self._pump)
+    
+    def configure(self, widget, **options):
+        """
+        Configure widget unless every option already has that value.
+        Only valid for widgets that are always configured through here.
+        """
+        rendered = self._rendered.setdefault(widget, {})
+        changed = {
+            name: value for name, value in options.items()
+            if rendered.get(name, self._MISSING) != value
+        }
+        if changed:
+            widget.configure(**changed)
+            rendered.update(changed)
+    
+    def set_var(self, variable, value):
+        """Set a Tk variable unless it already holds value"""
+        rendered = self._rendered.setdefault(variable, {})
+        if rendered.get('value', self._MISSING) != value:
+            variable.set(value)
+            rendered['value'] = value
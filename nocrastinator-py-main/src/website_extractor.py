@@ -0,0 +1,101 @@
+"""
+Website extraction module for turning browser window titles into domains.
+"""
+
+import re
+import config
+from lru import LRUCache
+
+# Site names that show up in browser titles, in priority order: when a
+# title mentions several of them, the one listed first wins.
+KNOWN_SITES = {
+    'facebook': 'facebook.com',
+    'twitter': 'twitter.com',
+    'x.com': 'twitter.com',
+    'instagram': 'instagram.com',
+    'reddit': 'reddit.com',
+    'youtube': 'youtube.com',
+    'netflix': 'netflix.com',
+    'tiktok': 'tiktok.com',
+    'twitch': 'twitch.tv',
+    'github': 'github.com',
+    'stackoverflow': 'stackoverflow.com',
+    'stack overflow': 'stackoverflow.com',
+    'linkedin': 'linkedin.com',
+    'udemy': 'udemy.com',
+    'coursera': 'coursera.org',
+    'edx': 'edx.org',
+    'kaggle': 'kaggle.com'
+}
+
+# Domain anywhere in the title, with optional scheme and www prefix.
+# Titles of the form "Page Title - Website - Browser" or "Page Title | Website"
+# are covered too, since the domain part always matches on its own.
+DOMAIN_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?([a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)')
+
+class WebsiteExtractor:
+    """
+    Extracts website domains from browser window titles.
+    Known site names are found with a single precompiled matcher and
+    results are cached per title, because browser titles repeat constantly.
+    """
+    
+    def __init__(self, browsers, known_sites=None, cache_size=None, verbose=True):
+        self.browsers = frozenset(browser.lower() for browser in browsers)
+        self.verbose = verbose  # Print domains as they are detected
+        self.known_sites = dict(KNOWN_SITES if known_sites is None else known_sites)
+        if cache_size is None:
+            cache_size = config.WEBSITE_CACHE_SIZE
+        
+        # The lookahead reports a keyword at every position, and listing the
+        # keywords in priority order means the best one wins at each position
+        self.keywords = list(self.known_sites)
+        self.keyword_priority = {keyword: i for i, keyword in enumerate(self.keywords)}
+        if self.keywords:
+            self.keyword_pattern = re.compile(
+                "(?=(" + "|".join(re.escape(keyword) for keyword in self.keywords) + "))"
+            )
+        else:
+            self.keyword_pattern = None
+        
+        self._cache = LRUCache(cache_size)
+    
+    def extract(self, app_name, window_title):
+        """
+        Extract website information from browser window titles
+        Returns the extracted website domain or None if not found
+        """
+        if not window_title or app_name not in self.browsers:
+            return None
+        
+        domain = self._cache.get(window_title)
+        if domain is LRUCache.MISSING:
+            domain = self._extract(window_title)
+            self._cache.put(window_title, domain)
+            if domain and self.verbose:
+                print(f"Website detected: {domain} (from title: {window_title})")
+        return domain
+    
+    def clear_cache(self):
+        """Forget all cached title lookups"""
+        self._cache.clear()
+    
+    def _extract(self, window_title):
+        """Extract a domain from a title without consulting the cache"""
+        # Check for specific website names (more reliable than regex for some sites)
+        if self.keyword_pattern is not None:
+            best = None
+            for match in self.keyword_pattern.finditer(window_title.lower()):
+                priority = self.keyword_priority[match.group(1)]
+                if best is None or priority < best:
+                    best = priority
+                    if best == 0:
+                        break
+            if best is not None:
+                return self.known_sites[self.keywords[best]]
+        
+        # Fall back to anything that looks like a domain
+        match = DOMAIN_PATTERN.search(window_title)
+        if match:
+            return match.group(1)
+        return None
@@ -0,0 +1,424 @@
+"""
+Foreground window probe backends for the activity tracker.
+"""
+
+import bisect
+import csv
+import itertools
+import os
+import select
+import sys
+import threading
+import time
+import psutil
+import config
+
+class WindowProbe:
+    """
+    Reports the application name and title of the foreground window.
+    Subclasses implement get_active_window for one windowing system.
+    """
+    
+    name = "base"
+    supports_events = False
+    
+    def get_active_window(self):
+        """Return (app_name, window_title), or (None, None) if there is no window"""
+        raise NotImplementedError
+    
+    def watch(self, callback):
+        """
+        Start pushing focus changes as callback(app_name, window_title, timestamp).
+        Only available when supports_events is True.
+        """
+        raise NotImplementedError(f"The {self.name} probe does not push focus events")
+    
+    def unwatch(self):
+        """Stop pushing focus changes"""
+        pass
+    
+    def close(self):
+        """Release any resources held by the probe"""
+        pass
+
+def config_app_name(process_name):
+    """
+    Map a process name to the form the config lists use: lowercase with
+    the Windows .exe suffix, so "code" on Linux matches "code.exe"
+    """
+    app_name = process_name.lower()
+    return app_name if app_name.endswith(".exe") else f"{app_name}.exe"
+
+class NullWindowProbe(WindowProbe):
+    """Probe for systems without a supported windowing system; never sees a window"""
+    
+    name = "null"
+    
+    def get_active_window(self):
+        return None, None
+
+class Win32WindowProbe(WindowProbe):
+    """Probe backed by the Win32 API through pywin32"""
+    
+    name = "win32"
+    supports_events = True
+    
+    # WinEvent constants from winuser.h
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+    
+    def __init__(self):
+        import win32gui
+        import win32process
+        self.win32gui = win32gui
+        self.win32process = win32process
+        self.hook_thread = None
+        self.hook_thread_id = None
+    
+    def get_active_window(self):
+        hwnd = self.win32gui.GetForegroundWindow()
+        _, pid = self.win32process.GetWindowThreadProcessId(hwnd)
+        process = psutil.Process(pid)
+        app_name = process.name().lower()
+        window_title = self.win32gui.GetWindowText(hwnd)
+        return app_name, window_title
+    
+    def watch(self, callback):
+        ready = threading.Event()
+        self.hook_thread = threading.Thread(target=self._hook_loop, args=(callback, ready))
+        self.hook_thread.daemon = True
+        self.hook_thread.start()
+        ready.wait(timeout=1)
+    
+    def unwatch(self):
+        if self.hook_thread and self.hook_thread.is_alive():
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self.hook_thread_id, self.WM_QUIT, 0, 0)
+            self.hook_thread.join(timeout=1)
+        self.hook_thread = None
+    
+    def _hook_loop(self, callback, ready):
+        """Run WinEvent hooks and a message loop on a dedicated thread"""
+        import ctypes
+        from ctypes import wintypes
+        
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+        ]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        # The default int restype would truncate 64-bit handles
+        user32.GetForegroundWindow.restype = wintypes.HWND
+        
+        def handle_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            # Title changes only matter for the foreground window itself
+            if event == self.EVENT_OBJECT_NAMECHANGE:
+                if id_object != self.OBJID_WINDOW or hwnd != user32.GetForegroundWindow():
+                    return
+            
+            # event_time is in GetTickCount() milliseconds
+            age = ((kernel32.GetTickCount() - event_time) & 0xFFFFFFFF) / 1000
+            try:
+                app_name, window_title = self.get_active_window()
+            except Exception as e:
+                print(f"Error reading focus event: {e}")
+                return
+            callback(app_name, window_title, time.time() - age)
+        
+        # Keep a reference so the callback is not garbage collected
+        proc = WinEventProc(handle_event)
+        hooks = [
+            user32.SetWinEventHook(event, event, None, proc, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+            for event in (self.EVENT_SYSTEM_FOREGROUND, self.EVENT_OBJECT_NAMECHANGE)
+        ]
+        self.hook_thread_id = kernel32.GetCurrentThreadId()
+        ready.set()
+        
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+class X11WindowProbe(WindowProbe):
+    """
+    Probe for X11 window managers that follow EWMH, through python-xlib.
+    App names get an .exe suffix (see config_app_name) so the same config
+    lists apply on Linux and Windows.
+    """
+    
+    name = "x11"
+    supports_events = True
+    
+    def __init__(self, display_name=None):
+        from Xlib import X, display
+        self.X = X
+        self.display_name = display_name
+        self.display = display.Display(display_name)
+        self.root = self.display.screen().root
+        self.NET_ACTIVE_WINDOW = self.display.intern_atom('_NET_ACTIVE_WINDOW')
+        self.NET_WM_PID = self.display.intern_atom('_NET_WM_PID')
+        self.NET_WM_NAME = self.display.intern_atom('_NET_WM_NAME')
+        self.UTF8_STRING = self.display.intern_atom('UTF8_STRING')
+        self.watch_thread = None
+        self.watching = False
+    
+    def get_active_window(self):
+        _, app_name, window_title = self._query_active_window(self.display)
+        return app_name, window_title
+    
+    def watch(self, callback):
+        self.watching = True
+        self.watch_thread = threading.Thread(target=self._watch_loop, args=(callback,))
+        self.watch_thread.daemon = True
+        self.watch_thread.start()
+    
+    def unwatch(self):
+        self.watching = False
+        if self.watch_thread:
+            self.watch_thread.join(timeout=1)
+        self.watch_thread = None
+    
+    def _watch_loop(self, callback):
+        """Listen for active window and title changes on a separate connection"""
+        from Xlib import display, error
+        
+        # Xlib connections are not thread-safe, so events get their own
+        connection = display.Display(self.display_name)
+        root = connection.screen().root
+        root.change_attributes(event_mask=self.X.PropertyChangeMask)
+        active_window = None
+        
+        try:
+            while self.watching:
+                readable, _, _ = select.select([connection], [], [], 0.5)
+                if not readable and not connection.pending_events():
+                    continue
+                
+                notify = False
+                for _ in range(connection.pending_events()):
+                    event = connection.next_event()
+                    if event.type != self.X.PropertyNotify:
+                        continue
+                    if event.atom == self.NET_ACTIVE_WINDOW:
+                        notify = True
+                    elif event.atom == self.NET_WM_NAME and active_window is not None and event.window.id == active_window.id:
+                        notify = True
+                
+                if not notify:
+                    continue
+                timestamp = time.time()
+                try:
+                    window, app_name, window_title = self._query_active_window(connection)
+                    
+                    # Follow title changes of whichever window has focus now
+                    if window is not None and (active_window is None or window.id != active_window.id):
+                        window.change_attributes(event_mask=self.X.PropertyChangeMask)
+                        active_window = window
+                except (error.XError, psutil.Error) as e:
+                    print(f"Error reading focus event: {e}")
+                    continue
+                callback(app_name, window_title, timestamp)
+        finally:
+            connection.close()
+    
+    def _query_active_window(self, connection):
+        """Return (window, app_name, window_title) for the active window on a connection"""
+        root = connection.screen().root
+        active = root.get_full_property(self.NET_ACTIVE_WINDOW, self.X.AnyPropertyType)
+        if not active or not active.value or not active.value[0]:
+            return None, None, None
+        
+        window = connection.create_resource_object('window', active.value[0])
+        
+        name = window.get_full_property(self.NET_WM_NAME, self.UTF8_STRING)
+        if name:
+            window_title = name.value.decode('utf-8', 'replace') if isinstance(name.value, bytes) else str(name.value)
+        else:
+            window_title = window.get_wm_name() or ""
+        
+        pid = window.get_full_property(self.NET_WM_PID, self.X.AnyPropertyType)
+        if pid and pid.value:
+            app_name = config_app_name(psutil.Process(pid.value[0]).name())
+        else:
+            wm_class = window.get_wm_class()
+            app_name = config_app_name(wm_class[1]) if wm_class else None
+        return window, app_name, window_title
+    
+    def close(self):
+        self.unwatch()
+        self.display.close()
+
+class ScriptedWindowProbe(WindowProbe):
+    """
+    Synthetic probe that plays back a fixed sequence of (app_name, window_title).
+    With rate=None every call advances to the next window; otherwise the
+    sequence advances at rate transitions per second of wall-clock time.
+    With push=True the sequence is instead pushed as focus events.
+    """
+    
+    name = "scripted"
+    
+    def __init__(self, windows, rate=None, loop=False, push=False):
+        self.windows = list(windows)
+        self.rate = rate
+        self.loop = loop
+        self.position = 0
+        self.start_time = None
+        self.supports_events = push
+        self.pushed_window = (None, None)
+        self.push_thread = None
+        self.pushing = False
+    
+    @property
+    def exhausted(self):
+        """True once a non-looping script has played every window"""
+        return not self.loop and self._index() >= len(self.windows)
+    
+    def get_active_window(self):
+        if self.supports_events:
+            return self.pushed_window
+        index = self._index()
+        if self.rate is None:
+            self.position += 1
+        if not self.windows:
+            return None, None
+        if self.loop:
+            index %= len(self.windows)
+        elif index >= len(self.windows):
+            return None, None
+        return self.windows[index]
+    
+    def watch(self, callback):
+        self.pushing = True
+        self.push_thread = threading.Thread(target=self._push_loop, args=(callback,))
+        self.push_thread.daemon = True
+        self.push_thread.start()
+    
+    def unwatch(self):
+        self.pushing = False
+        if self.push_thread:
+            self.push_thread.join(timeout=1)
+        self.push_thread = None
+    
+    def _push_loop(self, callback):
+        """Push every scripted window as a focus event, paced by rate"""
+        windows = itertools.cycle(self.windows) if self.loop and self.windows else iter(self.windows)
+        start = time.monotonic()
+        for count, window in enumerate(windows):
+            if not self.pushing:
+                break
+            if self.rate:
+                delay = start + count / self.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.pushed_window = window
+            self.position = count + 1
+            callback(window[0], window[1], time.time())
+    
+    def _index(self):
+        """Index of the window currently in the foreground"""
+        if self.rate is None:
+            return self.position
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        return int((time.monotonic() - self.start_time) * self.rate)
+
+class ReplayWindowProbe(WindowProbe):
+    """
+    Synthetic probe that replays an existing activity log.
+    Each recorded window stays in the foreground for its logged duration
+    divided by speed, so speed=3600 plays an hour of history per second.
+    """
+    
+    name = "replay"
+    
+    def __init__(self, log_file=None, speed=1.0, loop=False):
+        self.speed = speed
+        self.loop = loop
+        self.windows = []
+        self.ends = []
+        self.start_time = None
+        
+        elapsed = 0.0
+        with open(log_file or config.ACTIVITY_LOG_FILE, 'r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader)  # Skip header
+            
+            for row in reader:
+                duration = float(row[3])
+                if duration <= 0:
+                    continue
+                elapsed += duration
+                self.windows.append((row[1], row[2]))
+                self.ends.append(elapsed)
+    
+    @property
+    def exhausted(self):
+        """True once a non-looping replay has reached the end of the log"""
+        return not self.loop and self._offset() >= (self.ends[-1] if self.ends else 0)
+    
+    def get_active_window(self):
+        if not self.windows:
+            return None, None
+        offset = self._offset()
+        if self.loop:
+            offset %= self.ends[-1]
+        index = bisect.bisect_right(self.ends, offset)
+        if index >= len(self.windows):
+            return None, None
+        return self.windows[index]
+    
+    def _offset(self):
+        """Seconds of recorded history played so far"""
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        return (time.monotonic() - self.start_time) * self.speed
+
+PROBE_BACKENDS = {
+    NullWindowProbe.name: NullWindowProbe,
+    Win32WindowProbe.name: Win32WindowProbe,
+    X11WindowProbe.name: X11WindowProbe,
+    ReplayWindowProbe.name: ReplayWindowProbe,
+}
+
+def create_probe(backend=None):
+    """
+    Create the probe named by backend (default: config.WINDOW_PROBE_BACKEND).
+    "auto" picks win32 on Windows and x11 when an X display is available,
+    and falls back to the null probe (no windows, nothing logged) when
+    neither works, so the tracker and daemon still start.
+    """
+    backend = backend or config.WINDOW_PROBE_BACKEND
+    
+    if backend == "auto":
+        if sys.platform == "win32":
+            candidate = Win32WindowProbe
+        elif os.environ.get("DISPLAY"):
+            candidate = X11WindowProbe
+        else:
+            print("No foreground window probe available on this system; no activity will be tracked")
+            return NullWindowProbe()
+        try:
+            return candidate()
+        except Exception as e:
+            print(f"Error starting the {candidate.name} window probe, no activity will be tracked: {e}")
+            return NullWindowProbe()
+    
+    if backend not in PROBE_BACKENDS:
+        raise ValueError(f"Unknown window probe backend: {backend}")
+    return PROBE_BACKENDS[backend]()
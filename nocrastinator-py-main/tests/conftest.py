@@ -0,0 +1,36 @@
+"""
+Shared pytest setup: modules under src/ import each other as top-level
+modules, and data files go to a per-test directory instead of data/.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import config
+import daily_aggregates
+import storage
+import time_buckets
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Point every data file in config at a temporary directory, with fresh
+    shared storage, aggregate and bucket instances that are closed afterwards
+    """
+    for name in dir(config):
+        value = getattr(config, name)
+        if name.isupper() and isinstance(value, str) and value.startswith(config.DATA_DIRECTORY + "/"):
+            monkeypatch.setattr(config, name, str(tmp_path / value[len(config.DATA_DIRECTORY) + 1:]))
+    monkeypatch.setattr(config, "DATA_DIRECTORY", str(tmp_path))
+    
+    storages = {}
+    monkeypatch.setattr(storage, "_storages", storages)
+    monkeypatch.setattr(daily_aggregates, "_stores", {})
+    monkeypatch.setattr(time_buckets, "_stores", {})
+    yield tmp_path
+    for shared in storages.values():
+        shared.close()
@@ -0,0 +1,109 @@
+"""
+ActivityLogIndex: per-date byte ranges over activity_log.csv, including
+quoted titles with commas and newlines, partial rows and replaced files.
+"""
+
+import csv
+import io
+import os
+
+from activity_index import ActivityLogIndex
+
+HEADER = ["timestamp", "app_name", "window_title", "duration_seconds", "is_productive"]
+
+ROWS = [
+    ["2024-04-01 09:00:00", "code.exe", "plain", "60.0", "True"],
+    ["2024-04-01 09:01:00", "chrome.exe", 'He said "hi", then left', "30.0", "False"],
+    # A title spanning lines whose second line looks like the start of a row
+    ["2024-04-02 10:00:00", "notepad.exe", "first line\n2024-04-09 00:00:00,fake,row\nthird", "5.0", "None"],
+    ["2024-04-02 10:05:00", "code.exe", 'odd "quote\ncount', "15.0", "True"],
+    ["2024-04-04 08:00:00", "slack.exe", "", "90.0", "None"],
+]
+
+def encode(rows):
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+def write_log(path, rows, mode='wb'):
+    with open(path, mode) as file:
+        file.write(encode(rows))
+
+def make_index(tmp_path):
+    return ActivityLogIndex(str(tmp_path / "activity_log.csv"))
+
+def rows_by_date(rows, date):
+    return [row for row in rows if row[0][:10] == date]
+
+def test_quoted_multiline_titles(tmp_path):
+    write_log(tmp_path / "activity_log.csv", [HEADER] + ROWS)
+    index = make_index(tmp_path)
+    
+    assert index.date_span() == ("2024-04-01", "2024-04-04")
+    for date in ("2024-04-01", "2024-04-02", "2024-04-03", "2024-04-04", "2024-04-09"):
+        assert list(index.iter_rows(date)) == rows_by_date(ROWS, date)
+    assert list(index.iter_rows_between("2024-04-02", "2024-04-04")) == ROWS[2:]
+
+def test_appends_are_indexed_on_refresh(tmp_path):
+    log_file = tmp_path / "activity_log.csv"
+    write_log(log_file, [HEADER] + ROWS[:2])
+    index = make_index(tmp_path)
+    assert index.date_span() == ("2024-04-01", "2024-04-01")
+    
+    write_log(log_file, ROWS[2:], mode='ab')
+    assert list(index.iter_rows("2024-04-02")) == ROWS[2:4]
+    assert index.date_span() == ("2024-04-01", "2024-04-04")
+
+def test_partial_row_waits_until_complete(tmp_path):
+    log_file = tmp_path / "activity_log.csv"
+    write_log(log_file, [HEADER] + ROWS[:2])
+    row = encode([ROWS[2]])
+    # The writer has flushed half a row, inside the quoted title
+    with open(log_file, 'ab') as file:
+        file.write(row[:30])
+    index = make_index(tmp_path)
+    assert list(index.iter_rows("2024-04-02")) == []
+    
+    with open(log_file, 'ab') as file:
+        file.write(row[30:])
+    assert list(index.iter_rows("2024-04-02")) == [ROWS[2]]
+
+def test_sidecar_is_reused(tmp_path):
+    write_log(tmp_path / "activity_log.csv", [HEADER] + ROWS)
+    index = make_index(tmp_path)
+    index.refresh()
+    assert os.path.exists(index.index_file)
+    
+    reloaded = make_index(tmp_path)
+    assert reloaded.dates == index.dates
+    assert reloaded.indexed_size == os.path.getsize(tmp_path / "activity_log.csv")
+    assert list(reloaded.iter_rows("2024-04-02")) == ROWS[2:4]
+
+def test_replaced_log_is_reindexed(tmp_path):
+    log_file = tmp_path / "activity_log.csv"
+    write_log(log_file, [HEADER] + ROWS)
+    index = make_index(tmp_path)
+    index.refresh()
+    
+    # Rewritten with different content, as reclassify does through a rename
+    changed = [row[:4] + ["True"] for row in ROWS]
+    write_log(tmp_path / "replacement.csv", [HEADER] + changed)
+    os.replace(tmp_path / "replacement.csv", log_file)
+    assert list(index.iter_rows("2024-04-01")) == changed[:2]
+
+def test_truncated_log_is_reindexed(tmp_path):
+    log_file = tmp_path / "activity_log.csv"
+    write_log(log_file, [HEADER] + ROWS)
+    index = make_index(tmp_path)
+    index.refresh()
+    
+    write_log(log_file, [HEADER] + ROWS[:1], mode='r+b')
+    with open(log_file, 'r+b') as file:
+        file.truncate(len(encode([HEADER] + ROWS[:1])))
+    assert index.date_span() == ("2024-04-01", "2024-04-01")
+    assert list(index.iter_rows("2024-04-02")) == []
+
+def test_missing_log(tmp_path):
+    index = make_index(tmp_path)
+    assert index.date_span() is None
+    assert list(index.iter_rows("2024-04-01")) == []
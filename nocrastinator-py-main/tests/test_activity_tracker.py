@@ -0,0 +1,79 @@
+"""
+ActivityTracker's published TrackerState: replaced as a whole on every
+window change, following the unproductive streak, and read consistently
+from other threads while the tracking loop runs.
+"""
+
+import threading
+import time
+
+import pytest
+
+from activity_tracker import ActivityTracker, TrackerState
+from window_probe import ScriptedWindowProbe
+
+@pytest.fixture
+def tracker(data_dir):
+    return ActivityTracker(probe=ScriptedWindowProbe([]))
+
+def test_nothing_is_published_before_the_first_window(tracker):
+    assert tracker.get_state() == TrackerState(None, None, None, None, None)
+    # Samples without a window leave the state alone
+    assert not tracker._handle_window_sample(None, None, 1000.0)
+    assert tracker.get_state().app_name is None
+
+def test_state_follows_the_unproductive_streak(tracker):
+    samples = [
+        (1000.0, "code.exe", "main.py", True, None),
+        (1100.0, "spotify.exe", "Spotify", False, 1100.0),
+        # The streak spans neutral and further unproductive windows
+        (1200.0, "explorer.exe", "Downloads", None, 1100.0),
+        (1300.0, "discord.exe", "general", False, 1100.0),
+        (1400.0, "code.exe", "tests.py", True, None),
+    ]
+    for timestamp, app_name, title, is_productive, unproductive_since in samples:
+        assert tracker._handle_window_sample(app_name, title, timestamp)
+        assert tracker.get_state() == TrackerState(app_name, title, is_productive, timestamp, unproductive_since)
+
+def test_state_is_replaced_not_modified(tracker):
+    tracker._handle_window_sample("code.exe", "main.py", 1000.0)
+    first = tracker.get_state()
+    
+    # The same window again publishes nothing new
+    assert not tracker._handle_window_sample("code.exe", "main.py", 1010.0)
+    assert tracker.get_state() is first
+    
+    tracker._handle_window_sample("spotify.exe", "Spotify", 1020.0)
+    assert first == TrackerState("code.exe", "main.py", True, 1000.0, None)
+    assert tracker.get_state().app_name == "spotify.exe"
+
+def test_readers_see_whole_states_while_tracking(data_dir):
+    windows = [("code.exe", "main.py"), ("spotify.exe", "Spotify"), ("explorer.exe", "Downloads")]
+    expected = {app_name: (title, is_productive) for (app_name, title), is_productive in zip(windows, (True, False, None))}
+    tracker = ActivityTracker(probe=ScriptedWindowProbe(windows, loop=True), poll_interval=0.001, max_poll_interval=0.001)
+    seen = []
+    done = threading.Event()
+    
+    def read():
+        while not done.is_set():
+            state = tracker.get_state()
+            if state.app_name is not None:
+                seen.append(state)
+            time.sleep(0.0005)
+    
+    reader = threading.Thread(target=read)
+    reader.start()
+    tracker.start_tracking()
+    try:
+        deadline = time.monotonic() + 5
+        while len({state.app_name for state in seen}) < len(windows):
+            assert time.monotonic() < deadline, "the tracker did not cycle through the windows"
+            time.sleep(0.01)
+    finally:
+        done.set()
+        reader.join()
+        tracker.stop_tracking()
+    
+    for state in seen:
+        assert (state.window_title, state.is_productive) == expected[state.app_name]
+        assert (state.unproductive_since is not None) == (state.is_productive is not True)
@@ -0,0 +1,85 @@
+"""
+ActivityLogWriter: rows that cannot be stored, a destination that cannot be
+opened, and pause() waiting for a slow commit.
+"""
+
+import csv
+import threading
+
+import pytest
+
+from activity_writer import ActivityLogWriter
+from binary_log import BinaryStorage
+from sqlite_storage import SqliteStorage
+from storage import CsvStorage
+
+# A lone surrogate cannot be encoded by any of the backends
+BAD_TITLE = "broken \ud800 title"
+
+def make_storage(backend, data_dir):
+    if backend == "csv":
+        return CsvStorage(str(data_dir / "activity_log.csv"), str(data_dir / "focus_scores.json"))
+    if backend == "sqlite":
+        return SqliteStorage(str(data_dir / "activity.db"))
+    return BinaryStorage(
+        str(data_dir / "activity_log.bin"),
+        str(data_dir / "activity_strings.bin"),
+        str(data_dir / "focus_scores.json")
+    )
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite", "binary"])
+def test_bad_row_does_not_drop_the_batch(data_dir, backend):
+    storage = make_storage(backend, data_dir)
+    titles = ["first", BAD_TITLE, "third"]
+    for i, title in enumerate(titles):
+        storage.append_activity(f"2024-04-01 09:0{i}:00", "code.exe", title, 1.0, True)
+    storage.flush()
+    
+    assert [record.window_title for record in storage.iter_day("2024-04-01")] == ["first", "third"]
+    storage.close()
+
+def test_flush_returns_when_the_log_cannot_be_opened(tmp_path):
+    writer = ActivityLogWriter(str(tmp_path / "missing" / "activity_log.csv"), flush_interval=60)
+    writer.write(["2024-04-01 09:00:00", "code.exe", "a", 1.0, True])
+    
+    waiter = threading.Thread(target=writer.flush)
+    waiter.start()
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+    # The row waits for a later attempt instead of being lost
+    assert writer.queue.qsize() == 1
+    
+    (tmp_path / "missing").mkdir()
+    writer.write(["2024-04-01 09:01:00", "code.exe", "b", 1.0, True])
+    writer.close()
+    with open(tmp_path / "missing" / "activity_log.csv", newline='') as file:
+        assert [row[2] for row in csv.reader(file)] == ["a", "b"]
+
+class SlowWriter(ActivityLogWriter):
+    """Blocks in its commit until released"""
+    
+    def __init__(self, path):
+        super().__init__(path, flush_interval=0)
+        self.committing = threading.Event()
+        self.release = threading.Event()
+    
+    def _write_rows(self, batch):
+        self.committing.set()
+        self.release.wait()
+        super()._write_rows(batch)
+
+def test_pause_waits_for_a_slow_commit(tmp_path):
+    writer = SlowWriter(str(tmp_path / "activity_log.csv"))
+    writer.write(["2024-04-01 09:00:00", "code.exe", "a", 1.0, True])
+    assert writer.committing.wait(5)
+    thread = writer.writer_thread
+    
+    pausing = threading.Thread(target=writer.pause)
+    pausing.start()
+    pausing.join(timeout=0.5)
+    assert pausing.is_alive()
+    
+    writer.release.set()
+    pausing.join(timeout=5)
+    assert not pausing.is_alive()
+    assert not thread.is_alive()
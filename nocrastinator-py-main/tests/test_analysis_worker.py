@@ -0,0 +1,131 @@
+"""
+AnalysisWorker: cancelled jobs are dropped, results are cached per data
+version, and failures reach the caller instead of being swallowed.
+"""
+
+import threading
+
+from analysis_worker import AnalysisWorker
+
+class Harness:
+    """Worker around a compute function the test controls"""
+    
+    def __init__(self, compute):
+        self.version = 1
+        self.delivered = []
+        self.failed = []
+        self.done = threading.Semaphore(0)
+        self.worker = AnalysisWorker(compute, lambda: self.version, self._deliver, self._fail)
+    
+    def _deliver(self, key, result):
+        self.delivered.append((key, result))
+        self.done.release()
+    
+    def _fail(self, key, error):
+        self.failed.append((key, str(error)))
+        self.done.release()
+    
+    def wait(self):
+        assert self.done.acquire(timeout=5), "no result was handed back"
+        # The job is cleared before the result is handed over
+        assert not self.worker.busy()
+
+def test_results_are_cached_per_data_version():
+    calls = []
+    harness = Harness(lambda job: calls.append(job.key) or f"result {job.key}")
+    
+    assert harness.worker.request(7) is None
+    harness.wait()
+    assert harness.delivered == [(7, "result 7")]
+    
+    # Same data: served from the cache without computing
+    assert harness.worker.request(7) == "result 7"
+    assert calls == [7]
+    
+    harness.version = 2
+    assert harness.worker.request(7) is None
+    harness.wait()
+    assert calls == [7, 7]
+    assert harness.worker.request(7) == "result 7"
+
+def test_result_is_not_cached_when_data_changed_while_computing():
+    harness = Harness(None)
+    
+    def compute(job):
+        harness.version += 1  # New activity arrives mid-computation
+        return "partial"
+    harness.worker.compute = compute
+    
+    assert harness.worker.request(30) is None
+    harness.wait()
+    assert harness.delivered == [(30, "partial")]
+    assert harness.worker.request(30) is None
+    harness.wait()
+    assert len(harness.delivered) == 2
+
+def slow_first_job(outcome):
+    """compute that blocks job 7 until released, then returns or raises outcome"""
+    started = threading.Event()
+    release = threading.Event()
+    threads = []
+    
+    def compute(job):
+        if job.key != 7:
+            return f"result {job.key}"
+        threads.append(threading.current_thread())
+        started.set()
+        release.wait(5)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    def finish():
+        release.set()
+        threads[0].join(5)
+    
+    return compute, started, finish
+
+def test_newer_request_cancels_the_job_in_flight():
+    compute, started, finish = slow_first_job("stale")
+    harness = Harness(compute)
+    harness.worker.request(7)
+    assert started.wait(5)
+    harness.worker.request(30)
+    harness.wait()
+    
+    # The first job finishes without delivering anything or filling the cache
+    finish()
+    assert harness.delivered == [(30, "result 30")]
+    assert 7 not in harness.worker.cache
+
+def test_failure_is_reported_and_not_cached():
+    attempts = []
+    
+    def compute(job):
+        attempts.append(job.key)
+        if len(attempts) == 1:
+            raise RuntimeError("storage is gone")
+        return "recovered"
+    
+    harness = Harness(compute)
+    assert harness.worker.request(90) is None
+    harness.wait()
+    assert harness.failed == [(90, "storage is gone")]
+    assert harness.delivered == []
+    
+    # The next request computes again
+    assert harness.worker.request(90) is None
+    harness.wait()
+    assert harness.delivered == [(90, "recovered")]
+
+def test_failure_of_a_cancelled_job_is_dropped():
+    compute, started, finish = slow_first_job(RuntimeError("too late to matter"))
+    harness = Harness(compute)
+    harness.worker.request(7)
+    assert started.wait(5)
+    harness.worker.request(30)
+    harness.wait()
+    
+    finish()
+    assert harness.failed == []
+    assert harness.delivered == [(30, "result 30")]
@@ -0,0 +1,146 @@
+"""
+ScoreBackfill: shards aggregated in worker processes, progress reports,
+resuming from the checkpoint of an interrupted run and config stamps.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import config
+from backfill import ScoreBackfill, aggregate_shard, config_values, discard_checkpoint, make_shards
+from daily_aggregates import DailyAggregateStore
+from focus_score import score_record
+from score_cache import config_fingerprints
+from storage import create_storage
+
+FIRST = datetime(2024, 4, 1, 9, 0, 0)
+DAYS = 10
+APPS = [("code.exe", "main.py", True), ("chrome.exe", "YouTube", False), ("explorer.exe", "", None)]
+
+def write_history(backend):
+    storage = create_storage(backend)
+    for day in range(DAYS):
+        for i in range(day % 3 + 2):
+            app_name, title, productive = APPS[(day + i) % len(APPS)]
+            moment = FIRST + timedelta(days=day, minutes=10 * i)
+            storage.append_activity(moment.strftime('%Y-%m-%d %H:%M:%S'), app_name, title, 300.0 + day, productive)
+    storage.close()
+
+@pytest.fixture
+def history(data_dir):
+    """Ten days of csv activity, with the index sidecar saved"""
+    write_history("csv")
+    return data_dir
+
+def expected_totals(backend="csv"):
+    storage = create_storage(backend)
+    days = DailyAggregateStore(storage).get_range('2024-04-01', '2024-04-10')
+    storage.close()
+    return days
+
+def run(progress=None, restart=False):
+    return ScoreBackfill(backend="csv", shard_days=3, workers=2).run(progress, restart)
+
+def load_scores():
+    storage = create_storage("csv")
+    scores = storage.load_scores()
+    storage.close()
+    return scores
+
+def test_make_shards():
+    assert make_shards('2024-04-01', '2024-04-10', 3) == [
+        ('2024-04-01', '2024-04-03'), ('2024-04-04', '2024-04-06'),
+        ('2024-04-07', '2024-04-09'), ('2024-04-10', '2024-04-10')
+    ]
+    assert make_shards('2024-02-28', '2024-03-01', 30) == [('2024-02-28', '2024-03-01')]
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite", "binary"])
+def test_worker_reads_without_writing(data_dir, backend):
+    write_history(backend)
+    storage = create_storage(backend)
+    files = {path: open(path, 'rb').read() for path in storage.data_files() if os.path.exists(path)}
+    storage.close()
+    
+    days = aggregate_shard(backend, config_values(), '2024-04-03', '2024-04-05')
+    expected = expected_totals(backend)
+    assert days == {date: expected[date] for date in ('2024-04-03', '2024-04-04', '2024-04-05')}
+    if backend != "sqlite":  # Readers may touch SQLite's shared-memory file
+        assert {path: open(path, 'rb').read() for path in files} == files
+
+def test_backfill_scores_every_day(history):
+    index_file = history / "activity_log.csv.idx"
+    index_before = index_file.read_bytes()
+    calls = []
+    
+    assert run(lambda done, total, shard: calls.append((done, total, shard))) == DAYS
+    
+    assert [(done, total) for done, total, _ in calls] == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    assert sorted(shard for _, _, shard in calls) == make_shards('2024-04-01', '2024-04-10', 3)
+    scores = load_scores()
+    for date, totals in expected_totals().items():
+        assert scores[date]['score'] == pytest.approx(score_record(totals)['score'])
+        assert scores[date]['total_time'] == pytest.approx(totals['total_time'])
+    # Workers read the index without saving it
+    assert index_file.read_bytes() == index_before
+    assert not os.path.exists(f"{index_file}.tmp")
+    assert not os.path.exists(config.BACKFILL_CHECKPOINT_FILE)
+
+def test_stamps_keep_or_clear_the_categories_fingerprint(history):
+    storage = create_storage("csv")
+    old = score_record(expected_totals()['2024-04-02'], {'weights_fp': 'old', 'categories_fp': 'old'})
+    storage.save_scores({'2024-04-02': old})
+    storage.close()
+    
+    run()
+    scores = load_scores()
+    fingerprints = config_fingerprints()
+    assert all(record['weights_fp'] == fingerprints['weights_fp'] for record in scores.values())
+    # An existing day keeps its stamp; new days were classified under unknown lists
+    assert scores['2024-04-02']['categories_fp'] == 'old'
+    assert {record['categories_fp'] for date, record in scores.items() if date != '2024-04-02'} == {None}
+
+def interrupt(done, total, shard):
+    """Progress callback that stops the run after the first finished shard"""
+    raise KeyboardInterrupt
+
+def test_interrupted_run_resumes_from_checkpoint(history):
+    with pytest.raises(KeyboardInterrupt):
+        run(interrupt)
+    with open(config.BACKFILL_CHECKPOINT_FILE) as file:
+        checkpoint = json.load(file)
+    assert len(checkpoint['done']) == 1
+    
+    # Finished shards are taken from the checkpoint instead of the log
+    (start, days), = checkpoint['done'].items()
+    date = min(days)
+    days[date]['productive_time'] = days[date]['total_time']
+    days[date]['unproductive_time'] = 0
+    with open(config.BACKFILL_CHECKPOINT_FILE, 'w') as file:
+        json.dump(checkpoint, file)
+    
+    calls = []
+    assert run(lambda done, total, shard: calls.append((done, total, shard))) == DAYS
+    assert calls[0] == (1, 4, None)
+    assert [done for done, _, _ in calls] == [1, 2, 3, 4]
+    assert load_scores()[date]['score'] == 100
+    assert not os.path.exists(config.BACKFILL_CHECKPOINT_FILE)
+
+def test_restart_ignores_the_checkpoint(history):
+    with pytest.raises(KeyboardInterrupt):
+        run(interrupt)
+    assert os.path.exists(config.BACKFILL_CHECKPOINT_FILE)
+    
+    calls = []
+    run(lambda done, total, shard: calls.append(done), restart=True)
+    assert calls == [1, 2, 3, 4]
+
+def test_discard_checkpoint(history):
+    with pytest.raises(KeyboardInterrupt):
+        run(interrupt)
+    discard_checkpoint()
+    assert not os.path.exists(config.BACKFILL_CHECKPOINT_FILE)
+    # Nothing to discard is fine too
+    discard_checkpoint()
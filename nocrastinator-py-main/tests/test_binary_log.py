@@ -0,0 +1,245 @@
+"""
+Binary activity log: record and string table round trips, date search and
+recovery from writes cut short by a crash.
+"""
+
+import os
+import struct
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from binary_log import (
+    BinaryStorage, StringTable, convert_csv_log, init_binary_log,
+    HEADER_FORMAT, HEADER_SIZE, LENGTH_FORMAT, RECORD_FORMAT, RECORD_SIZE
+)
+
+WINDOWS = [
+    ("code.exe", "main.py - nocrastinator - Visual Studio Code", True),
+    ("chrome.exe", "(3) YouTube - Google Chrome", False),
+    ("explorer.exe", "", None),
+    ("spotify.exe", "Čaj — Spotify ♫", None),
+]
+
+def make_storage(data_dir):
+    return BinaryStorage(
+        str(data_dir / "activity_log.bin"),
+        str(data_dir / "activity_strings.bin"),
+        str(data_dir / "focus_scores.json")
+    )
+
+def make_rows(days, per_day, start=datetime(2024, 4, 1, 9, 0, 0)):
+    """Rows in time order spread over days, as (timestamp, app, title, duration, productive)"""
+    rows = []
+    for day in range(days):
+        moment = start + timedelta(days=day)
+        for i in range(per_day):
+            moment += timedelta(minutes=7)
+            app_name, title, productive = WINDOWS[(day + i) % len(WINDOWS)]
+            # Multiples of 0.25 survive the float32 duration field exactly
+            rows.append((moment.strftime('%Y-%m-%d %H:%M:%S'), app_name, title, 0.25 * (i + 1), productive))
+    return rows
+
+def write_rows(storage, rows):
+    for row in rows:
+        storage.append_activity(*row)
+    storage.flush()
+
+def as_tuples(records):
+    return [(r.timestamp, r.app_name, r.window_title, r.duration, r.is_productive) for r in records]
+
+def test_round_trip(data_dir):
+    rows = make_rows(days=5, per_day=12)
+    storage = make_storage(data_dir)
+    write_rows(storage, rows)
+    storage.close()
+    
+    reopened = make_storage(data_dir)
+    assert as_tuples(reopened.iter_range('1970-01-01', '9999-12-31')) == rows
+    assert reopened.date_span() == ('2024-04-01', '2024-04-05')
+    # Every distinct app and title is stored once
+    distinct = {row[1] for row in rows} | {row[2] for row in rows}
+    assert len(reopened.strings.strings) == len(distinct)
+    reopened.close()
+
+def test_appends_after_reopen_reuse_string_ids(data_dir):
+    rows = make_rows(days=2, per_day=8)
+    storage = make_storage(data_dir)
+    write_rows(storage, rows[:8])
+    storage.close()
+    
+    reopened = make_storage(data_dir)
+    strings_before = len(reopened.strings.strings)
+    write_rows(reopened, rows[8:])
+    assert len(reopened.strings.strings) == strings_before
+    assert as_tuples(reopened.iter_range('2024-04-01', '2024-04-02')) == rows
+    reopened.close()
+
+def test_date_search(data_dir):
+    rows = make_rows(days=30, per_day=40)
+    storage = make_storage(data_dir)
+    write_rows(storage, rows)
+    
+    for offset in range(-1, 31):
+        date = (datetime(2024, 4, 1) + timedelta(days=offset)).strftime('%Y-%m-%d')
+        assert as_tuples(storage.iter_day(date)) == [row for row in rows if row[0][:10] == date]
+    
+    expected = [row for row in rows if '2024-04-10' <= row[0][:10] <= '2024-04-17']
+    assert as_tuples(storage.iter_range('2024-04-10', '2024-04-17')) == expected
+    storage.close()
+
+def test_empty_log(data_dir):
+    storage = make_storage(data_dir)
+    assert list(storage.iter_range('1970-01-01', '9999-12-31')) == []
+    assert storage.date_span() is None
+    storage.close()
+
+def test_partial_record_is_dropped(data_dir):
+    rows = make_rows(days=1, per_day=10)
+    storage = make_storage(data_dir)
+    write_rows(storage, rows)
+    storage.close()
+    
+    # A crash mid-write leaves the start of one more record
+    log_file = data_dir / "activity_log.bin"
+    with open(log_file, 'ab') as file:
+        file.write(struct.pack(RECORD_FORMAT, 1e9, 1.0, 1, 0, 0)[:RECORD_SIZE // 2])
+    
+    reopened = make_storage(data_dir)
+    assert os.path.getsize(log_file) == HEADER_SIZE + len(rows) * RECORD_SIZE
+    assert as_tuples(reopened.iter_day('2024-04-01')) == rows
+    
+    more = make_rows(days=1, per_day=3, start=datetime(2024, 4, 2, 9, 0, 0))
+    write_rows(reopened, more)
+    assert as_tuples(reopened.iter_range('2024-04-01', '2024-04-02')) == rows + more
+    reopened.close()
+
+def test_header_mismatch_is_rejected(tmp_path):
+    path = tmp_path / "activity_log.bin"
+    path.write_bytes(struct.pack(HEADER_FORMAT, b'NOTALOG\x00', 1, RECORD_SIZE))
+    with pytest.raises(ValueError):
+        init_binary_log(str(path))
+
+def test_string_table_round_trip(tmp_path):
+    path = str(tmp_path / "strings.bin")
+    table = StringTable(path)
+    ids = [table.intern(s) for s in ["a", "Čaj", "", "a", "b"]]
+    assert ids == [0, 1, 2, 0, 3]
+    with open(path, 'ab') as file:
+        file.write(table.take_pending())
+    assert table.take_pending() == b''
+    
+    reloaded = StringTable(path)
+    assert reloaded.strings == ["a", "Čaj", "", "b"]
+    assert reloaded.intern("Čaj") == 1
+
+def test_string_table_drops_partial_entry(tmp_path):
+    path = tmp_path / "strings.bin"
+    table = StringTable(str(path))
+    for s in ["code.exe", "chrome.exe"]:
+        table.intern(s)
+    complete = table.take_pending()
+    # The length says 20 bytes but only 3 made it to disk
+    path.write_bytes(complete + struct.pack(LENGTH_FORMAT, 20) + b'abc')
+    
+    reloaded = StringTable(str(path))
+    assert reloaded.strings == ["code.exe", "chrome.exe"]
+    assert path.read_bytes() == complete
+    
+    # New entries land right after the last complete one
+    reloaded.intern("slack.exe")
+    with open(path, 'ab') as file:
+        file.write(reloaded.take_pending())
+    assert StringTable(str(path)).strings == ["code.exe", "chrome.exe", "slack.exe"]
+
+@pytest.fixture
+def new_york(monkeypatch):
+    """Run in a time zone with DST: 2025-03-09 has 23 hours and 2025-11-02 has 25"""
+    if not hasattr(time, "tzset"):
+        pytest.skip("needs time.tzset to switch time zones")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_dst_days_match_calendar_dates(data_dir, new_york):
+    rows = [
+        ('2025-03-09 23:30:00', 'code.exe', 'a', 1.0, True),
+        ('2025-03-10 00:10:00', 'code.exe', 'b', 1.0, True),
+        ('2025-11-02 23:30:00', 'code.exe', 'c', 1.0, True),
+        ('2025-11-03 00:30:00', 'code.exe', 'd', 1.0, True),
+    ]
+    storage = make_storage(data_dir)
+    write_rows(storage, rows)
+    for date in ('2025-03-09', '2025-03-10', '2025-11-02', '2025-11-03'):
+        assert as_tuples(storage.iter_day(date)) == [row for row in rows if row[0][:10] == date]
+    storage.close()
+
+# Session ends around the fall-back on 2025-11-02: 01:00-02:00 happens twice
+FALL_BACK = [
+    datetime(2025, 11, 2, 0, 50),
+    datetime(2025, 11, 2, 1, 30),           # EDT
+    datetime(2025, 11, 2, 1, 10, fold=1),   # EST, 40 minutes later
+    datetime(2025, 11, 2, 1, 40, fold=1),
+    datetime(2025, 11, 2, 2, 30),
+]
+
+def raw_times(storage):
+    return [record[0] for record in storage.iter_raw()]
+
+def test_fall_back_hour_keeps_exact_times_in_order(data_dir, new_york):
+    ends = [moment.timestamp() + 0.25 for moment in FALL_BACK]
+    storage = make_storage(data_dir)
+    for i, end in enumerate(ends):
+        timestamp = datetime.fromtimestamp(end).strftime('%Y-%m-%d %H:%M:%S')
+        storage.append_activity(timestamp, 'code.exe', str(i), 1.0, True, end)
+    storage.flush()
+    
+    assert raw_times(storage) == ends
+    assert [record.window_title for record in storage.iter_day('2025-11-02')] == ['0', '1', '2', '3', '4']
+    assert list(storage.iter_day('2025-11-01')) == []
+    assert list(storage.iter_day('2025-11-03')) == []
+    storage.close()
+
+def test_fall_back_hour_from_local_timestamps(data_dir, new_york):
+    # Without an epoch, the repeated hour is resolved by the previous record
+    storage = make_storage(data_dir)
+    for i, moment in enumerate(FALL_BACK):
+        storage.append_activity(moment.strftime('%Y-%m-%d %H:%M:%S'), 'code.exe', str(i), 1.0, True)
+    storage.flush()
+    
+    assert raw_times(storage) == [moment.timestamp() for moment in FALL_BACK]
+    storage.close()
+
+def test_records_stay_ordered_when_the_clock_goes_back(data_dir):
+    storage = make_storage(data_dir)
+    storage.append_activity('2024-04-01 10:00:00', 'code.exe', 'a', 1.0, True, 1711965600.5)
+    storage.append_activity('2024-04-01 09:59:00', 'code.exe', 'b', 1.0, True, 1711965540.0)
+    storage.flush()
+    assert raw_times(storage) == [1711965600.5, 1711965600.5]
+    storage.close()
+    
+    # The newest time is picked up again after a restart
+    reopened = make_storage(data_dir)
+    reopened.append_activity('2024-04-01 09:58:00', 'code.exe', 'c', 1.0, True, 1711965480.0)
+    reopened.flush()
+    assert raw_times(reopened)[-1] == 1711965600.5
+    reopened.close()
+
+def test_converted_csv_is_in_time_order(data_dir, new_york):
+    log_file = data_dir / "activity_log.csv"
+    lines = ["timestamp,app_name,window_title,duration_seconds,is_productive"]
+    lines += [f"{moment.strftime('%Y-%m-%d %H:%M:%S')},code.exe,{i},1.0,True" for i, moment in enumerate(FALL_BACK)]
+    # A row logged after the clock was set back by an hour
+    lines.append("2025-11-02 01:45:00,code.exe,late,1.0,True")
+    log_file.write_text("\n".join(lines) + "\n")
+    
+    rows, _, _ = convert_csv_log(str(log_file))
+    assert rows == 6
+    storage = make_storage(data_dir)
+    times = raw_times(storage)
+    assert times == sorted(times)
+    assert [record.window_title for record in storage.iter_day('2025-11-02')] == ['0', '1', '2', '3', 'late', '4']
+    storage.close()
@@ -0,0 +1,70 @@
+"""
+ActivityClassifier and WebsiteExtractor against copies of the original
+is_productive and extract_website_from_title on a fixed set of windows.
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+import config
+from classifier import ActivityClassifier, create_classifier
+from website_extractor import WebsiteExtractor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from bench_classifier import SAMPLE_WINDOWS, legacy_extract_website, legacy_is_productive
+
+WINDOWS = SAMPLE_WINDOWS + [
+    ("Chrome.EXE", "GitHub - Google Chrome"),
+    ("chrome.exe", "Reddit and GitHub side by side - Google Chrome"),
+    ("chrome.exe", "docs.python.org/3/library/re.html - Google Chrome"),
+    ("chrome.exe", "https://www.youtube.com/watch?v=abc - Google Chrome"),
+    ("chrome.exe", "news.ycombinator.com | Hacker News - Google Chrome"),
+    ("chrome.exe", "Stack Overflow - Where Developers Learn - Google Chrome"),
+    ("chrome.exe", "x.com / Home - Google Chrome"),
+    ("chrome.exe", "Untitled - Google Chrome"),
+    ("chrome.exe", ""),
+    ("firefox.exe", "Twitch - Mozilla Firefox"),
+    ("brave.exe", "Kaggle: Your Home for Data Science - Brave"),
+    ("opera.exe", "facebook.com vs linkedin.com - Opera"),
+    ("safari.exe", "edX | Free Online Courses"),
+    ("notepad.exe", "youtube.com links.txt - Notepad"),
+    ("notepad.exe", "github.com and reddit.com.txt - Notepad"),
+    ("Code.exe", "reddit.com scraper - Visual Studio Code"),
+    ("spotify.exe", "Spotify Premium"),
+    ("unknown.exe", ""),
+    ("unknown.exe", "Version 1.2.3 release notes"),
+]
+
+def quietly(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+@pytest.mark.parametrize("app_name, window_title", WINDOWS)
+def test_extractor_matches_baseline(app_name, window_title):
+    extractor = WebsiteExtractor(config.BROWSERS, verbose=False)
+    expected = quietly(legacy_extract_website, app_name, window_title)
+    assert extractor.extract(app_name, window_title) == expected
+    # Cached lookups give the same answer
+    assert extractor.extract(app_name, window_title) == expected
+
+@pytest.mark.parametrize("app_name, window_title", WINDOWS)
+def test_classifier_matches_baseline(app_name, window_title):
+    expected = quietly(legacy_is_productive, app_name, window_title)
+    classifier = create_classifier(verbose=False)
+    assert classifier.is_productive(app_name, window_title) == expected
+    assert classifier.is_productive(app_name, window_title) == expected
+    uncached = ActivityClassifier(config.BROWSERS, legacy_extract_website, cache_size=0, verbose=False)
+    assert quietly(uncached.is_productive, app_name, window_title) == expected
+
+def test_lookup_sets_are_built_from_config(monkeypatch):
+    classifier = create_classifier(verbose=False)
+    assert classifier.is_productive("zoom.exe", "Zoom Meeting") is None
+    monkeypatch.setattr(config, "UNPRODUCTIVE_APPS", config.UNPRODUCTIVE_APPS + ["Zoom.exe"])
+    # Lookup sets are built once; a new classifier sees the change
+    assert classifier.is_productive("zoom.exe", "Zoom Meeting") is None
+    assert create_classifier(verbose=False).is_productive("zoom.exe", "Zoom Meeting") is False
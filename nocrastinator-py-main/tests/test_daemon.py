@@ -0,0 +1,132 @@
+"""
+TrackerDaemon's JSON API: commands answered over TCP and Unix sockets,
+errors for malformed or unknown requests, and the per-start API token.
+"""
+
+import os
+import socket
+import stat
+
+import pytest
+
+import config
+from daemon import TrackerDaemon
+from ipc import DaemonClient, encode_message, read_token
+
+@pytest.fixture
+def daemon(data_dir, monkeypatch):
+    monkeypatch.setattr(config, "WINDOW_PROBE_BACKEND", "null")
+    monkeypatch.setattr(config, "DAEMON_PORT", 0)
+    daemon = TrackerDaemon()
+    yield daemon
+    if daemon.server:
+        daemon.stop()
+
+def start_tcp(daemon, monkeypatch):
+    daemon.start()
+    # Bound to a free port; the client reads the real one from config
+    monkeypatch.setattr(config, "DAEMON_PORT", daemon.server.server_address[1])
+
+def dispatch(daemon, message):
+    response = daemon.dispatch(message if isinstance(message, bytes) else encode_message(message))
+    assert set(response) == ({"ok", "result"} if response["ok"] else {"ok", "error"})
+    return response
+
+def request(daemon, command, **args):
+    return dispatch(daemon, {"command": command, "args": args, "token": daemon.token})
+
+@pytest.mark.parametrize("line, error", [
+    (b"not json\n", "Invalid request"),
+    (b"[1, 2]\n", "Invalid request"),
+    (b"\xff\xfe\n", "Invalid request"),
+])
+def test_malformed_requests_are_rejected(daemon, line, error):
+    daemon.token = "secret"
+    response = dispatch(daemon, line)
+    assert not response["ok"]
+    assert response["error"].startswith(error)
+
+@pytest.mark.parametrize("message, error", [
+    ({"command": "status"}, "Missing or wrong API token"),
+    ({"command": "status", "token": "guess"}, "Missing or wrong API token"),
+    ({"command": "status", "token": 12}, "Missing or wrong API token"),
+    ({"command": "reboot", "token": "secret"}, "Unknown command: reboot"),
+    ({"command": "summary", "args": {"day": "2024-04-01"}, "token": "secret"}, "Invalid request"),
+    ({"command": "summary", "args": {"date": "yesterday"}, "token": "secret"}, "Invalid request"),
+    ({"command": "summary", "args": ["2024-04-01"], "token": "secret"}, "Invalid request"),
+    ({"command": "pomodoro", "args": {"action": "reset"}, "token": "secret"}, "Invalid request: action must be one of"),
+])
+def test_bad_requests_get_errors(daemon, message, error):
+    daemon.token = "secret"
+    response = dispatch(daemon, message)
+    assert not response["ok"]
+    assert response["error"].startswith(error)
+
+def test_nothing_is_served_before_start(daemon):
+    response = dispatch(daemon, {"command": "status", "token": None})
+    assert not response["ok"]
+
+def test_commands(daemon):
+    daemon.token = "secret"
+    status = request(daemon, "status")["result"]
+    assert status["app_name"] is None
+    assert status["pomodoro"]["phase"] == "Ready"
+    
+    summary = request(daemon, "summary", date="2024-04-01")["result"]
+    assert (summary["date"], summary["total_time"]) == ("2024-04-01", 0)
+    
+    assert request(daemon, "pomodoro", action="start")["result"]["is_running"]
+    assert request(daemon, "pomodoro", action="pause")["result"]["is_paused"]
+    assert not request(daemon, "pomodoro", action="stop")["result"]["is_running"]
+    
+    assert request(daemon, "shutdown")["result"] == {"stopping": True}
+    assert daemon._stop.is_set()
+
+def test_token_file_is_private_and_new_per_start(daemon, monkeypatch):
+    start_tcp(daemon, monkeypatch)
+    first = read_token()
+    assert first == daemon.token
+    assert stat.S_IMODE(os.stat(config.DAEMON_TOKEN_FILE).st_mode) == 0o600
+    daemon.stop()
+    assert not os.path.exists(config.DAEMON_TOKEN_FILE)
+    
+    restarted = TrackerDaemon()
+    start_tcp(restarted, monkeypatch)
+    try:
+        assert read_token() != first
+    finally:
+        restarted.stop()
+
+def test_client_over_tcp(daemon, monkeypatch):
+    start_tcp(daemon, monkeypatch)
+    client = DaemonClient(timeout=5)
+    assert client.request("summary", date="2024-04-01")["total_time"] == 0
+    assert client.request("pomodoro")["phase"] == "Ready"
+    with pytest.raises(RuntimeError, match="Unknown command"):
+        client.request("reboot")
+
+def test_connection_without_the_token_is_refused(daemon, monkeypatch):
+    start_tcp(daemon, monkeypatch)
+    with socket.create_connection((config.DAEMON_HOST, config.DAEMON_PORT), timeout=5) as sock:
+        sock.sendall(encode_message({"command": "shutdown"}))
+        with sock.makefile("rb") as reader:
+            assert b"Missing or wrong API token" in reader.readline()
+    assert not daemon._stop.is_set()
+
+def test_client_without_a_daemon(data_dir):
+    with pytest.raises(RuntimeError, match="No daemon is listening"):
+        DaemonClient(timeout=1).request("status")
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_client_over_unix_socket(daemon, monkeypatch, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    monkeypatch.setattr(config, "DAEMON_SOCKET_FILE", path)
+    daemon.start()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert DaemonClient(timeout=5).request("status")["streak"] == 0
+    
+    # A second daemon must not take over the socket of a running one
+    with pytest.raises(OSError):
+        TrackerDaemon().start()
+    daemon.stop()
+    assert not os.path.exists(path)
@@ -0,0 +1,176 @@
+"""
+DailyAggregateStore: loading uncached days, sessions added and days
+invalidated while a load is in flight, and reclassified sessions.
+"""
+
+import threading
+
+import pytest
+
+from daily_aggregates import DailyAggregateStore
+from storage import ActivityRecord
+
+class StubStorage:
+    """Storage holding records in memory; hold() pauses the next read"""
+    
+    def __init__(self, records=()):
+        self.records = list(records)
+        self.reads = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.gated = False
+    
+    def hold(self):
+        self.gated = True
+    
+    def _wait(self):
+        if self.gated:
+            self.gated = False
+            self.entered.set()
+            assert self.release.wait(5)
+    
+    def flush(self):
+        pass
+    
+    def iter_day(self, date):
+        self.reads.append(date)
+        self._wait()
+        return iter([record for record in list(self.records) if record.timestamp[:10] == date])
+    
+    def iter_range(self, start_date, end_date):
+        self.reads.append((start_date, end_date))
+        self._wait()
+        return iter([record for record in list(self.records) if start_date <= record.timestamp[:10] <= end_date])
+
+RECORDS = [
+    ActivityRecord('2024-04-01 09:00:00', 'code.exe', 'a', 600.0, True),
+    ActivityRecord('2024-04-01 09:10:00', 'chrome.exe', 'b', 300.0, False),
+    ActivityRecord('2024-04-02 09:00:00', 'slack.exe', 'c', 120.0, None),
+    ActivityRecord('2024-04-03 09:00:00', 'code.exe', 'd', 60.0, True),
+]
+
+def in_background(func, *args):
+    """Run func in a thread; returns the thread and a list holding its result"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func(*args)), daemon=True)
+    thread.start()
+    return thread, result
+
+def test_days_are_loaded_once():
+    storage = StubStorage(RECORDS)
+    store = DailyAggregateStore(storage)
+    
+    days = store.get_range('2024-04-01', '2024-04-04')
+    assert storage.reads == [('2024-04-01', '2024-04-04')]
+    assert days['2024-04-01']['productive_time'] == pytest.approx(600)
+    assert days['2024-04-01']['unproductive_apps'] == {'chrome.exe': pytest.approx(300)}
+    assert days['2024-04-02']['neutral_time'] == pytest.approx(120)
+    assert days['2024-04-04']['total_time'] == 0
+    
+    # Cached days are served without reading storage again
+    assert store.get('2024-04-03') == days['2024-04-03']
+    assert store.get_range('2024-04-02', '2024-04-03') == {date: days[date] for date in ('2024-04-02', '2024-04-03')}
+    assert len(storage.reads) == 1
+    
+    # Callers get copies
+    days['2024-04-01']['apps']['code.exe'] = 0
+    assert store.get('2024-04-01')['apps']['code.exe'] == pytest.approx(600)
+
+def test_add_seeds_an_uncached_day_first():
+    storage = StubStorage(RECORDS)
+    store = DailyAggregateStore(storage)
+    version = store.version('2024-04-01')
+    
+    store.add('2024-04-01', 'code.exe', 30.0, True)
+    totals = store.get('2024-04-01')
+    assert totals['total_time'] == pytest.approx(930)
+    assert totals['apps']['code.exe'] == pytest.approx(630)
+    assert storage.reads == ['2024-04-01']
+    assert store.version('2024-04-01') != version
+
+def test_invalidate_during_load_discards_the_stale_load():
+    storage = StubStorage(RECORDS)
+    store = DailyAggregateStore(storage)
+    storage.hold()
+    thread, result = in_background(store.get, '2024-04-01')
+    assert storage.entered.wait(5)
+    
+    # The log is rewritten while the first load is still reading it
+    storage.records.append(ActivityRecord('2024-04-01 10:00:00', 'code.exe', 'e', 100.0, True))
+    store.invalidate('2024-04-01')
+    storage.release.set()
+    thread.join(5)
+    
+    assert result[0]['total_time'] == pytest.approx(1000)
+    assert store.get('2024-04-01')['total_time'] == pytest.approx(1000)
+    assert storage.reads == ['2024-04-01', '2024-04-01']
+
+def test_invalidate_all_during_range_load_discards_the_stale_load():
+    storage = StubStorage(RECORDS)
+    store = DailyAggregateStore(storage)
+    storage.hold()
+    thread, result = in_background(store.get_range, '2024-04-01', '2024-04-03')
+    assert storage.entered.wait(5)
+    
+    storage.records = [record._replace(is_productive=True) for record in RECORDS]
+    store.invalidate()
+    storage.release.set()
+    thread.join(5)
+    
+    days = result[0]
+    assert [days[date]['productive_time'] for date in sorted(days)] == pytest.approx([900, 120, 60])
+    assert store.get('2024-04-02')['neutral_time'] == 0
+
+def test_add_during_load_is_not_lost():
+    storage = StubStorage(RECORDS)
+    store = DailyAggregateStore(storage)
+    storage.hold()
+    thread, result = in_background(store.get, '2024-04-01')
+    assert storage.entered.wait(5)
+    
+    # The tracking thread logs a session while the slow load is reading;
+    # it loads the day itself rather than waiting
+    store.add('2024-04-01', 'code.exe', 40.0, True)
+    storage.release.set()
+    thread.join(5)
+    
+    # The slow load is dropped instead of replacing the day holding the add
+    assert result[0]['total_time'] == pytest.approx(940)
+    assert store.get('2024-04-01')['productive_time'] == pytest.approx(640)
+
+def test_reclassified_adjusts_days_loaded_before_the_rewrite():
+    storage = StubStorage(RECORDS)
+    store = DailyAggregateStore(storage)
+    store.get('2024-04-01')
+    
+    token = store.begin_reclassify()
+    # Loaded after the rewrite started, so it may already be reclassified
+    store.get('2024-04-02')
+    storage.records = [RECORDS[0], RECORDS[1]._replace(is_productive=True), RECORDS[2]._replace(is_productive=False), RECORDS[3]]
+    # A session still queued for the log when the rewrite ran
+    store.add('2024-04-01', 'chrome.exe', 50.0, False)
+    versions = [store.version(date) for date in ('2024-04-01', '2024-04-02')]
+    
+    store.reclassified(token, [(RECORDS[1], True), (RECORDS[2], False)])
+    
+    day = store.get('2024-04-01')
+    assert day['productive_time'] == pytest.approx(900)
+    assert day['unproductive_time'] == pytest.approx(50)
+    assert day['unproductive_apps'] == {'chrome.exe': pytest.approx(50)}
+    assert store.get('2024-04-02')['unproductive_time'] == pytest.approx(120)
+    assert storage.reads.count('2024-04-02') == 2
+    assert [store.version(date) for date in ('2024-04-01', '2024-04-02')] != versions
+
+def test_version_changes_with_the_totals():
+    store = DailyAggregateStore(StubStorage(RECORDS))
+    versions = [store.version('2024-04-01')]
+    store.get('2024-04-01')
+    assert store.version('2024-04-01') == versions[0]
+    
+    store.add('2024-04-01', 'code.exe', 1.0, True)
+    versions.append(store.version('2024-04-01'))
+    store.invalidate('2024-04-01')
+    versions.append(store.version('2024-04-01'))
+    store.invalidate()
+    versions.append(store.version('2024-04-01'))
+    assert len(set(versions)) == 4
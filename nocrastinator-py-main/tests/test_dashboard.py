@@ -0,0 +1,107 @@
+"""
+DashboardProducer: snapshots are built off the UI thread from the
+tracker's published state, and the UI only ever sees the newest one.
+"""
+
+import threading
+
+from activity_tracker import TrackerState
+from dashboard import DashboardProducer
+
+class StubTracker:
+    def __init__(self):
+        self.state = TrackerState('code.exe', 'main.py', True, 100.0, None)
+    
+    def get_state(self):
+        return self.state
+
+class StubFocusScore:
+    """Scores 1, 2, 3... per call; block() holds the next calculation"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.built = threading.Semaphore(0)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.failures = 0
+    
+    def block(self):
+        self.entered.clear()
+        self.release.clear()
+    
+    def calculate_daily_score(self):
+        self.entered.set()
+        assert self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("scores unavailable")
+        self.calls += 1
+        return self.calls
+    
+    def get_streak(self):
+        self.built.release()
+        return 4
+
+def wait_built(focus_score):
+    assert focus_score.built.acquire(timeout=5), "no snapshot was built"
+
+def test_snapshot_uses_the_published_state():
+    producer = DashboardProducer(StubTracker(), StubFocusScore())
+    snapshot = producer.build_snapshot()
+    assert (snapshot.app_name, snapshot.window_title, snapshot.is_productive) == ('code.exe', 'main.py', True)
+    assert (snapshot.score, snapshot.streak) == (1, 4)
+
+def test_only_the_newest_snapshot_is_kept():
+    producer = DashboardProducer(StubTracker(), StubFocusScore())
+    for _ in range(3):
+        producer._publish(producer.build_snapshot())
+    assert producer.take_latest().score == 3
+    assert producer.take_latest() is None
+
+def test_refresh_builds_a_new_snapshot():
+    tracker = StubTracker()
+    focus_score = StubFocusScore()
+    producer = DashboardProducer(tracker, focus_score, interval=60)
+    producer.start()
+    try:
+        wait_built(focus_score)
+        # The state is replaced as a whole by the tracking thread
+        tracker.state = TrackerState('chrome.exe', 'YouTube', False, 200.0, 200.0)
+        producer.refresh()
+        wait_built(focus_score)
+    finally:
+        producer.stop()
+    assert producer.worker_thread is None
+    
+    snapshot = producer.take_latest()
+    assert (snapshot.app_name, snapshot.is_productive, snapshot.score) == ('chrome.exe', False, 2)
+
+def test_slow_scores_do_not_block_the_ui():
+    focus_score = StubFocusScore()
+    producer = DashboardProducer(StubTracker(), focus_score, interval=60)
+    focus_score.block()
+    producer.start()
+    try:
+        assert focus_score.entered.wait(5)
+        # The worker is stuck calculating; the UI still polls without waiting
+        assert producer.take_latest() is None
+        focus_score.release.set()
+        wait_built(focus_score)
+    finally:
+        producer.stop()
+    assert producer.take_latest().score == 1
+
+def test_failed_snapshot_keeps_the_worker_running():
+    focus_score = StubFocusScore()
+    focus_score.failures = 1
+    producer = DashboardProducer(StubTracker(), focus_score, interval=60)
+    producer.start()
+    try:
+        assert focus_score.entered.wait(5)
+        focus_score.entered.clear()
+        producer.refresh()
+        wait_built(focus_score)
+    finally:
+        producer.stop()
+    assert producer.take_latest().score == 1
@@ -0,0 +1,122 @@
+"""
+Reclassifying stored activity: every backend commits the new
+classifications all at once or not at all, readers see one or the other,
+and sessions logged meanwhile are kept.
+"""
+
+import threading
+
+import pytest
+
+from daily_aggregates import get_daily_aggregates
+from focus_score import score_record
+from reclassify import reclassify_history
+from score_cache import config_fingerprints
+from storage import create_storage
+
+BACKENDS = ["csv", "sqlite", "binary"]
+
+ROWS = [
+    ('2024-04-01 09:00:00', 'code.exe', 'main.py', 600.0, True),
+    ('2024-04-01 09:10:00', 'chrome.exe', 'YouTube', 300.0, True),
+    ('2024-04-02 09:00:00', 'slack.exe', 'general', 120.0, None),
+    ('2024-04-02 09:05:00', 'chrome.exe', 'YouTube', 60.0, True),
+    ('2024-04-03 09:00:00', 'code.exe', 'main.py', 30.0, True),
+]
+
+# What the current category lists would say about each pair
+NEW = {('code.exe', 'main.py'): True, ('chrome.exe', 'YouTube'): False, ('slack.exe', 'general'): False}
+
+def classify(app_name, window_title):
+    return NEW[(app_name, window_title)]
+
+class StubClassifier:
+    def is_productive(self, app_name, window_title):
+        return classify(app_name, window_title)
+
+def open_history(backend):
+    storage = create_storage(backend)
+    for row in ROWS:
+        storage.append_activity(*row)
+    storage.flush()
+    return storage
+
+def classifications(storage):
+    storage.flush()
+    return [record.is_productive for record in storage.iter_range('2024-04-01', '2024-04-03')]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_rewrite_is_committed_at_once(data_dir, backend):
+    storage = open_history(backend)
+    seen = []
+    
+    def on_change(record, is_productive):
+        if not seen:
+            # Another thread reads while the rewrite is under way
+            reader = threading.Thread(target=lambda: seen.append(classifications(storage)))
+            reader.start()
+            reader.join(5)
+    
+    rows, changed, changed_dates = storage.reclassify(classify, on_change)
+    assert (rows, changed, changed_dates) == (5, 3, ['2024-04-01', '2024-04-02'])
+    assert seen == [[row[4] for row in ROWS]]
+    assert classifications(storage) == [True, False, False, False, True]
+    storage.close()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_failed_rewrite_leaves_the_log_unchanged(data_dir, backend):
+    storage = open_history(backend)
+    calls = []
+    
+    def failing(app_name, window_title):
+        calls.append(app_name)
+        if len(calls) == 2:
+            raise RuntimeError("classifier failed")
+        return classify(app_name, window_title)
+    
+    with pytest.raises(RuntimeError):
+        storage.reclassify(failing)
+    assert classifications(storage) == [row[4] for row in ROWS]
+    
+    # The writer was resumed, so logging carries on
+    storage.append_activity('2024-04-03 10:00:00', 'code.exe', 'main.py', 10.0, True)
+    assert len(classifications(storage)) == len(ROWS) + 1
+    storage.close()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sessions_logged_during_the_rewrite_are_kept(data_dir, backend):
+    storage = open_history(backend)
+    logged = []
+    
+    def on_change(record, is_productive):
+        if not logged:
+            logged.append(True)
+            storage.append_activity('2024-04-03 10:00:00', 'slack.exe', 'general', 45.0, False)
+    
+    storage.reclassify(classify, on_change)
+    assert classifications(storage) == [True, False, False, False, True, False]
+    assert [record.duration for record in storage.iter_day('2024-04-03')] == [30.0, 45.0]
+    storage.close()
+
+def test_history_refreshes_totals_and_scores(data_dir):
+    storage = open_history("csv")
+    aggregates = get_daily_aggregates(storage)
+    before = aggregates.get_range('2024-04-01', '2024-04-03')
+    assert before['2024-04-01']['unproductive_time'] == 0
+    storage.save_scores({date: score_record(totals, config_fingerprints()) for date, totals in before.items()})
+    
+    summary = reclassify_history(storage, StubClassifier())
+    assert summary['rows'] == 5
+    assert summary['pairs'] == 3
+    assert summary['changed_rows'] == 3
+    assert summary['changed_dates'] == ['2024-04-01', '2024-04-02']
+    
+    after = aggregates.get_range('2024-04-01', '2024-04-03')
+    assert after['2024-04-01']['unproductive_apps'] == {'chrome.exe': 300.0}
+    assert after['2024-04-02']['unproductive_time'] == pytest.approx(180)
+    assert after['2024-04-03'] == before['2024-04-03']
+    
+    scores = storage.load_scores()
+    assert sorted(summary['rescored_dates']) == ['2024-04-01', '2024-04-02']
+    assert scores['2024-04-02']['unproductive_time'] == pytest.approx(180)
+    assert all(scores[date][key] == value for date in scores for key, value in config_fingerprints().items())
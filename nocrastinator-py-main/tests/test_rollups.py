@@ -0,0 +1,160 @@
+"""
+RollupEngine against a plain sorted-list computation of the same windows.
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from rollups import ROLLUP_FIELDS, RollupEngine
+
+BASE = date(2024, 1, 1)
+WINDOWS = (1, 3, 7, 30, 90)
+PERCENTILES = (0, 25, 50, 75, 90, 100)
+
+def day(offset):
+    return (BASE + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+def make_record(rng):
+    # A small pool of scores makes ties common, which the tree must handle
+    score = rng.choice([0, 25.5, 50, 62.5, 100, round(rng.uniform(0, 100), 3)])
+    productive, unproductive, neutral = (rng.randint(0, 8 * 3600) for _ in range(3))
+    return {
+        'score': score,
+        'total_time': productive + unproductive + neutral,
+        'productive_time': productive,
+        'unproductive_time': unproductive,
+        'neutral_time': neutral
+    }
+
+def expected_percentile(scores, percent):
+    if not scores:
+        return None
+    scores = sorted(scores)
+    position = percent / 100 * (len(scores) - 1)
+    lower = int(position)
+    if lower == position:
+        return scores[lower]
+    return scores[lower] + (scores[lower + 1] - scores[lower]) * (position - lower)
+
+def expected_window(records, days, end_date):
+    end = date.fromisoformat(end_date)
+    in_window = [
+        record for date_str, record in records.items()
+        if end - timedelta(days=days - 1) <= date.fromisoformat(date_str) <= end
+    ]
+    scores = [record['score'] for record in in_window]
+    summary = {
+        'days_with_data': len(in_window),
+        'average_score': sum(scores) / len(scores) if scores else 0,
+        'percentiles': {percent: expected_percentile(scores, percent) for percent in PERCENTILES}
+    }
+    for field in ROLLUP_FIELDS[1:]:
+        summary[field] = sum(record[field] for record in in_window)
+    return summary
+
+def expected_moving_average(records, days, span, end_date, step):
+    end = date.fromisoformat(end_date)
+    points = []
+    for offset in range(span - 1, -1, -1):
+        if offset % step:
+            continue
+        point = (end - timedelta(days=offset)).strftime('%Y-%m-%d')
+        window = expected_window(records, days, point)
+        points.append((point, window['average_score'] if window['days_with_data'] else None))
+    return points
+
+def assert_matches(engine, records, end_dates):
+    for end_date in end_dates:
+        for days in WINDOWS:
+            actual = engine.window(days, end_date, percentiles=PERCENTILES)
+            expected = expected_window(records, days, end_date)
+            assert actual['days_with_data'] == expected['days_with_data']
+            assert actual['average_score'] == pytest.approx(expected['average_score'])
+            for field in ROLLUP_FIELDS[1:]:
+                assert actual[field] == expected[field]
+            for percent in PERCENTILES:
+                assert actual['percentiles'][percent] == pytest.approx(expected['percentiles'][percent])
+        
+        actual_points = engine.moving_average(7, 60, end_date, step=3)
+        expected_points = expected_moving_average(records, 7, 60, end_date, 3)
+        assert [point for point, _ in actual_points] == [point for point, _ in expected_points]
+        for (_, actual), (_, expected) in zip(actual_points, expected_points):
+            assert actual == pytest.approx(expected)
+
+def random_history(rng, days, fill):
+    return {day(offset): make_record(rng) for offset in range(days) if rng.random() < fill}
+
+def probe_dates(records):
+    newest = max(records)
+    return sorted({min(records), newest, day(-5), day(45), day(200)}) + [
+        (date.fromisoformat(newest) + timedelta(days=10)).strftime('%Y-%m-%d')
+    ]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_window_matches_brute_force(seed):
+    rng = random.Random(seed)
+    records = random_history(rng, 240, 0.7)
+    engine = RollupEngine()
+    engine.rebuild(records)
+    
+    assert_matches(engine, records, probe_dates(records))
+
+def test_empty_engine():
+    engine = RollupEngine()
+    engine.rebuild({})
+    
+    window = engine.window(7, day(0), percentiles=PERCENTILES)
+    assert window['days_with_data'] == 0
+    assert window['average_score'] == 0
+    assert all(value is None for value in window['percentiles'].values())
+    assert all(average is None for _, average in engine.moving_average(7, 14, day(0)))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_updates_to_newest_day(seed):
+    rng = random.Random(seed)
+    records = random_history(rng, 120, 0.8)
+    newest = day(120)
+    records[newest] = make_record(rng)
+    engine = RollupEngine()
+    engine.rebuild(records)
+    engine.window(7, newest)
+    
+    # The live score for today changes many times without a rebuild
+    for _ in range(20):
+        records[newest] = make_record(rng)
+        engine.update(newest, records[newest])
+        assert not engine.dirty
+        assert_matches(engine, records, [newest, day(100)])
+
+@pytest.mark.parametrize("seed", range(5))
+def test_new_days_and_gaps(seed):
+    rng = random.Random(seed)
+    records = random_history(rng, 60, 0.9)
+    engine = RollupEngine()
+    engine.rebuild(records)
+    engine.window(7, day(59))
+    
+    # Move on day by day, sometimes skipping days without activity
+    offset = 60
+    for _ in range(30):
+        offset += rng.choice([1, 1, 1, 2, 5])
+        records[day(offset)] = make_record(rng)
+        engine.update(day(offset), records[day(offset)])
+        assert_matches(engine, records, [day(offset), day(offset - 3)])
+
+@pytest.mark.parametrize("seed", range(5))
+def test_past_day_edits(seed):
+    rng = random.Random(seed)
+    records = random_history(rng, 90, 0.6)
+    engine = RollupEngine()
+    engine.rebuild(records)
+    engine.window(30, day(89))
+    
+    # Rescoring old days, including ones that had no record, rebuilds lazily
+    for _ in range(15):
+        offset = rng.randrange(0, 89)
+        records[day(offset)] = make_record(rng)
+        engine.update(day(offset), records[day(offset)])
+        assert_matches(engine, records, [day(89), day(offset)])
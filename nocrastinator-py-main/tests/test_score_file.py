@@ -0,0 +1,143 @@
+"""
+JsonScoreFile: snapshot and journal round trips, torn journal lines left by
+a crash, and compaction.
+"""
+
+import json
+import os
+
+import config
+from storage import JsonScoreFile
+
+def record(score):
+    return {'score': score, 'total_time': 3600, 'productive_time': 1800,
+            'unproductive_time': 900, 'neutral_time': 900}
+
+def make_file(tmp_path):
+    return JsonScoreFile(str(tmp_path / "focus_scores.json"))
+
+def test_snapshot_round_trip(tmp_path):
+    scores = {'2024-04-01': record(10.5), '2024-04-02': record(80)}
+    make_file(tmp_path).save(scores)
+    
+    reloaded = make_file(tmp_path)
+    assert reloaded.load() == scores
+    assert reloaded.journal_entries == 0
+
+def test_journal_replays_over_snapshot(tmp_path):
+    score_file = make_file(tmp_path)
+    scores = {'2024-04-01': record(10), '2024-04-02': record(20)}
+    score_file.save(scores)
+    
+    scores['2024-04-02'] = record(25)
+    scores['2024-04-03'] = record(30)
+    score_file.save(scores, ['2024-04-02', '2024-04-03'])
+    scores['2024-04-03'] = record(35)
+    score_file.save(scores, ['2024-04-03'])
+    
+    # The snapshot is untouched; the journal holds one line per saved date
+    with open(score_file.path) as file:
+        assert json.load(file) == {'2024-04-01': record(10), '2024-04-02': record(20), '_generation': 1}
+    with open(score_file.journal_path) as file:
+        assert len(file.readlines()) == 3
+    
+    reloaded = make_file(tmp_path)
+    assert reloaded.load() == scores
+    assert reloaded.journal_entries == 3
+
+def test_torn_journal_line_is_truncated(tmp_path):
+    score_file = make_file(tmp_path)
+    scores = {'2024-04-01': record(10)}
+    score_file.save(scores, ['2024-04-01'])
+    with open(score_file.journal_path, 'rb') as file:
+        good = file.read()
+    # A crash mid-append leaves half a line without its newline
+    with open(score_file.journal_path, 'ab') as file:
+        file.write(b'{"date":"2024-04-02","record":{"sco')
+    
+    reloaded = make_file(tmp_path)
+    assert reloaded.load() == scores
+    with open(score_file.journal_path, 'rb') as file:
+        assert file.read() == good
+    
+    # Later appends stay readable
+    scores['2024-04-02'] = record(20)
+    reloaded.save(scores, ['2024-04-02'])
+    assert make_file(tmp_path).load() == scores
+
+def test_corrupt_journal_line_drops_the_rest(tmp_path):
+    score_file = make_file(tmp_path)
+    scores = {'2024-04-01': record(10)}
+    score_file.save(scores, ['2024-04-01'])
+    with open(score_file.journal_path, 'ab') as file:
+        file.write(b'not json\n{"date":"2024-04-03","record":{"score":1}}\n')
+    
+    assert make_file(tmp_path).load() == scores
+
+def test_compaction_folds_journal_into_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "FOCUS_SCORE_COMPACT_AFTER", 3)
+    score_file = make_file(tmp_path)
+    scores = {}
+    for day in range(1, 6):
+        date = f"2024-04-0{day}"
+        scores[date] = record(day * 10)
+        score_file.save(scores, [date])
+    
+    # The fourth save compacted; the fifth started a new journal
+    assert score_file.journal_entries == 1
+    with open(score_file.path) as file:
+        snapshot = json.load(file)
+    assert snapshot.pop('_generation') == 1
+    assert len(snapshot) == 4
+    assert make_file(tmp_path).load() == scores
+
+def test_stale_journal_after_interrupted_compaction(tmp_path):
+    score_file = make_file(tmp_path)
+    scores = {'2024-04-01': record(10), '2024-04-02': record(20)}
+    score_file.save(scores, ['2024-04-01', '2024-04-02'])
+    with open(score_file.journal_path, 'rb') as file:
+        journal = file.read()
+    
+    # Today's live record changed since it was journaled, then the snapshot
+    # was renamed into place but the journal was not yet removed
+    scores['2024-04-02'] = record(25)
+    score_file.compact(scores)
+    with open(score_file.journal_path, 'wb') as file:
+        file.write(journal)
+    
+    reloaded = make_file(tmp_path)
+    assert reloaded.load() == scores
+    assert reloaded.journal_entries == 2
+    
+    # New entries replay; the stale ones are dropped at the next compaction
+    scores['2024-04-03'] = record(30)
+    reloaded.save(scores, ['2024-04-03'])
+    assert make_file(tmp_path).load() == scores
+    reloaded.compact(scores)
+    assert make_file(tmp_path).load() == scores
+    assert not os.path.exists(score_file.journal_path)
+
+def test_journal_counts_only_written_lines(tmp_path):
+    score_file = make_file(tmp_path)
+    score_file.save({'2024-04-01': record(10)}, ['2024-04-01', '2024-04-02', '2024-04-03'])
+    assert score_file.journal_entries == 1
+    score_file.save({}, ['2024-04-04'])
+    assert score_file.journal_entries == 1
+    assert make_file(tmp_path).load() == {'2024-04-01': record(10)}
+
+def test_snapshot_without_generation_replays_journal(tmp_path):
+    # Files written before generations were recorded
+    score_file = make_file(tmp_path)
+    with open(score_file.path, 'w') as file:
+        json.dump({'2024-04-01': record(10)}, file)
+    with open(score_file.journal_path, 'w') as file:
+        file.write(json.dumps({'date': '2024-04-01', 'record': record(15)}) + '\n')
+    
+    assert score_file.load() == {'2024-04-01': record(15)}
+    score_file.compact({'2024-04-01': record(15)})
+    assert make_file(tmp_path).load() == {'2024-04-01': record(15)}
+
+def test_missing_files_load_empty(tmp_path):
+    score_file = make_file(tmp_path)
+    assert score_file.load() == {}
+    assert score_file.data_files() == [score_file.path, score_file.journal_path]
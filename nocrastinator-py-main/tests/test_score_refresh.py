@@ -0,0 +1,103 @@
+"""
+Changing the category lists: the background refresh reclassifies the log,
+and scores, summaries and time buckets agree on the new classifications.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import config
+from activity_tracker import ActivityTracker
+from focus_score import FocusScore
+from score_cache import categories_fingerprint
+from window_probe import ScriptedWindowProbe
+
+SESSIONS = [
+    # (hour the session ends, app, title, seconds)
+    (10, "code.exe", "main.py - Visual Studio Code", 3600),
+    (11, "spotify.exe", "Spotify", 1800),
+    (12, "explorer.exe", "Downloads", 1200),
+    (13, "chrome.exe", "Inbox - Google Chrome", 600),
+]
+
+def log_day(tracker, day):
+    for hour, app_name, title, duration in SESSIONS:
+        end = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+        is_productive = tracker.is_productive(app_name, title)
+        tracker.log_activity(app_name, title, duration, is_productive, end.timestamp())
+    tracker.storage.flush()
+
+def wait_for_refresh(focus_score):
+    deadline = time.monotonic() + 10
+    while focus_score.refresher.busy():
+        assert time.monotonic() < deadline, "refresh did not finish"
+        time.sleep(0.01)
+
+def change_categories(monkeypatch):
+    # Spotify turns neutral and Explorer becomes a distraction
+    monkeypatch.setattr(config, "UNPRODUCTIVE_APPS", [
+        app for app in config.UNPRODUCTIVE_APPS if app != "spotify.exe"
+    ] + ["explorer.exe"])
+
+def bucket_totals(tracker, date):
+    return [sum(row) for row in tracker.time_buckets.day_buckets(date)]
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite", "binary"])
+def test_score_and_summary_agree_after_category_change(data_dir, monkeypatch, backend):
+    monkeypatch.setattr(config, "STORAGE_BACKEND", backend)
+    today = datetime.now().date()
+    yesterday = today - timedelta(days=1)
+    dates = [yesterday.strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')]
+    
+    tracker = ActivityTracker(probe=ScriptedWindowProbe([]))
+    log_day(tracker, yesterday)
+    log_day(tracker, today)
+    focus_score = FocusScore()
+    for date in dates:
+        focus_score.calculate_daily_score(date)
+    focus_score.save()
+    assert tracker.get_daily_summary(dates[0])['unproductive_time'] == 1800
+    
+    change_categories(monkeypatch)
+    focus_score = FocusScore()
+    wait_for_refresh(focus_score)
+    
+    week = focus_score.aggregate_range(*dates)
+    assert week['unproductive_apps'] == {"explorer.exe": 2400}
+    for date in dates:
+        focus_score.calculate_daily_score(date)
+        record = focus_score.scores[date]
+        summary = tracker.get_daily_summary(date)
+        assert (record['productive_time'], record['unproductive_time']) == (4200, 1200)
+        assert (summary['productive_time'], summary['unproductive_time']) == (4200, 1200)
+        assert bucket_totals(tracker, date) == [4200, 1200, 1800]
+        assert record['categories_fp'] == categories_fingerprint()
+    
+    # The log itself now holds the new classifications
+    stored = {record.app_name: record.is_productive for record in tracker.storage.iter_day(dates[0])}
+    assert stored["spotify.exe"] is None and stored["explorer.exe"] is False
+    saved = tracker.storage.load_scores()
+    assert all(saved[date]['categories_fp'] == categories_fingerprint() for date in dates)
+
+def test_days_stay_stale_until_the_log_is_reclassified(data_dir, monkeypatch):
+    today = datetime.now().date()
+    yesterday = today - timedelta(days=1)
+    dates = [yesterday.strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')]
+    
+    tracker = ActivityTracker(probe=ScriptedWindowProbe([]))
+    log_day(tracker, yesterday)
+    focus_score = FocusScore()
+    focus_score.calculate_daily_score(dates[0])
+    
+    change_categories(monkeypatch)
+    log_day(tracker, today)
+    focus_score = FocusScore(refresh_categories=False)
+    focus_score.calculate_daily_score()
+    focus_score.save()
+    
+    # Today mixes old and new classifications, so its stamp stays empty
+    assert focus_score.scores[dates[1]]['categories_fp'] is None
+    assert tracker.storage.load_scores()[dates[1]]['categories_fp'] is None
+    assert not focus_score.refresher.busy()
@@ -0,0 +1,154 @@
+"""
+SqliteStorage: appends read back through WAL, day and range queries, score
+persistence and per-thread reader connections.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from sqlite_storage import SqliteStorage, import_legacy_data
+
+ROWS = [
+    ('2024-04-01 09:00:00', 'code.exe', 'main.py - Visual Studio Code', 60.0, True),
+    ('2024-04-01 09:01:00', 'chrome.exe', 'YouTube - Google Chrome', 30.0, False),
+    ('2024-04-02 10:00:00', 'explorer.exe', '', 5.0, None),
+    ('2024-04-03 11:00:00', 'code.exe', 'Čaj ♫', 90.0, True),
+    ('2024-04-05 12:00:00', 'slack.exe', 'general', 15.0, None),
+]
+
+def make_storage(data_dir):
+    return SqliteStorage(str(data_dir / "activity.db"))
+
+def write_rows(storage, rows):
+    for row in rows:
+        storage.append_activity(*row)
+    storage.flush()
+
+def as_tuples(records):
+    return [(r.timestamp, r.app_name, r.window_title, r.duration, r.is_productive) for r in records]
+
+def test_appends_are_read_back_in_wal_mode(data_dir):
+    storage = make_storage(data_dir)
+    write_rows(storage, ROWS)
+    
+    assert storage._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # A reader sees committed rows while the writer keeps its connection open
+    assert storage.writer.writer_thread.is_alive()
+    assert as_tuples(storage.iter_range('1970-01-01', '9999-12-31')) == ROWS
+    storage.close()
+    
+    reopened = make_storage(data_dir)
+    assert as_tuples(reopened.iter_range('1970-01-01', '9999-12-31')) == ROWS
+    reopened.close()
+
+def test_day_and_range_queries(data_dir):
+    storage = make_storage(data_dir)
+    write_rows(storage, ROWS)
+    
+    for date in ('2024-03-31', '2024-04-01', '2024-04-02', '2024-04-04', '2024-04-05'):
+        assert as_tuples(storage.iter_day(date)) == [row for row in ROWS if row[0][:10] == date]
+    assert as_tuples(storage.iter_range('2024-04-02', '2024-04-04')) == ROWS[2:4]
+    assert list(storage.iter_range('2024-05-01', '2024-05-31')) == []
+    assert storage.date_span() == ('2024-04-01', '2024-04-05')
+    storage.close()
+
+def test_scores_persist(data_dir):
+    storage = make_storage(data_dir)
+    scores = {
+        '2024-04-01': {'score': 55.5, 'total_time': 90, 'productive_time': 60},
+        '2024-04-02': {'score': 0, 'total_time': 5, 'productive_time': 0},
+    }
+    storage.save_scores(scores)
+    scores['2024-04-02'] = {'score': 12.0, 'total_time': 20, 'productive_time': 4}
+    # Dates without a record are skipped instead of failing the save
+    storage.save_scores(scores, ['2024-04-02', '2024-04-09'])
+    storage.close()
+    
+    reopened = make_storage(data_dir)
+    assert reopened.load_scores() == scores
+    reopened.close()
+
+def test_reclassify_reports_changes(data_dir):
+    storage = make_storage(data_dir)
+    write_rows(storage, ROWS)
+    changes = []
+    
+    rows, changed, dates = storage.reclassify(
+        lambda app_name, title: app_name == 'code.exe' or None,
+        lambda record, is_productive: changes.append((record.window_title, record.is_productive, is_productive))
+    )
+    assert (rows, changed, dates) == (5, 1, ['2024-04-01'])
+    assert changes == [('YouTube - Google Chrome', False, None)]
+    assert [record.is_productive for record in storage.iter_day('2024-04-01')] == [True, None]
+    storage.close()
+
+def test_close_leaves_other_threads_connections_open(data_dir):
+    storage = make_storage(data_dir)
+    write_rows(storage, ROWS)
+    queried = threading.Event()
+    closed = threading.Event()
+    results = []
+    
+    def reader():
+        records = storage.iter_range('1970-01-01', '9999-12-31')
+        results.append(next(records).timestamp)
+        queried.set()
+        closed.wait(5)
+        # The query started before close() runs to the end
+        results.extend(record.timestamp for record in records)
+        # The next query reconnects
+        results.append(storage.date_span())
+    
+    thread = threading.Thread(target=reader)
+    thread.start()
+    assert queried.wait(5)
+    own = storage._connection()
+    storage.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        own.execute("SELECT 1")
+    closed.set()
+    thread.join(5)
+    
+    assert results == [row[0] for row in ROWS] + [('2024-04-01', '2024-04-05')]
+    storage.close()
+
+def test_connections_of_exited_threads_are_closed(data_dir):
+    storage = make_storage(data_dir)
+    connections = []
+    
+    def reader():
+        storage.date_span()
+        connections.append(storage._connection())
+    
+    for _ in range(3):
+        thread = threading.Thread(target=reader)
+        thread.start()
+        thread.join()
+    # Each new connection closes those left behind by earlier threads
+    assert len(storage._connections) == 2
+    for connection in connections[:2]:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+    
+    storage.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[2].execute("SELECT 1")
+    assert storage._connections == {}
+
+def test_import_legacy_data(data_dir):
+    log_file = data_dir / "activity_log.csv"
+    log_file.write_text(
+        "timestamp,app_name,window_title,duration_seconds,is_productive\n"
+        '2024-04-01 09:00:00,code.exe,"a, ""quoted""\nsecond line",60.0,True\n'
+        "2024-04-01 09:01:00,chrome.exe,b,30.0,False\n"
+    )
+    database_file = str(data_dir / "activity.db")
+    assert import_legacy_data(database_file, str(log_file), str(data_dir / "focus_scores.json"), batch_size=1) == (2, 0)
+    with pytest.raises(RuntimeError):
+        import_legacy_data(database_file, str(log_file), str(data_dir / "focus_scores.json"))
+    
+    storage = make_storage(data_dir)
+    assert [record.window_title for record in storage.iter_day('2024-04-01')] == ['a, "quoted"\nsecond line', 'b']
+    storage.close()
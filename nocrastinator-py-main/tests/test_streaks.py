@@ -0,0 +1,114 @@
+"""
+StreakTracker against a day-by-day scan and the original get_streak, on
+histories with gaps, rescored days and range queries clipping runs.
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from streaks import STREAK_MIN_SCORE, StreakTracker
+
+BASE = date(2024, 1, 1)
+
+def day(offset):
+    return (BASE + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+def legacy_streak(scores, today):
+    """The original FocusScore.get_streak, with today passed in"""
+    streak = 0
+    for i, date_str in enumerate(sorted(scores, reverse=True)):
+        if date.fromisoformat(date_str) == today - timedelta(days=i) and scores[date_str]['score'] >= STREAK_MIN_SCORE:
+            streak += 1
+        else:
+            break
+    return streak
+
+def expected_longest(scores, start_date, end_date):
+    """Longest run of productive days, scanning every day of the range"""
+    longest = run = 0
+    current = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    while current <= end:
+        record = scores.get(current.strftime('%Y-%m-%d'))
+        if record is not None and record['score'] >= STREAK_MIN_SCORE:
+            run += 1
+            longest = max(longest, run)
+        else:
+            run = 0
+        current += timedelta(days=1)
+    return longest
+
+def random_history(rng, days, fill):
+    """Scores for some of the days; missing days are gaps in the history"""
+    return {day(offset): {'score': rng.choice([0, 49.9, 50, 80, 100])} for offset in range(days) if rng.random() < fill}
+
+def assert_matches(tracker, scores, days):
+    for offset in (-3, 0, days // 3, days // 2, days - 1, days, days + 2):
+        today = BASE + timedelta(days=offset)
+        assert tracker.current_streak(today) == legacy_streak(scores, today)
+    
+    assert tracker.longest_streak() == expected_longest(scores, day(-1), day(days))
+    for start, end in ((0, days - 1), (5, 17), (days // 2, days // 2), (-10, 3), (days - 4, days + 10), (30, 20)):
+        assert tracker.longest_streak(day(start), day(end)) == expected_longest(scores, day(start), day(end))
+
+def test_gaps_break_streaks():
+    scores = {day(offset): {'score': 90} for offset in (0, 1, 2, 4, 5, 9)}
+    tracker = StreakTracker()
+    tracker.rebuild(scores)
+    
+    assert tracker.starts == [date.fromisoformat(day(offset)).toordinal() for offset in (0, 4, 9)]
+    assert tracker.longest_streak() == 3
+    assert tracker.longest_streak(day(1), day(5)) == 2
+    assert tracker.current_streak(BASE + timedelta(days=9)) == 1
+    # A day without any score ends the streak like an unproductive one
+    assert tracker.current_streak(BASE + timedelta(days=10)) == 0
+    
+    # Filling the gap merges the runs on both sides
+    tracker.update(day(3), 50)
+    assert tracker.longest_streak() == 6
+    assert tracker.current_streak(BASE + timedelta(days=9)) == 1
+
+def test_future_scores_end_the_current_streak():
+    scores = {day(offset): {'score': 90} for offset in range(5)}
+    scores[day(7)] = {'score': 90}
+    tracker = StreakTracker()
+    tracker.rebuild(scores)
+    assert tracker.current_streak(BASE + timedelta(days=4)) == legacy_streak(scores, BASE + timedelta(days=4)) == 0
+
+def test_empty_tracker():
+    tracker = StreakTracker()
+    tracker.rebuild({})
+    assert tracker.current_streak(BASE) == 0
+    assert tracker.longest_streak() == 0
+    assert tracker.longest_streak(day(0), day(10)) == 0
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rebuild_matches_day_scan(seed):
+    rng = random.Random(seed)
+    scores = random_history(rng, 120, 0.7)
+    tracker = StreakTracker()
+    tracker.rebuild(scores)
+    
+    assert_matches(tracker, scores, 120)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_updates_split_and_merge_runs(seed):
+    rng = random.Random(seed)
+    scores = random_history(rng, 80, 0.8)
+    tracker = StreakTracker()
+    tracker.rebuild(scores)
+    tracker.longest_streak(day(0), day(79))
+    
+    # Rescore old days and add new ones, sometimes skipping days
+    newest = 79
+    for _ in range(40):
+        if rng.random() < 0.3:
+            newest += rng.choice([1, 1, 2, 4])
+            offset = newest
+        else:
+            offset = rng.randrange(0, newest + 1)
+        scores[day(offset)] = {'score': rng.choice([0, 49.9, 50, 100])}
+        tracker.update(day(offset), scores[day(offset)]['score'])
+        assert_matches(tracker, scores, newest + 1)
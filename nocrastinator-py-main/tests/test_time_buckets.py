@@ -0,0 +1,128 @@
+"""
+TimeBucketStore: sessions split across bucket and midnight boundaries, the
+journaled sidecar and catching up from storage on load.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import config
+from storage import CsvStorage
+from time_buckets import TimeBucketStore
+
+def make_storage(data_dir):
+    return CsvStorage(str(data_dir / "activity_log.csv"), str(data_dir / "focus_scores.json"))
+
+def make_store(storage, data_dir):
+    store = TimeBucketStore(storage, str(data_dir / "time_buckets.json"), bucket_minutes=15)
+    store.load()
+    return store
+
+def epoch(moment):
+    return datetime.strptime(moment, '%Y-%m-%d %H:%M:%S').timestamp()
+
+def nonzero(buckets):
+    """{(kind, bucket): seconds} for the filled buckets of one day"""
+    return {
+        (kind, bucket): seconds
+        for kind, row in enumerate(buckets)
+        for bucket, seconds in enumerate(row) if seconds
+    }
+
+def test_session_is_split_across_buckets(data_dir):
+    store = make_store(make_storage(data_dir), data_dir)
+    # 09:40 to 10:20 overlaps four 15-minute buckets
+    store.add(epoch('2024-04-01 10:20:00'), 2400, True)
+    
+    assert nonzero(store.day_buckets('2024-04-01')) == pytest.approx({
+        (0, 38): 300, (0, 39): 900, (0, 40): 900, (0, 41): 300
+    })
+
+def test_session_is_split_across_midnight(data_dir):
+    store = make_store(make_storage(data_dir), data_dir)
+    # Sunday 23:50 to Monday 00:10
+    store.add(epoch('2024-04-08 00:10:00'), 1200, False)
+    
+    assert nonzero(store.day_buckets('2024-04-07')) == pytest.approx({(1, 95): 600})
+    assert nonzero(store.day_buckets('2024-04-08')) == pytest.approx({(1, 0): 600})
+    heatmap = store.heatmap('unproductive', resolution_minutes=60)
+    assert heatmap[6][23] == pytest.approx(600)
+    assert heatmap[0][0] == pytest.approx(600)
+    assert sum(value for row in heatmap for value in row if value) == pytest.approx(1200)
+
+def test_save_journals_only_changed_days(data_dir):
+    storage = make_storage(data_dir)
+    store = make_store(storage, data_dir)
+    for day in range(1, 6):
+        store.add(epoch(f'2024-04-0{day} 12:00:00'), 600, True)
+    store.save()
+    store.add(epoch('2024-04-05 13:00:00'), 300, None)
+    store.save()
+    
+    with open(store.journal_path) as file:
+        lines = [json.loads(line) for line in file]
+    assert [sorted(line['days']) for line in lines] == [
+        ['2024-04-01', '2024-04-02', '2024-04-03', '2024-04-04', '2024-04-05'],
+        ['2024-04-05']
+    ]
+    
+    reloaded = make_store(storage, data_dir)
+    for day in range(1, 6):
+        assert reloaded.day_buckets(f'2024-04-0{day}') == store.day_buckets(f'2024-04-0{day}')
+    assert reloaded.heatmap('total') == store.heatmap('total')
+    assert reloaded.journal_entries == 2
+
+def test_long_journal_is_compacted_on_load(data_dir, monkeypatch):
+    monkeypatch.setattr(config, "TIME_BUCKET_COMPACT_AFTER", 2)
+    storage = make_storage(data_dir)
+    store = make_store(storage, data_dir)
+    for hour in range(10, 13):
+        store.add(epoch(f'2024-04-01 {hour}:00:00'), 600, True)
+        store.save()
+    
+    reloaded = make_store(storage, data_dir)
+    assert not os.path.exists(reloaded.journal_path)
+    assert reloaded.day_buckets('2024-04-01') == store.day_buckets('2024-04-01')
+    assert make_store(storage, data_dir).day_buckets('2024-04-01') == store.day_buckets('2024-04-01')
+
+def test_stale_journal_after_interrupted_compaction(data_dir):
+    storage = make_storage(data_dir)
+    store = make_store(storage, data_dir)
+    store.add(epoch('2024-04-01 10:00:00'), 600, True)
+    store.save()
+    with open(store.journal_path, 'rb') as file:
+        journal = file.read()
+    
+    # More time was added, then the snapshot was renamed into place but the
+    # journal was not yet removed
+    store.add(epoch('2024-04-01 10:10:00'), 600, True)
+    store.compact()
+    with open(store.journal_path, 'wb') as file:
+        file.write(journal)
+    
+    assert make_store(storage, data_dir).day_buckets('2024-04-01') == store.day_buckets('2024-04-01')
+
+def test_load_catches_up_from_storage(data_dir):
+    storage = make_storage(data_dir)
+    store = make_store(storage, data_dir)
+    rows = [
+        ('2024-04-01 10:00:00', 'code.exe', 'a', 600.0, True),
+        ('2024-04-01 10:00:00', 'chrome.exe', 'b', 60.0, False),
+        ('2024-04-01 11:00:00', 'code.exe', 'c', 600.0, True),
+    ]
+    for timestamp, app_name, title, duration, productive in rows[:2]:
+        storage.append_activity(timestamp, app_name, title, duration, productive)
+        store.add(epoch(timestamp), duration, productive)
+    store.save()
+    # Logged but not saved to the buckets before a crash
+    storage.append_activity(*rows[2])
+    storage.flush()
+    
+    reloaded = make_store(storage, data_dir)
+    assert nonzero(reloaded.day_buckets('2024-04-01')) == pytest.approx({
+        (0, 39): 600, (1, 39): 60, (0, 43): 600
+    })
+    storage.close()
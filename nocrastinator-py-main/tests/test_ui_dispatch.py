@@ -0,0 +1,123 @@
+"""
+UiDispatcher: calls posted between frames run in order on the pump,
+repeated posts coalesce, and unchanged widget values are not reapplied.
+"""
+
+import threading
+
+from ui_dispatch import UiDispatcher
+
+class StubRoot:
+    """Records after() calls instead of running a Tk main loop"""
+    
+    def __init__(self):
+        self.scheduled = []
+    
+    def after(self, interval, callback):
+        self.scheduled.append(callback)
+    
+    def frame(self):
+        """Run the next scheduled pump"""
+        self.scheduled.pop(0)()
+
+class StubWidget:
+    def __init__(self):
+        self.calls = []
+    
+    def configure(self, **options):
+        self.calls.append(options)
+    
+    def set(self, value):
+        self.calls.append(value)
+
+def make_dispatcher():
+    root = StubRoot()
+    dispatcher = UiDispatcher(root, interval=10)
+    dispatcher.start()
+    return root, dispatcher
+
+def test_calls_run_on_the_next_frame():
+    root, dispatcher = make_dispatcher()
+    calls = []
+    dispatcher.post(calls.append, "tick")
+    assert calls == []
+    
+    root.frame()
+    assert calls == ["tick"]
+    # The pump schedules itself again
+    assert len(root.scheduled) == 1
+
+def test_repeated_posts_coalesce_into_the_last():
+    root, dispatcher = make_dispatcher()
+    ticks = []
+    tick = dispatcher.wrap(ticks.append)
+    threads = [threading.Thread(target=tick, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tick("last")
+    
+    root.frame()
+    assert ticks == ["last"]
+
+def test_coalesced_call_runs_after_earlier_posts():
+    root, dispatcher = make_dispatcher()
+    calls = []
+    
+    def tick(remaining):
+        calls.append(("tick", remaining))
+    
+    def phase_changed(phase):
+        calls.append(("phase", phase))
+    
+    dispatcher.post(tick, 3)
+    dispatcher.post(phase_changed, "break")
+    # The newer tick belongs to the new phase, so it must paint after it
+    dispatcher.post(tick, 300)
+    
+    root.frame()
+    assert calls == [("phase", "break"), ("tick", 300)]
+
+def test_uncoalesced_posts_all_run_in_order():
+    root, dispatcher = make_dispatcher()
+    alerts = []
+    alert = dispatcher.wrap(alerts.append, coalesce=False)
+    for name in ("first", "second", "third"):
+        alert(name)
+    
+    root.frame()
+    assert alerts == ["first", "second", "third"]
+
+def test_failing_callback_does_not_stop_the_frame():
+    root, dispatcher = make_dispatcher()
+    calls = []
+    dispatcher.post(lambda: 1 / 0)
+    dispatcher.post(calls.append, "after")
+    
+    root.frame()
+    assert calls == ["after"]
+    assert len(root.scheduled) == 1
+
+def test_stop_drops_queued_calls():
+    root, dispatcher = make_dispatcher()
+    calls = []
+    dispatcher.post(calls.append, "dropped")
+    dispatcher.stop()
+    
+    root.frame()
+    assert calls == []
+    assert root.scheduled == []
+
+def test_unchanged_values_are_not_reapplied():
+    root, dispatcher = make_dispatcher()
+    widget = StubWidget()
+    dispatcher.configure(widget, text="25:00", foreground="green")
+    dispatcher.configure(widget, text="25:00", foreground="green")
+    dispatcher.configure(widget, text="24:59", foreground="green")
+    assert widget.calls == [{'text': "25:00", 'foreground': "green"}, {'text': "24:59"}]
+    
+    variable = StubWidget()
+    for value in ("Work", "Work", "Break"):
+        dispatcher.set_var(variable, value)
+    assert variable.calls == ["Work", "Break"]
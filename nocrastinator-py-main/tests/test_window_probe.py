@@ -0,0 +1,52 @@
+"""
+Probe selection and the synthetic probes.
+"""
+
+import sys
+
+import pytest
+
+import window_probe
+from window_probe import NullWindowProbe, ScriptedWindowProbe, config_app_name, create_probe
+
+def test_auto_without_a_display_falls_back_to_the_null_probe(monkeypatch):
+    monkeypatch.setattr(sys, "platform", "linux")
+    monkeypatch.delenv("DISPLAY", raising=False)
+    
+    probe = create_probe("auto")
+    assert isinstance(probe, NullWindowProbe)
+    assert probe.get_active_window() == (None, None)
+    assert not probe.supports_events
+
+def test_auto_falls_back_when_the_probe_fails_to_start(monkeypatch):
+    def unavailable(*args):
+        raise ImportError("No module named 'Xlib'")
+    
+    monkeypatch.setattr(sys, "platform", "linux")
+    monkeypatch.setenv("DISPLAY", ":0")
+    monkeypatch.setattr(window_probe.X11WindowProbe, "__init__", unavailable)
+    assert isinstance(create_probe("auto"), NullWindowProbe)
+
+def test_named_backends_are_not_replaced():
+    with pytest.raises(ValueError):
+        create_probe("wayland")
+    assert isinstance(create_probe("null"), NullWindowProbe)
+
+@pytest.mark.parametrize("process_name, app_name", [
+    ("code", "code.exe"),
+    ("Chrome", "chrome.exe"),
+    ("firefox.exe", "firefox.exe"),
+    ("Discord.EXE", "discord.exe"),
+])
+def test_config_app_name(process_name, app_name):
+    assert config_app_name(process_name) == app_name
+
+def test_scripted_probe_plays_windows_in_order():
+    windows = [("code.exe", "a"), ("chrome.exe", "b")]
+    probe = ScriptedWindowProbe(windows)
+    assert [probe.get_active_window() for _ in range(3)] == windows + [(None, None)]
+    assert probe.exhausted
+    
+    looping = ScriptedWindowProbe(windows, loop=True)
+    assert [looping.get_active_window() for _ in range(3)] == windows + windows[:1]
+    assert not looping.exhausted